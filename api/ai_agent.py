@@ -1,16 +1,129 @@
 import openai
+import asyncio
 import json
+import random
+import re
 import requests
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from types import GeneratorType
+from typing import AsyncIterator, Dict, Generator, Iterator, List, Any, Optional, Tuple
 import os
 from dotenv import load_dotenv
+from llm_cache import response_cache
+from intents import intent_classifier
+from planner import PLANNER_MAX_DAYS, TRIP_START_PLACES, describe_plan, parse_budget, plan_trip
 
 load_dotenv()
 
+LLM_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4')
+# Upper bound on concurrent completions from the async path; the rest queue
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '64'))
+LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '30'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', '0.5'))
+LLM_RETRY_MAX_DELAY = float(os.getenv('LLM_RETRY_MAX_DELAY', '8.0'))
+
+# Transient failures worth another attempt; anything else goes straight to the fallback
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    asyncio.TimeoutError
+)
+
+class Completion:
+    """A chat completion a workflow needs; the workflow receives its text, or None on failure
+
+    With a cache_scope the answer is shared, via the response cache, with
+    identical or similar cache_text (the user's message) in the same scope.
+    takes_draft=False keeps the single-call draft from answering it.
+    """
+
+    __slots__ = ('messages', 'temperature', 'json_mode', 'cache_scope', 'cache_text', 'takes_draft')
+
+    def __init__(self, system_prompt: str, user_content: str, temperature: float = 0.7,
+                 json_mode: bool = False, cache_scope: Optional[str] = None,
+                 cache_text: Optional[str] = None, takes_draft: bool = True):
+        self.messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
+        ]
+        self.temperature = temperature
+        self.json_mode = json_mode
+        self.cache_scope = cache_scope
+        self.cache_text = user_content if cache_text is None else cache_text
+        self.takes_draft = takes_draft
+
+    def request_kwargs(self) -> Dict[str, Any]:
+        kwargs = {
+            "model": LLM_MODEL,
+            "messages": self.messages,
+            "temperature": self.temperature
+        }
+        if self.json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter so retries from many requests spread out"""
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+
+# "two_step": intent analysis, then a reply from the chosen handler.
+# "single": one structured completion returns intent, entities and reply.
+CALL_MODES = ('two_step', 'single')
+AGENT_CALL_MODE = os.getenv('AGENT_CALL_MODE', 'two_step')
+
+# Workflows are generators that yield Completions and get the reply text
+# sent back, so the blocking and asyncio paths share every prompt and
+# fallback and differ only in how a completion is executed.
+Workflow = Generator[Completion, Optional[str], Dict[str, Any]]
+
+def _trip_days(duration: Any, default: int = 5) -> int:
+    """Day count from an LLM "duration" entity (5, "5" or "5 days"), else default"""
+    if isinstance(duration, str):
+        match = re.match(r'\s*(\d+)', duration)
+        duration = int(match.group(1)) if match else None
+    if not isinstance(duration, int) or isinstance(duration, bool) or duration < 1:
+        return default
+    return duration
+
+def _trip_interests(interests: Any, default: List[str]) -> List[str]:
+    """Interests entity as a list of strings; a bare string is one interest"""
+    if isinstance(interests, str):
+        interests = [interests]
+    if not isinstance(interests, list):
+        return default
+    return [interest for interest in interests if isinstance(interest, str) and interest.strip()] or default
+
+def _step(workflow: Workflow, reply: Optional[str]) -> Tuple[bool, Any]:
+    """Advance a workflow: (False, next completion) or (True, its result)
+
+    StopIteration can't cross into a future, so the async drivers run this
+    in a worker thread rather than workflow.send itself.
+    """
+    try:
+        return False, workflow.send(reply)
+    except StopIteration as done:
+        return True, done.value
+
 class ProRaahiAIAgent:
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        # Retries are handled by _complete/_complete_async with jittered backoff
+        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+        self._async_client: Optional[openai.AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self._stats_lock = threading.Lock()
+        self.llm_stats = {
+            "calls": 0,
+            "in_flight": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "failures": 0
+        }
         self.agent_context = {
             "role": "ProRaahi AI Tourism Agent",
             "capabilities": [
@@ -30,35 +143,349 @@ class ProRaahiAIAgent:
             }
         }
 
-    def process_user_request(self, user_message: str, session_context: Dict = None) -> Dict[str, Any]:
-        """Main entry point for processing user requests"""
+    def process_user_request(self, user_message: str, session_context: Dict = None,
+                             mode: Optional[str] = None) -> Dict[str, Any]:
+        """Main entry point for processing user requests; mode is one of CALL_MODES"""
+        try:
+            return self._run(self._request_workflow(user_message, session_context, mode))
+        except Exception as e:
+            return self._technical_difficulties(e)
+
+    async def process_user_request_async(self, user_message: str, session_context: Dict = None,
+                                         mode: Optional[str] = None) -> Dict[str, Any]:
+        """process_user_request for asyncio callers; completions don't block a thread"""
         try:
-            # Analyze user intent
-            intent_analysis = self._analyze_intent(user_message)
-            
-            # Execute appropriate workflow based on intent
-            if intent_analysis["primary_intent"] == "transportation_booking":
-                return self._handle_transportation_workflow(user_message, intent_analysis)
-            elif intent_analysis["primary_intent"] == "accommodation_booking":
-                return self._handle_accommodation_workflow(user_message, intent_analysis)
-            elif intent_analysis["primary_intent"] == "guide_booking":
-                return self._handle_guide_workflow(user_message, intent_analysis)
-            elif intent_analysis["primary_intent"] == "activity_planning":
-                return self._handle_activity_workflow(user_message, intent_analysis)
-            elif intent_analysis["primary_intent"] == "itinerary_creation":
-                return self._handle_itinerary_workflow(user_message, intent_analysis)
+            return await self._run_async(self._request_workflow(user_message, session_context, mode))
+        except Exception as e:
+            return self._technical_difficulties(e)
+
+    def _technical_difficulties(self, error: Exception) -> Dict[str, Any]:
+        return {
+            "response": "I apologize, but I'm experiencing some technical difficulties. Please try again in a moment.",
+            "error": str(error),
+            "requires_human_intervention": True
+        }
+
+    def _request_workflow(self, user_message: str, session_context: Dict = None,
+                          mode: Optional[str] = None) -> Workflow:
+        mode = mode or AGENT_CALL_MODE
+        if mode not in CALL_MODES:
+            raise ValueError(f"Unknown mode '{mode}'; use one of: {', '.join(CALL_MODES)}")
+        
+        # Analyze user intent (in single mode the LLM may draft the reply too)
+        intent_analysis = yield from self._analyze_intent(user_message, with_reply=mode == "single")
+        prepared_reply = intent_analysis.pop("response", None)
+        
+        # Execute appropriate workflow based on intent
+        if intent_analysis["primary_intent"] == "transportation_booking":
+            result = self._handle_transportation_workflow(user_message, intent_analysis)
+        elif intent_analysis["primary_intent"] == "accommodation_booking":
+            result = self._handle_accommodation_workflow(user_message, intent_analysis)
+        elif intent_analysis["primary_intent"] == "guide_booking":
+            result = self._handle_guide_workflow(user_message, intent_analysis)
+        elif intent_analysis["primary_intent"] == "activity_planning":
+            result = self._handle_activity_workflow(user_message, intent_analysis)
+        elif intent_analysis["primary_intent"] == "itinerary_creation":
+            result = self._handle_itinerary_workflow(user_message, intent_analysis)
+        else:
+            result = self._handle_general_inquiry(user_message, intent_analysis)
+        
+        # Handlers that call the LLM are workflows themselves
+        if isinstance(result, GeneratorType):
+            if prepared_reply:
+                result = yield from self._with_prepared_reply(result, prepared_reply)
             else:
-                return self._handle_general_inquiry(user_message, intent_analysis)
-                
+                result = yield from result
+        return result
+
+    def _with_prepared_reply(self, workflow: Workflow, reply: str) -> Workflow:
+        """Answer a handler's reply completion with the single-call draft instead of the LLM"""
+        try:
+            completion = next(workflow)
+            if completion.takes_draft:
+                self._remember(completion, reply)
+                completion = workflow.send(reply)
+            # Any further completions the handler needs go to the LLM as usual
+            while True:
+                completion = workflow.send((yield completion))
+        except StopIteration as done:
+            return done.value
+
+    # Workflow drivers
+
+    def _run(self, workflow: Workflow) -> Dict[str, Any]:
+        try:
+            completion = next(workflow)
+            while True:
+                reply = self._cached_reply(completion)
+                if reply is None:
+                    reply = self._complete(completion)
+                    self._remember(completion, reply)
+                completion = workflow.send(reply)
+        except StopIteration as done:
+            return done.value
+
+    async def _run_async(self, workflow: Workflow) -> Dict[str, Any]:
+        # Steps between completions read the catalog and plan itineraries,
+        # so they run in a worker thread instead of on the event loop
+        done, value = await asyncio.to_thread(_step, workflow, None)
+        while not done:
+            reply = self._cached_reply(value)
+            if reply is None:
+                reply = await self._complete_async(value)
+                self._remember(value, reply)
+            done, value = await asyncio.to_thread(_step, workflow, reply)
+        return value
+
+    # Streaming drivers: reply completions are streamed token by token; the
+    # intent analysis (JSON) still runs as a single call. Tokens are a
+    # preview, the "done" result's response is authoritative (e.g. when the
+    # stream fails midway and the handler falls back to canned text).
+
+    def stream_user_request(self, user_message: str, session_context: Dict = None,
+                            mode: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        """Yield ("token", text) while the reply is generated, then ("done", result)
+
+        Closing the generator (the client went away) closes the upstream
+        OpenAI stream, which aborts the generation.
+        """
+        streamed = False
+        try:
+            workflow = self._request_workflow(user_message, session_context, mode)
+            try:
+                completion = next(workflow)
+                while True:
+                    reply = self._cached_reply(completion)
+                    if reply is not None:
+                        yield "token", reply
+                        streamed = True
+                    elif completion.json_mode:
+                        reply = self._complete(completion)
+                        self._remember(completion, reply)
+                    else:
+                        reply = yield from self._stream_completion(completion)
+                        self._remember(completion, reply)
+                        streamed = streamed or reply is not None
+                    completion = workflow.send(reply)
+            except StopIteration as done:
+                result = done.value
         except Exception as e:
-            return {
-                "response": "I apologize, but I'm experiencing some technical difficulties. Please try again in a moment.",
-                "error": str(e),
-                "requires_human_intervention": True
-            }
+            result = self._technical_difficulties(e)
+
+        if not streamed and result.get("response"):
+            yield "token", result["response"]
+        yield "done", result
 
-    def _analyze_intent(self, user_message: str) -> Dict[str, Any]:
-        """Analyze user message to determine intent and extract entities"""
+    def _stream_completion(self, completion: Completion) -> Generator[Tuple[str, str], None, Optional[str]]:
+        """Yield ("token", text) per delta; returns the full text, or None on failure"""
+        self._count("calls")
+        parts: List[str] = []
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            stream = None
+            try:
+                stream = self.openai_client.chat.completions.create(
+                    **completion.request_kwargs(), stream=True, timeout=LLM_TIMEOUT_SECONDS)
+                for chunk in stream:
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        parts.append(text)
+                        yield "token", text
+                return "".join(parts)
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.APITimeoutError):
+                    self._count("timeouts")
+                # Once tokens have reached the client a retry would repeat them
+                if parts or attempt == LLM_MAX_RETRIES:
+                    break
+                self._count("retries")
+                time.sleep(retry_delay(attempt))
+            except Exception:
+                break
+            finally:
+                # Also runs on GeneratorExit, so a cancelled client aborts the upstream request
+                if stream is not None:
+                    stream.close()
+        self._count("failures")
+        return None
+
+    async def stream_user_request_async(self, user_message: str, session_context: Dict = None,
+                                        mode: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """stream_user_request for asyncio callers; cancelling the task aborts the generation"""
+        streamed = False
+        try:
+            workflow = self._request_workflow(user_message, session_context, mode)
+            # As in _run_async, steps between completions run off the event loop
+            done, completion = await asyncio.to_thread(_step, workflow, None)
+            while not done:
+                reply = self._cached_reply(completion)
+                if reply is not None:
+                    yield "token", reply
+                    streamed = True
+                elif completion.json_mode:
+                    reply = await self._complete_async(completion)
+                    self._remember(completion, reply)
+                else:
+                    async for kind, value in self._stream_completion_async(completion):
+                        if kind == "token":
+                            yield kind, value
+                        else:
+                            reply = value
+                    self._remember(completion, reply)
+                    streamed = streamed or reply is not None
+                done, completion = await asyncio.to_thread(_step, workflow, reply)
+            result = completion
+        except Exception as e:
+            result = self._technical_difficulties(e)
+
+        if not streamed and result.get("response"):
+            yield "token", result["response"]
+        yield "done", result
+
+    async def _stream_completion_async(self, completion: Completion) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """Yield ("token", text) per delta, then ("reply", full text or None on failure)"""
+        self._count("calls")
+        client = self._get_async_client()
+        parts: List[str] = []
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            stream = None
+            try:
+                async with self._get_semaphore():
+                    self._count("in_flight")
+                    try:
+                        stream = await asyncio.wait_for(
+                            client.chat.completions.create(**completion.request_kwargs(), stream=True),
+                            LLM_TIMEOUT_SECONDS
+                        )
+                        async for chunk in stream:
+                            text = chunk.choices[0].delta.content if chunk.choices else None
+                            if text:
+                                parts.append(text)
+                                yield "token", text
+                    finally:
+                        self._count("in_flight", -1)
+                        if stream is not None:
+                            await stream.close()
+                yield "reply", "".join(parts)
+                return
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, (asyncio.TimeoutError, openai.APITimeoutError)):
+                    self._count("timeouts")
+                if parts or attempt == LLM_MAX_RETRIES:
+                    break
+                self._count("retries")
+                await asyncio.sleep(retry_delay(attempt))
+            except Exception:
+                break
+        self._count("failures")
+        yield "reply", None
+
+    def _cache_scope(self, workflow: str, entities: Dict) -> str:
+        """Answers are only reused between messages with the same workflow, entities and model"""
+        return f"{LLM_MODEL}|{workflow}|{json.dumps(entities, sort_keys=True, default=str)}"
+
+    def _cached_reply(self, completion: Completion) -> Optional[str]:
+        if completion.cache_scope is None:
+            return None
+        return response_cache.lookup(completion.cache_scope, completion.cache_text)
+
+    def _remember(self, completion: Completion, reply: Optional[str]):
+        # Fallback text (reply None) is never cached
+        if completion.cache_scope is not None and reply is not None:
+            response_cache.store(completion.cache_scope, completion.cache_text, reply)
+
+    def _count(self, name: str, delta: int = 1):
+        with self._stats_lock:
+            self.llm_stats[name] += delta
+
+    def _complete(self, completion: Completion) -> Optional[str]:
+        """Blocking completion with retries; None once attempts are exhausted"""
+        self._count("calls")
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                response = self.openai_client.chat.completions.create(
+                    **completion.request_kwargs(), timeout=LLM_TIMEOUT_SECONDS)
+                return response.choices[0].message.content
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.APITimeoutError):
+                    self._count("timeouts")
+                if attempt == LLM_MAX_RETRIES:
+                    break
+                self._count("retries")
+                time.sleep(retry_delay(attempt))
+            except Exception:
+                break
+        self._count("failures")
+        return None
+
+    def _get_async_client(self) -> openai.AsyncOpenAI:
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+        return self._async_client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # A semaphore belongs to one event loop; make a fresh one if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _complete_async(self, completion: Completion) -> Optional[str]:
+        """Non-blocking completion bounded by LLM_MAX_CONCURRENCY; None on failure"""
+        self._count("calls")
+        client = self._get_async_client()
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                async with self._get_semaphore():
+                    self._count("in_flight")
+                    try:
+                        response = await asyncio.wait_for(
+                            client.chat.completions.create(**completion.request_kwargs()),
+                            LLM_TIMEOUT_SECONDS
+                        )
+                    finally:
+                        self._count("in_flight", -1)
+                return response.choices[0].message.content
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, (asyncio.TimeoutError, openai.APITimeoutError)):
+                    self._count("timeouts")
+                if attempt == LLM_MAX_RETRIES:
+                    break
+                self._count("retries")
+                # Back off outside the semaphore so waiting doesn't hold a slot
+                await asyncio.sleep(retry_delay(attempt))
+            except Exception:
+                break
+        self._count("failures")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.llm_stats)
+        stats.update({
+            "model": LLM_MODEL,
+            "max_concurrency": LLM_MAX_CONCURRENCY,
+            "timeout_seconds": LLM_TIMEOUT_SECONDS,
+            "max_retries": LLM_MAX_RETRIES
+        })
+        return stats
+
+    def _analyze_intent(self, user_message: str, with_reply: bool = False) -> Workflow:
+        """Analyze user message to determine intent and extract entities
+
+        Cached analyses and confident keyword-rule matches are answered
+        locally; only ambiguous messages cost an LLM round trip. With
+        with_reply that round trip also drafts the user-facing reply,
+        returned under "response".
+        """
+        cached = intent_classifier.cached(user_message)
+        if cached is not None:
+            return cached
+        
+        local_analysis, confident = intent_classifier.classify_local(user_message)
+        if confident:
+            return local_analysis
+        
         system_prompt = f"""
         You are an intent analysis system for ProRaahi, a Jharkhand tourism platform. 
         Analyze the user message and return a JSON response with:
@@ -75,27 +502,40 @@ class ProRaahiAIAgent:
         
         Context about Jharkhand: {json.dumps(self.agent_context["knowledge_base"])}
         """
+        if with_reply:
+            system_prompt += self._single_call_instructions()
+        
+        content = yield Completion(system_prompt, user_message, temperature=0.5 if with_reply else 0.3,
+                                   json_mode=True)
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
-            )
-            
-            return json.loads(response.choices[0].message.content)
-        except Exception as e:
-            # Fallback intent analysis
-            return {
-                "primary_intent": "general_inquiry",
-                "entities": {},
-                "confidence": 0.5,
-                "next_actions": ["provide_general_assistance"]
-            }
+            analysis = json.loads(content)
+            reply = analysis.pop("response", None)
+            analysis["classifier"] = "llm"
+        except (TypeError, ValueError, AttributeError):
+            # Fallback intent analysis: the best guess the rules could make
+            intent_classifier.record_llm(user_message, None)
+            return local_analysis
+        
+        # The draft reply is for this request only; the cache keeps the analysis
+        intent_classifier.record_llm(user_message, dict(analysis))
+        if isinstance(reply, str) and reply.strip():
+            analysis["response"] = reply
+        return analysis
+
+    def _single_call_instructions(self) -> str:
+        """Extra field for the intent prompt so one completion also answers the user"""
+        return f"""
+        5. response: The reply to show the user, written as the matching specialist would:
+           - guide_booking: recommend 2-3 suitable guides with reasons, their specialties and cultural insights, and booking next steps
+           - activity_planning: cultural significance, best times, what makes each experience unique, practical details
+           - itinerary_creation: one short sentence (the day-by-day plan is built separately)
+           - general_inquiry: helpful, engaging information about Jharkhand, offering help with bookings or planning
+           - transportation_booking / accommodation_booking: one short sentence (options are listed separately)
+        
+        Available guides: {json.dumps(self._search_guides({}))}
+        Available activities: {json.dumps(self._search_activities({}))}
+        """
 
     def _handle_transportation_workflow(self, user_message: str, intent_data: Dict) -> Dict[str, Any]:
         """Handle transportation booking workflow"""
@@ -165,7 +605,7 @@ class ProRaahiAIAgent:
             "next_actions": ["await_user_selection", "proceed_to_booking"]
         }
 
-    def _handle_guide_workflow(self, user_message: str, intent_data: Dict) -> Dict[str, Any]:
+    def _handle_guide_workflow(self, user_message: str, intent_data: Dict) -> Workflow:
         """Handle local guide booking workflow"""
         entities = intent_data.get("entities", {})
         
@@ -184,18 +624,11 @@ class ProRaahiAIAgent:
         Available guides: {json.dumps(guide_results[:3])}
         """
         
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": "Generate a helpful response about these guides."}
-                ],
-                temperature=0.7
-            )
-            
-            ai_response = response.choices[0].message.content
-        except:
+        ai_response = yield Completion(
+            system_prompt, "Generate a helpful response about these guides.",
+            cache_scope=self._cache_scope("guide_booking", entities), cache_text=user_message
+        )
+        if ai_response is None:
             ai_response = "I found several excellent local guides who can provide authentic Jharkhand experiences. Let me show you the best matches for your interests."
         
         return {
@@ -205,7 +638,7 @@ class ProRaahiAIAgent:
             "next_actions": ["present_guide_profiles", "check_availability"]
         }
 
-    def _handle_activity_workflow(self, user_message: str, intent_data: Dict) -> Dict[str, Any]:
+    def _handle_activity_workflow(self, user_message: str, intent_data: Dict) -> Workflow:
         """Handle activity and experience planning workflow"""
         entities = intent_data.get("entities", {})
         
@@ -225,18 +658,9 @@ class ProRaahiAIAgent:
         Available activities: {json.dumps(activity_results[:4])}
         """
         
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.7
-            )
-            
-            ai_response = response.choices[0].message.content
-        except:
+        ai_response = yield Completion(
+            system_prompt, user_message, cache_scope=self._cache_scope("activity_planning", entities))
+        if ai_response is None:
             ai_response = "I've found some amazing cultural and adventure activities that showcase the best of Jharkhand's heritage and natural beauty."
         
         return {
@@ -246,12 +670,12 @@ class ProRaahiAIAgent:
             "next_actions": ["present_activity_details", "check_availability"]
         }
 
-    def _handle_itinerary_workflow(self, user_message: str, intent_data: Dict) -> Dict[str, Any]:
+    def _handle_itinerary_workflow(self, user_message: str, intent_data: Dict) -> Workflow:
         """Handle complete itinerary creation workflow"""
         entities = intent_data.get("entities", {})
         
         # Generate comprehensive itinerary
-        itinerary = self._create_personalized_itinerary(entities, user_message)
+        itinerary = yield from self._create_personalized_itinerary(entities, user_message)
         
         return {
             "response": itinerary["description"],
@@ -260,7 +684,7 @@ class ProRaahiAIAgent:
             "next_actions": ["review_itinerary", "proceed_to_bookings"]
         }
 
-    def _handle_general_inquiry(self, user_message: str, intent_data: Dict) -> Dict[str, Any]:
+    def _handle_general_inquiry(self, user_message: str, intent_data: Dict) -> Workflow:
         """Handle general tourism inquiries"""
         system_prompt = f"""
         You are ProRaahi's AI tourism assistant for Jharkhand. Provide helpful, engaging responses about:
@@ -275,18 +699,11 @@ class ProRaahiAIAgent:
         Context: {json.dumps(self.agent_context)}
         """
         
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.7
-            )
-            
-            ai_response = response.choices[0].message.content
-        except:
+        ai_response = yield Completion(
+            system_prompt, user_message,
+            cache_scope=self._cache_scope("general_inquiry", intent_data.get("entities", {}))
+        )
+        if ai_response is None:
             ai_response = "I'm here to help you discover the incredible cultural richness and natural beauty of Jharkhand! What specific aspect of your journey would you like to explore?"
         
         return {
@@ -391,62 +808,50 @@ class ProRaahiAIAgent:
             "reasoning": "Selected based on location, amenities, and guest reviews."
         }
 
-    def _create_personalized_itinerary(self, entities: Dict, user_message: str) -> Dict:
-        """Create a comprehensive personalized itinerary"""
-        duration = entities.get("duration", "5 days")
-        interests = entities.get("interests", ["culture", "nature"])
+    def _create_personalized_itinerary(self, entities: Dict, user_message: str) -> Workflow:
+        """Plan the itinerary from the catalog; the LLM only phrases the plan"""
+        # Entities come from the LLM, so check them as /api/itinerary/plan does
+        days = min(_trip_days(entities.get("duration")), PLANNER_MAX_DAYS)
+        duration = f"{days} day" if days == 1 else f"{days} days"
+        interests = _trip_interests(entities.get("interests"), ["culture", "nature"])
+        start_city = entities.get("from_location")
+        
+        plan = plan_trip(
+            days, interests, budget=parse_budget(user_message),
+            start_city=start_city if isinstance(start_city, str) and start_city in TRIP_START_PLACES else None
+        )
+        plan_json = json.dumps(plan["days"], sort_keys=True)
         
         system_prompt = f"""
-        Create a detailed {duration} itinerary for Jharkhand focusing on {', '.join(interests)}.
-        Include:
-        1. Day-by-day activities with timing
-        2. Cultural experiences and festivals
-        3. Local food recommendations
-        4. Transportation between locations
-        5. Accommodation suggestions
-        6. Budget estimates
-        7. Cultural etiquette tips
-        
-        Make it authentic and immersive, highlighting Jharkhand's unique tribal heritage.
+        Present this {duration} Jharkhand itinerary for a traveller interested in {', '.join(interests)}.
+        The plan below is final: describe it day by day using only its activities, travel legs,
+        hotels and costs, without adding, removing or reordering anything.
+        Add short local food suggestions and cultural etiquette tips.
+        Total estimated cost: INR {plan['total_cost']:,.0f}.
         """
         
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.7
-            )
-            
-            itinerary_content = response.choices[0].message.content
-        except:
-            itinerary_content = f"Here's a wonderful {duration} itinerary showcasing Jharkhand's cultural heritage and natural beauty, tailored to your interests in {', '.join(interests)}."
+        # Keyed by the plan itself, so a catalog change never reuses old
+        # phrasing; a single-call draft was written before the plan existed
+        itinerary_content = yield Completion(
+            system_prompt, plan_json,
+            cache_scope=self._cache_scope("itinerary_creation", {"plan": plan_json}),
+            takes_draft=False
+        )
+        if itinerary_content is None:
+            itinerary_content = describe_plan(plan)
         
         return {
             "description": itinerary_content,
             "duration": duration,
             "interests": interests,
-            "estimated_budget": self._calculate_budget_estimate(duration, interests)
-        }
-
-    def _calculate_budget_estimate(self, duration: str, interests: List[str]) -> Dict:
-        """Calculate estimated budget for the trip"""
-        # Simplified budget calculation
-        days = int(duration.split()[0]) if duration.split()[0].isdigit() else 5
-        
-        base_cost_per_day = 3000  # Base cost in INR
-        if "luxury" in interests:
-            base_cost_per_day *= 2
-        elif "budget" in interests:
-            base_cost_per_day *= 0.6
-        
-        return {
-            "total_estimated": base_cost_per_day * days,
-            "per_day": base_cost_per_day,
-            "currency": "INR",
-            "includes": ["accommodation", "meals", "activities", "local transport"]
+            "estimated_budget": {
+                "total_estimated": plan["total_cost"],
+                "per_day": round(plan["total_cost"] / len(plan["days"]), 2),
+                "currency": plan["currency"],
+                "breakdown": plan["cost_breakdown"],
+                "within_budget": plan["within_budget"]
+            },
+            "plan": plan
         }
 
 # Initialize the AI agent
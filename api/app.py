@@ -1,225 +1,232 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import sqlite3
 import os
+import time
 from datetime import datetime, timedelta
 import json
-from ai_agent import ai_agent
-from external_apis import external_api
+from ai_agent import ai_agent, CALL_MODES
+from external_apis import external_api, BUNDLE_DEADLINE_SECONDS
+from database import db
+from migrations import create_schema
+from search import search_catalog
+from filters import guide_filters, activity_filters, hotel_filters, transportation_filters
+from mappers import GUIDE_MAPPER, ACTIVITY_MAPPER, TRANSPORTATION_MAPPER, HOTEL_MAPPER
+from cache import cache_key
+from catalog import catalog_cache
+from responses import prepare_json, send_prepared
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, fetch_all, fetch_page, sort_key, stream_json_array
+from transcripts import transcript_writer
+from llm_cache import response_cache
+from intents import intent_classifier
+from sse import sse_event, sse_response
+from prefetch import prefetcher, PREFETCH_ENABLED
+from planner import plan_trip, PLANNER_MAX_DAYS
+from routing import road_network, road_option
+from connections import JOURNEY_MAX_TRANSFERS, clock_minutes, journey_option, load_timetable
+from inventory import (BOOKING_HOLD_SECONDS, BookingConflict, Reservation, availability, cancel, confirm, hold,
+                       parse_date, release_expired, reservation_for, set_capacity, sweep_expired, units_left)
 
 app = Flask(__name__)
 CORS(app)
 
 # Database initialization
 def init_db():
-    conn = sqlite3.connect('proraahi.db')
-    cursor = conn.cursor()
-    
-    # Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            phone TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Bookings table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS bookings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            booking_type TEXT NOT NULL,
-            booking_data TEXT NOT NULL,
-            status TEXT DEFAULT 'pending',
-            total_amount REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    # Guides table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS guides (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            location TEXT NOT NULL,
-            specialties TEXT NOT NULL,
-            languages TEXT NOT NULL,
-            experience_years INTEGER,
-            price_per_day REAL,
-            rating REAL DEFAULT 0.0,
-            total_reviews INTEGER DEFAULT 0,
-            availability_status TEXT DEFAULT 'available',
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Activities table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS activities (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            category TEXT NOT NULL,
-            location TEXT NOT NULL,
-            duration TEXT,
-            group_size TEXT,
-            price REAL,
-            rating REAL DEFAULT 0.0,
-            total_reviews INTEGER DEFAULT 0,
-            description TEXT,
-            highlights TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Chat messages table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS chat_messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT NOT NULL,
-            user_message TEXT,
-            ai_response TEXT,
-            context_data TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Transportation table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS transportation (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            transport_type TEXT NOT NULL,
-            name TEXT NOT NULL,
-            from_location TEXT NOT NULL,
-            to_location TEXT NOT NULL,
-            departure_time TEXT,
-            arrival_time TEXT,
-            duration TEXT,
-            price REAL,
-            class_type TEXT,
-            availability_status TEXT DEFAULT 'available',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Hotels table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS hotels (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            category TEXT NOT NULL,
-            location TEXT NOT NULL,
-            rating REAL DEFAULT 0.0,
-            total_reviews INTEGER DEFAULT 0,
-            price_per_night REAL,
-            amenities TEXT,
-            description TEXT,
-            image_url TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        create_schema(conn)
 
 # Initialize database on startup
 init_db()
 
+# Keep weather, alerts, events and routes for known destinations warm
+if PREFETCH_ENABLED:
+    prefetcher.start()
+
 # API Routes
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "message": "ProRaahi API is running"})
 
+def chat_reply(session_id, user_message, agent_response):
+    """Queue the chat turn for storage and build the /api/chat response body"""
+    ai_response = agent_response.get('response', 'I apologize, but I cannot process your request right now.')
+    
+    # Store additional context if available
+    context_data = {
+        'workflow_stage': agent_response.get('workflow_stage'),
+        'next_actions': agent_response.get('next_actions', []),
+        'search_results': agent_response.get('search_results'),
+        'recommendations': agent_response.get('recommendation')
+    }
+    
+    # Store chat interaction with context (written in batches off the request path)
+    transcript_writer.record(session_id, user_message, ai_response, context_data)
+    
+    return {
+        "response": ai_response,
+        "session_id": session_id,
+        "timestamp": datetime.now().isoformat(),
+        "workflow_data": agent_response
+    }
+
 @app.route('/api/chat', methods=['POST'])
 def chat_endpoint():
     try:
         data = request.get_json()
         user_message = data.get('message', '')
         session_id = data.get('session_id', 'default')
-        
-        # Store user message
-        conn = sqlite3.connect('proraahi.db')
-        cursor = conn.cursor()
+        # Optional per-request agent mode: "two_step" or "single" completion
+        mode = data.get('mode')
+        if mode and mode not in CALL_MODES:
+            return jsonify({"error": f"mode must be one of: {', '.join(CALL_MODES)}"}), 400
         
         # Generate AI response (placeholder - will be replaced with actual AI agent)
-        agent_response = ai_agent.process_user_request(user_message)
-        ai_response = agent_response.get('response', 'I apologize, but I cannot process your request right now.')
-        
-        # Store additional context if available
-        context_data = {
-            'workflow_stage': agent_response.get('workflow_stage'),
-            'next_actions': agent_response.get('next_actions', []),
-            'search_results': agent_response.get('search_results'),
-            'recommendations': agent_response.get('recommendation')
-        }
+        agent_response = ai_agent.process_user_request(user_message, mode=mode)
         
-        # Store chat interaction with context
-        cursor.execute('''
-            INSERT INTO chat_messages (session_id, user_message, ai_response, context_data)
-            VALUES (?, ?, ?, ?)
-        ''', (session_id, user_message, ai_response, json.dumps(context_data)))
-        
-        conn.commit()
-        conn.close()
-        
-        return jsonify({
-            "response": ai_response,
-            "session_id": session_id,
-            "timestamp": datetime.now().isoformat(),
-            "workflow_data": agent_response
-        })
+        return jsonify(chat_reply(session_id, user_message, agent_response))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def chat_stream_events(session_id, user_message, agent_stream):
+    """SSE frames for a streamed chat turn: start, token..., done
+
+    If the client disconnects the server closes this generator, which closes
+    the agent stream (aborting the upstream generation) and stores whatever
+    was generated so far as a cancelled turn. An agent error sends an error
+    event before done, since the 200 headers have already gone out.
+    """
+    streamed = []
+    finished = False
+    try:
+        yield sse_event('start', {'session_id': session_id})
+        try:
+            for kind, value in agent_stream:
+                if kind == 'token':
+                    streamed.append(value)
+                    yield sse_event('token', {'text': value})
+                else:
+                    finished = True
+                    yield sse_event('done', chat_reply(session_id, user_message, value))
+        except Exception as e:
+            print(f"❌ Chat stream error: {e}")
+            finished = True
+            yield sse_event('error', {'error': str(e)})
+            yield sse_event('done', chat_reply(session_id, user_message,
+                                               {'response': ''.join(streamed), 'workflow_stage': 'error'}))
+    finally:
+        agent_stream.close()
+        if not finished:
+            chat_reply(session_id, user_message, {'response': ''.join(streamed), 'workflow_stage': 'cancelled'})
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream_endpoint():
+    """Same request body as /api/chat; the reply streams back as Server-Sent Events"""
+    try:
+        data = request.get_json()
+        user_message = data.get('message', '')
+        session_id = data.get('session_id', 'default')
+        mode = data.get('mode')
+        if mode and mode not in CALL_MODES:
+            return jsonify({"error": f"mode must be one of: {', '.join(CALL_MODES)}"}), 400
+
+        agent_stream = ai_agent.stream_user_request(user_message, mode=mode)
+        return sse_response(chat_stream_events(session_id, user_message, agent_stream))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def query_transportation(from_location, to_location):
+    with db.connection() as conn:
+        options = TRANSPORTATION_MAPPER.fetch(conn, *transportation_filters(from_location, to_location))
+    # Then journeys that change along the way, and driving inside Jharkhand
+    journeys = load_timetable().search(from_location, to_location)['journeys']
+    options += [journey_option(journey, from_location, to_location)
+                for journey in journeys if journey['transfers']]
+    road = road_option(from_location, to_location)
+    return options + [road] if road else options
+
+def with_seats_left(conn, options, travel_date):
+    """Copies of the transportation options with the seats left on travel_date
+
+    A connecting journey has as many seats as its fullest leg; legs departing
+    after midnight count against the next day's inventory.
+    """
+    def legs(option):
+        return option.get('legs') or [dict(option, day=0)]
+    def leg_date(leg):
+        return (travel_date + timedelta(days=leg.get('day', 0))).isoformat()
+    
+    left = units_left(conn, 'transportation', {
+        (leg['id'], leg_date(leg)) for option in options for leg in legs(option) if leg.get('id') is not None
+    })
+    annotated = []
+    for option in options:
+        option = dict(option, date=travel_date.isoformat())
+        seats = [left[(leg['id'], leg_date(leg))] for leg in legs(option) if leg.get('id') is not None]
+        if seats:
+            option['seats_available'] = min(seats)
+            if option['seats_available'] < 1:
+                option['availability_status'] = 'sold_out'
+        annotated.append(option)
+    return annotated
+
+def catalog_response(key, loader):
+    """Serve a catalog query from its cached, pre-serialized response"""
+    prepared = catalog_cache.get_or_load(
+        key, lambda: prepare_json(loader(), catalog_cache.version()))
+    return send_prepared(prepared)
+
+def catalog_listing(name, mapper, filters, build_filters):
+    """Full, keyset-paginated (?limit=&cursor=) or streamed (?stream=true) catalog listing"""
+    sort = request.args.get('sort', 'id')
+    fields = sorted(field for field in request.args.get('fields', '').split(',') if field)
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    
+    try:
+        mapper = mapper.project(fields)
+        sort_key(mapper, sort)
+        if cursor:
+            decode_cursor(cursor, sort)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    where, params = build_filters(**filters)
+    
+    if request.args.get('stream', '').lower() == 'true':
+        return Response(stream_json_array(db, mapper, where, params, sort), mimetype='application/json')
+    
+    if limit is not None or cursor:
+        limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+        def load():
+            with db.connection() as conn:
+                return fetch_page(conn, mapper, where, params, sort, limit, cursor)
+    else:
+        def load():
+            with db.connection() as conn:
+                return fetch_all(conn, mapper, where, params, sort)
+    
+    key = cache_key(name, sort=sort, fields=','.join(fields), limit=limit, cursor=cursor, **filters)
+    return catalog_response(key, load)
+
+def _filter_arg(name, *any_values):
+    """Query argument with the frontend's "show everything" placeholders mapped to None"""
+    value = request.args.get(name)
+    if not value or value in any_values:
+        return None
+    return value
+
 @app.route('/api/guides', methods=['GET'])
 def get_guides():
     try:
-        location = request.args.get('location')
-        specialty = request.args.get('specialty')
-        
-        conn = sqlite3.connect('proraahi.db')
-        cursor = conn.cursor()
+        filters = {
+            'location': _filter_arg('location', 'all'),
+            'specialty': _filter_arg('specialty', 'all'),
+            'language': _filter_arg('language', 'all')
+        }
         
-        query = "SELECT * FROM guides WHERE 1=1"
-        params = []
-        
-        if location and location != 'all':
-            query += " AND location = ?"
-            params.append(location)
-            
-        if specialty and specialty != 'all':
-            query += " AND specialties LIKE ?"
-            params.append(f"%{specialty}%")
-        
-        cursor.execute(query, params)
-        guides = cursor.fetchall()
-        
-        # Convert to list of dictionaries
-        guide_list = []
-        for guide in guides:
-            guide_dict = {
-                "id": guide[0],
-                "name": guide[1],
-                "location": guide[2],
-                "specialties": guide[3].split(',') if guide[3] else [],
-                "languages": guide[4].split(',') if guide[4] else [],
-                "experience_years": guide[5],
-                "price_per_day": guide[6],
-                "rating": guide[7],
-                "total_reviews": guide[8],
-                "availability_status": guide[9],
-                "description": guide[10]
-            }
-            guide_list.append(guide_dict)
-        
-        conn.close()
-        return jsonify(guide_list)
+        return catalog_listing('guides', GUIDE_MAPPER, filters, guide_filters)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -227,46 +234,12 @@ def get_guides():
 @app.route('/api/activities', methods=['GET'])
 def get_activities():
     try:
-        category = request.args.get('category')
-        location = request.args.get('location')
-        
-        conn = sqlite3.connect('proraahi.db')
-        cursor = conn.cursor()
+        filters = {
+            'category': _filter_arg('category', 'All categories'),
+            'location': _filter_arg('location', 'All locations')
+        }
         
-        query = "SELECT * FROM activities WHERE 1=1"
-        params = []
-        
-        if category and category != 'All categories':
-            query += " AND category = ?"
-            params.append(category)
-            
-        if location and location != 'All locations':
-            query += " AND location = ?"
-            params.append(location)
-        
-        cursor.execute(query, params)
-        activities = cursor.fetchall()
-        
-        # Convert to list of dictionaries
-        activity_list = []
-        for activity in activities:
-            activity_dict = {
-                "id": activity[0],
-                "title": activity[1],
-                "category": activity[2],
-                "location": activity[3],
-                "duration": activity[4],
-                "group_size": activity[5],
-                "price": activity[6],
-                "rating": activity[7],
-                "total_reviews": activity[8],
-                "description": activity[9],
-                "highlights": activity[10].split(',') if activity[10] else []
-            }
-            activity_list.append(activity_dict)
-        
-        conn.close()
-        return jsonify(activity_list)
+        return catalog_listing('activities', ACTIVITY_MAPPER, filters, activity_filters)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -278,78 +251,112 @@ def search_transportation():
         from_location = data.get('from')
         to_location = data.get('to')
         date = data.get('date')
-        
-        conn = sqlite3.connect('proraahi.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM transportation 
-            WHERE from_location = ? AND to_location = ? AND availability_status = 'available'
-        ''', (from_location, to_location))
-        
-        results = cursor.fetchall()
-        
-        # Convert to list of dictionaries
-        transport_list = []
-        for transport in results:
-            transport_dict = {
-                "id": transport[0],
-                "transport_type": transport[1],
-                "name": transport[2],
-                "from_location": transport[3],
-                "to_location": transport[4],
-                "departure_time": transport[5],
-                "arrival_time": transport[6],
-                "duration": transport[7],
-                "price": transport[8],
-                "class_type": transport[9],
-                "availability_status": transport[10]
-            }
-            transport_list.append(transport_dict)
-        
-        conn.close()
-        return jsonify(transport_list)
-        
+        if not from_location or not to_location:
+            return jsonify({"error": "from and to are required"}), 400
+        
+        key = cache_key('transportation', from_location=from_location, to_location=to_location)
+        if not date:
+            return catalog_response(key, lambda: query_transportation(from_location, to_location))
+        
+        # Seats left change with every booking, so only the options are cached
+        travel_date = parse_date(date)
+        options = catalog_cache.get_or_load(key + ('options',), lambda: query_transportation(from_location, to_location))
+        with db.connection() as conn:
+            sweep_expired(conn)
+            return jsonify(with_seats_left(conn, options, travel_date))
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/transportation/journeys', methods=['POST'])
+def search_journeys():
+    """Direct and connecting journeys, Pareto-optimal by arrival time, price and transfers"""
+    try:
+        data = request.get_json()
+        from_location = data.get('from')
+        to_location = data.get('to')
+        depart_after = clock_minutes(data.get('time') or '00:00')
+        max_transfers = data.get('max_transfers', JOURNEY_MAX_TRANSFERS)
+        if not from_location or not to_location:
+            return jsonify({"error": "from and to are required"}), 400
+        if depart_after is None:
+            return jsonify({"error": "time must be HH:MM"}), 400
+        if not isinstance(max_transfers, int) or not 0 <= max_transfers <= JOURNEY_MAX_TRANSFERS:
+            return jsonify({"error": f"max_transfers must be an integer from 0 to {JOURNEY_MAX_TRANSFERS}"}), 400
+        
+        result = load_timetable().search(from_location, to_location, depart_after, max_transfers,
+                                         include_road=data.get('include_road', True) is not False)
+        result['date'] = data.get('date')
+        return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/hotels', methods=['GET'])
 def get_hotels():
     try:
-        location = request.args.get('location')
-        
-        conn = sqlite3.connect('proraahi.db')
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM hotels WHERE 1=1"
-        params = []
-        
-        if location and location != 'All locations':
-            query += " AND location = ?"
-            params.append(location)
-        
-        cursor.execute(query, params)
-        hotels = cursor.fetchall()
-        
-        # Convert to list of dictionaries
-        hotel_list = []
-        for hotel in hotels:
-            hotel_dict = {
-                "id": hotel[0],
-                "name": hotel[1],
-                "category": hotel[2],
-                "location": hotel[3],
-                "rating": hotel[4],
-                "total_reviews": hotel[5],
-                "price_per_night": hotel[6],
-                "amenities": hotel[7].split(',') if hotel[7] else [],
-                "description": hotel[8],
-                "image_url": hotel[9]
-            }
-            hotel_list.append(hotel_dict)
-        
-        conn.close()
-        return jsonify(hotel_list)
+        filters = {
+            'location': _filter_arg('location', 'All locations'),
+            'amenity': _filter_arg('amenity', 'all')
+        }
+        
+        return catalog_listing('hotels', HOTEL_MAPPER, filters, hotel_filters)
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Catalog and LLM cache hit/miss counters, connection pool, transcript writer, LLM usage, external API circuits and the road route matrix"""
+    return jsonify({
+        "catalog_cache": catalog_cache.stats(),
+        "database_pool": db.stats(),
+        "transcript_writer": transcript_writer.stats(),
+        "llm": ai_agent.stats(),
+        "llm_response_cache": response_cache.stats(),
+        "intent_classifier": intent_classifier.stats(),
+        "external_apis": external_api.stats(),
+        "road_network": road_network.stats()
+    })
+
+@app.route('/api/admin/prefetch', methods=['GET'])
+def prefetch_status():
+    """Background prefetch schedule, last cycle outcome and cache counters"""
+    return jsonify({"prefetch": prefetcher.status(), "external_apis": external_api.stats()})
+
+@app.route('/api/admin/prefetch/run', methods=['POST'])
+def run_prefetch():
+    """Start a prefetch cycle now instead of at the next interval"""
+    if not PREFETCH_ENABLED:
+        return jsonify({"error": "Prefetching is disabled (PREFETCH_ENABLED=false)"}), 400
+    prefetcher.run_now()
+    return jsonify({"prefetch": prefetcher.status()}), 202
+
+@app.route('/api/admin/transcripts/flush', methods=['POST'])
+def flush_transcripts():
+    """Block until queued chat transcripts are committed"""
+    flushed = transcript_writer.flush()
+    return jsonify({"flushed": flushed, "transcript_writer": transcript_writer.stats()})
+
+@app.route('/api/admin/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """Drop cached catalog reads after out-of-band catalog edits"""
+    catalog_cache.invalidate()
+    return jsonify({"status": "invalidated", "catalog_cache": catalog_cache.stats()})
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """Ranked keyword search across guides, activities and hotels"""
+    try:
+        text = request.args.get('q', '')
+        entity_type = request.args.get('type')
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        
+        with db.connection() as conn:
+            results = search_catalog(conn, text, entity_type, limit)
+        
+        return jsonify({"query": text, "results": results})
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -365,35 +372,124 @@ def create_booking():
         booking_data = data.get('booking_data', {})
         total_amount = data.get('total_amount', 0)
         
-        conn = sqlite3.connect('proraahi.db')
-        cursor = conn.cursor()
-        
-        # Create or get user
-        cursor.execute('''
-            INSERT OR IGNORE INTO users (name, email, phone)
-            VALUES (?, ?, ?)
-        ''', (user_data.get('name'), user_data.get('email'), user_data.get('phone')))
-        
-        cursor.execute('SELECT id FROM users WHERE email = ?', (user_data.get('email'),))
-        user_id = cursor.fetchone()[0]
+        # Bookings naming an item_id hold its seats/rooms/guide-days until confirmed
+        try:
+            reservation = reservation_for(booking_type, booking_data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        hold_expires_at = time.time() + BOOKING_HOLD_SECONDS if reservation else None
+        held = (None,) * 5
         
-        # Create booking
-        cursor.execute('''
-            INSERT INTO bookings (user_id, booking_type, booking_data, total_amount)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, booking_type, json.dumps(booking_data), total_amount))
-        
-        booking_id = cursor.lastrowid
-        
-        conn.commit()
-        conn.close()
+        with db.connection() as conn:
+            cursor = conn.cursor()
+            
+            if reservation:
+                # Take the write lock up front: a deferred transaction that
+                # reads first can't upgrade to a writer once another has committed
+                cursor.execute('BEGIN IMMEDIATE')
+                release_expired(conn)
+                hold(conn, reservation)
+                held = (reservation.resource_type, reservation.resource_id, reservation.start,
+                        reservation.days, reservation.quantity)
+            
+            # Create or get user
+            cursor.execute('''
+                INSERT OR IGNORE INTO users (name, email, phone)
+                VALUES (?, ?, ?)
+            ''', (user_data.get('name'), user_data.get('email'), user_data.get('phone')))
+            
+            cursor.execute('SELECT id FROM users WHERE email = ?', (user_data.get('email'),))
+            user_id = cursor.fetchone()[0]
+            
+            # Create booking
+            cursor.execute('''
+                INSERT INTO bookings (user_id, booking_type, booking_data, total_amount,
+                                      resource_type, resource_id, start_date, days, quantity, hold_expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, booking_type, json.dumps(booking_data), total_amount) + held + (hold_expires_at,))
+            
+            booking_id = cursor.lastrowid
         
         return jsonify({
             "booking_id": booking_id,
             "status": "pending",
+            "hold_expires_at": datetime.fromtimestamp(hold_expires_at).isoformat() if hold_expires_at else None,
             "message": "Booking created successfully"
         })
         
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except BookingConflict as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def booking_transition(booking_id, action, status):
+    """Apply confirm() or cancel() to a booking in one write transaction"""
+    try:
+        with db.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            action(conn, booking_id)
+        return jsonify({"booking_id": booking_id, "status": status})
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except BookingConflict as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/bookings/<int:booking_id>/confirm', methods=['POST'])
+def confirm_booking(booking_id):
+    """Confirm a pending booking before its hold expires"""
+    return booking_transition(booking_id, confirm, 'confirmed')
+
+@app.route('/api/bookings/<int:booking_id>/cancel', methods=['POST'])
+def cancel_booking(booking_id):
+    """Cancel a booking and put what it held back on sale"""
+    return booking_transition(booking_id, cancel, 'cancelled')
+
+@app.route('/api/availability', methods=['GET'])
+def get_availability():
+    """Seats, rooms or guide-days left per date: ?type=hotel&item_id=3&date=2026-11-02&days=7"""
+    try:
+        resource_type = request.args.get('type')
+        resource_id = request.args.get('item_id', type=int)
+        start = request.args.get('date')
+        days = request.args.get('days', 1, type=int)
+        
+        with db.connection() as conn:
+            # Writes only when a hold has lapsed (see sweep_expired)
+            sweep_expired(conn)
+            dates = availability(conn, resource_type, resource_id, start, days)
+        
+        return jsonify({
+            "type": resource_type,
+            "item_id": resource_id,
+            "dates": dates,
+            "available": min(entry['available'] for entry in dates)
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/inventory', methods=['PUT'])
+def update_inventory():
+    """Set the capacity on sale for a span of dates"""
+    try:
+        data = request.get_json()
+        reservation = Reservation(data.get('type'), data.get('item_id'), data.get('date'), data.get('days', 1))
+        
+        with db.connection() as conn:
+            set_capacity(conn, reservation, data.get('capacity'))
+            dates = availability(conn, reservation.resource_type, reservation.resource_id,
+                                 reservation.start, reservation.days)
+        
+        return jsonify({"type": reservation.resource_type, "item_id": reservation.resource_id, "dates": dates})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except BookingConflict as e:
+        return jsonify({"error": str(e)}), 409
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -432,12 +528,70 @@ def get_route_info():
         data = request.get_json()
         from_location = data.get('from')
         to_location = data.get('to')
+        if not from_location or not to_location:
+            return jsonify({"error": "from and to are required"}), 400
         
         route_data = external_api.get_route_information(from_location, to_location)
+        if route_data is None:
+            return jsonify({"error": f"No road route known between {from_location} and {to_location}"}), 404
         return jsonify(route_data)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/destinations/bundle', methods=['POST'])
+def get_destination_bundle():
+    """Weather, safety alerts, events and route info for a trip's locations in one call"""
+    try:
+        data = request.get_json()
+        locations = data.get('locations') or []
+        routes = data.get('routes')
+        if not isinstance(locations, list) or not locations or not all(isinstance(l, str) for l in locations):
+            return jsonify({"error": "locations must be a non-empty list of names"}), 400
+        if routes is not None:
+            if not all(isinstance(r, (list, tuple)) and len(r) == 2 for r in routes):
+                return jsonify({"error": "routes must be a list of [from, to] pairs"}), 400
+            routes = [tuple(route) for route in routes]
+        deadline = data.get('deadline', BUNDLE_DEADLINE_SECONDS)
+        # "not > 0" also rejects NaN
+        if not isinstance(deadline, (int, float)) or isinstance(deadline, bool) or not deadline > 0:
+            return jsonify({"error": "deadline must be a positive number of seconds"}), 400
+        
+        bundle = external_api.get_destination_bundle(
+            locations,
+            routes,
+            date_range=str(data.get('days', '30')),
+            deadline=min(deadline, BUNDLE_DEADLINE_SECONDS)
+        )
+        return jsonify(bundle)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/itinerary/plan', methods=['POST'])
+def plan_itinerary():
+    """Day-by-day itinerary from the catalog for days, interests, budget and start city"""
+    try:
+        data = request.get_json()
+        days = data.get('days', 3)
+        interests = data.get('interests') or []
+        budget = data.get('budget')
+        if not isinstance(days, int) or not 1 <= days <= PLANNER_MAX_DAYS:
+            return jsonify({"error": f"days must be an integer from 1 to {PLANNER_MAX_DAYS}"}), 400
+        if not isinstance(interests, list) or not all(isinstance(i, str) for i in interests):
+            return jsonify({"error": "interests must be a list of strings"}), 400
+        if budget is not None and (not isinstance(budget, (int, float)) or budget <= 0):
+            return jsonify({"error": "budget must be a positive number"}), 400
+        start_city = data.get('start_city')
+        if start_city is not None:
+            # Unknown places have no road distances to plan with
+            start_city = road_network.resolve(start_city) if isinstance(start_city, str) else None
+            if start_city is None:
+                return jsonify({"error": f"start_city must be one of: {', '.join(sorted(road_network.places))}"}), 400
+        
+        plan = plan_trip(days, interests, budget=budget, start_city=start_city)
+        return jsonify(plan)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/agent/workflow', methods=['POST'])
 def agent_workflow():
     """Handle complex AI agent workflows"""
@@ -446,9 +600,12 @@ def agent_workflow():
         workflow_type = data.get('workflow_type')
         user_input = data.get('user_input', '')
         context = data.get('context', {})
+        mode = data.get('mode')
+        if mode and mode not in CALL_MODES:
+            return jsonify({"error": f"mode must be one of: {', '.join(CALL_MODES)}"}), 400
         
         # Process through AI agent
-        result = ai_agent.process_user_request(user_input, context)
+        result = ai_agent.process_user_request(user_input, context, mode)
         
         return jsonify(result)
         
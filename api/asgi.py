@@ -0,0 +1,176 @@
+"""ASGI entry point: `uvicorn asgi:app --app-dir api`
+
+Chat routes run on the event loop through the agent's asyncio path, so one
+worker holds many in-flight conversations while they wait on the LLM.
+Every other route is served by the Flask app through asgiref's WSGI adapter.
+"""
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+from asgiref.wsgi import WsgiToAsgi
+
+from ai_agent import ai_agent, CALL_MODES
+from app import app as flask_app, chat_reply
+from sse import sse_event
+from database import db
+from prefetch import prefetcher
+from transcripts import transcript_writer
+
+flask_asgi = WsgiToAsgi(flask_app)
+
+async def _read_json(receive) -> Dict[str, Any]:
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    return json.loads(body) if body else {}
+
+async def _send_json(send, payload: Any, status: int = 200):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+            # Same default as flask_cors on the WSGI routes
+            (b'access-control-allow-origin', b'*')
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def chat(scope, receive, send):
+    """Async twin of app.chat_endpoint"""
+    try:
+        data = await _read_json(receive)
+        user_message = data.get('message', '')
+        session_id = data.get('session_id', 'default')
+        mode = data.get('mode')
+        if mode and mode not in CALL_MODES:
+            return await _send_json(send, {"error": f"mode must be one of: {', '.join(CALL_MODES)}"}, 400)
+
+        agent_response = await ai_agent.process_user_request_async(user_message, mode=mode)
+
+        await _send_json(send, chat_reply(session_id, user_message, agent_response))
+
+    except Exception as e:
+        await _send_json(send, {"error": str(e)}, 500)
+
+async def agent_workflow(scope, receive, send):
+    """Async twin of app.agent_workflow"""
+    try:
+        data = await _read_json(receive)
+        user_input = data.get('user_input', '')
+        context = data.get('context', {})
+        mode = data.get('mode')
+        if mode and mode not in CALL_MODES:
+            return await _send_json(send, {"error": f"mode must be one of: {', '.join(CALL_MODES)}"}, 400)
+
+        result = await ai_agent.process_user_request_async(user_input, context, mode)
+
+        await _send_json(send, result)
+
+    except Exception as e:
+        await _send_json(send, {"error": str(e)}, 500)
+
+async def chat_stream(scope, receive, send):
+    """Async twin of app.chat_stream_endpoint
+
+    A client disconnect cancels the streaming task, which closes the upstream
+    OpenAI stream; the partial reply is stored as a cancelled turn. An agent
+    error ends the stream with an error event and then done.
+    """
+    try:
+        data = await _read_json(receive)
+        user_message = data.get('message', '')
+        session_id = data.get('session_id', 'default')
+        mode = data.get('mode')
+        if mode and mode not in CALL_MODES:
+            return await _send_json(send, {"error": f"mode must be one of: {', '.join(CALL_MODES)}"}, 400)
+    except Exception as e:
+        return await _send_json(send, {"error": str(e)}, 500)
+
+    streamed = []
+
+    async def stream_events():
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                (b'access-control-allow-origin', b'*')
+            ]
+        })
+
+        async def emit(event, payload):
+            frame = sse_event(event, payload).encode('utf-8')
+            await send({'type': 'http.response.body', 'body': frame, 'more_body': True})
+
+        await emit('start', {'session_id': session_id})
+        agent_stream = ai_agent.stream_user_request_async(user_message, mode=mode)
+        try:
+            async for kind, value in agent_stream:
+                if kind == 'token':
+                    streamed.append(value)
+                    await emit('token', {'text': value})
+                else:
+                    await emit('done', chat_reply(session_id, user_message, value))
+        except Exception as e:
+            print(f"❌ Chat stream error: {e}")
+            await emit('error', {'error': str(e)})
+            await emit('done', chat_reply(session_id, user_message,
+                                          {'response': ''.join(streamed), 'workflow_stage': 'error'}))
+        finally:
+            await agent_stream.aclose()
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    streaming = asyncio.ensure_future(stream_events())
+    disconnect = asyncio.ensure_future(wait_for_disconnect())
+    await asyncio.wait({streaming, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    disconnect.cancel()
+    if not streaming.done():
+        streaming.cancel()
+        chat_reply(session_id, user_message, {'response': ''.join(streamed), 'workflow_stage': 'cancelled'})
+    try:
+        await streaming
+    except (asyncio.CancelledError, OSError):
+        pass
+
+ASYNC_ROUTES: Dict[tuple, Callable[..., Awaitable[None]]] = {
+    ('POST', '/api/chat'): chat,
+    ('POST', '/api/chat/stream'): chat_stream,
+    ('POST', '/api/agent/workflow'): agent_workflow
+}
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            prefetcher.stop()
+            # Write out queued transcripts before the process exits
+            transcript_writer.close()
+            db.close_all()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+
+    if scope['type'] == 'http':
+        handler = ASYNC_ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            return await handler(scope, receive, send)
+
+    await flask_asgi(scope, receive, send)
@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed TTL"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value, calling loader() and caching its result on a miss"""
+        value = self.get(key)
+        if value is MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None):
+        """Drop every entry, or only those whose key matches predicate"""
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if predicate(key)]:
+                    del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class _Load:
+    """One in-flight loader call that concurrent callers of the same key wait on"""
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+class RefreshingCache:
+    """Bounded LRU cache for slow upstream data
+
+    Entries are fresh for ttl_seconds, then served stale for up to
+    stale_seconds more while one background call refreshes them. Concurrent
+    misses for a key share a single loader call. A loader returning None
+    (e.g. upstream unavailable) is not cached, so the stale value survives a
+    failed refresh.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600.0, stale_seconds: float = 1800.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        # key -> (fresh_until, stale_until, value)
+        self._entries: OrderedDict = OrderedDict()
+        self._loads: Dict[Hashable, _Load] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.failed_loads = 0
+        self.evictions = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        refresh = leader = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                fresh_until, stale_until, value = entry
+                if now < stale_until:
+                    self._entries.move_to_end(key)
+                    if now < fresh_until:
+                        self.hits += 1
+                        return value
+                    self.stale_hits += 1
+                    if key not in self._loads:
+                        self._loads[key] = load = _Load()
+                        refresh = True
+                        self.refreshes += 1
+                else:
+                    del self._entries[key]
+                    entry = None
+            if entry is None:
+                load = self._loads.get(key)
+                if load is None:
+                    self._loads[key] = load = _Load()
+                    leader = True
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+
+        if entry is not None:
+            if refresh:
+                threading.Thread(target=self._load, args=(key, loader, load), daemon=True).start()
+            return value
+        if leader:
+            self._load(key, loader, load)
+        else:
+            load.done.wait()
+        if load.error is not None:
+            raise load.error
+        return load.value
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether get_or_load would answer key straight away (fresh or stale), without loading"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() < entry[1]
+
+    def refresh(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Load key now, sharing any load already in flight, and cache the result"""
+        with self._lock:
+            load = self._loads.get(key)
+            leader = load is None
+            if leader:
+                self._loads[key] = load = _Load()
+                self.refreshes += 1
+        if leader:
+            self._load(key, loader, load)
+        else:
+            load.done.wait()
+        if load.error is not None:
+            raise load.error
+        return load.value
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], load: _Load):
+        try:
+            load.value = loader()
+        except Exception as e:
+            load.error = e
+        with self._lock:
+            if load.value is not None:
+                now = time.monotonic()
+                fresh_until = now + self.ttl_seconds
+                self._entries[key] = (fresh_until, fresh_until + self.stale_seconds, load.value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self.failed_loads += 1
+            del self._loads[key]
+        load.done.set()
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None):
+        """Drop every entry, or only those whose key matches predicate"""
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if predicate(key)]:
+                    del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'stale_seconds': self.stale_seconds,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'refreshes': self.refreshes,
+            'failed_loads': self.failed_loads,
+            'evictions': self.evictions,
+            'hit_rate': round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+        }
+
+def cache_key(name: str, **params) -> tuple:
+    """Normalized key: parameter order and empty/None values don't matter"""
+    return (name,) + tuple(sorted(
+        (param, value.strip() if isinstance(value, str) else value)
+        for param, value in params.items()
+        if value is not None and value != ''
+    ))
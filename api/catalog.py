@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from cache import TTLCache
+from database import ConnectionPool, db
+
+CATALOG_CACHE_SIZE = int(os.getenv('CATALOG_CACHE_SIZE', '512'))
+CATALOG_CACHE_TTL = float(os.getenv('CATALOG_CACHE_TTL', '300'))
+# How stale a cached catalog read may be after another process (e.g.
+# scripts/run_seed.py) writes to the catalog tables
+CATALOG_VERSION_CHECK_INTERVAL = float(os.getenv('CATALOG_VERSION_CHECK_INTERVAL', '1.0'))
+
+def read_catalog_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute('SELECT version FROM catalog_version WHERE id = 1').fetchone()
+    return row[0] if row else 0
+
+class CatalogCache:
+    """Read-through cache for catalog queries, invalidated by the catalog version"""
+
+    def __init__(self, pool: ConnectionPool, max_entries: int = CATALOG_CACHE_SIZE,
+                 ttl_seconds: float = CATALOG_CACHE_TTL,
+                 version_check_interval: float = CATALOG_VERSION_CHECK_INTERVAL):
+        self._pool = pool
+        self._cache = TTLCache(max_entries, ttl_seconds)
+        self.version_check_interval = version_check_interval
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.invalidations = 0
+
+    def version(self) -> int:
+        """Current catalog version, re-read from the database at most once per interval"""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.version_check_interval:
+            return self._version
+
+        with self._pool.connection() as conn:
+            version = read_catalog_version(conn)
+
+        with self._lock:
+            if self._version is not None and version != self._version:
+                # Entries are keyed by version, so old ones are unreachable;
+                # clearing just frees the memory straight away.
+                self._cache.invalidate()
+                self.invalidations += 1
+            self._version = version
+            self._checked_at = now
+        return version
+
+    def get_or_load(self, key: tuple, loader: Callable[[], Any]) -> Any:
+        return self._cache.get_or_load((self.version(),) + key, loader)
+
+    def invalidate(self):
+        """Hook for in-process catalog writes: drop everything and re-read the version"""
+        with self._lock:
+            self._cache.invalidate()
+            self._checked_at = 0.0
+            self._version = None
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats.update({
+            'catalog_version': self._version,
+            'invalidations': self.invalidations,
+            'version_check_interval': self.version_check_interval
+        })
+        return stats
+
+# Shared cache used by the catalog routes
+catalog_cache = CatalogCache(db)
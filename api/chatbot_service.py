@@ -6,7 +6,15 @@ import requests
 from google.cloud import dialogflow
 from google.oauth2 import service_account
 import uuid
+import threading
+import time
+from collections import OrderedDict
+from itertools import cycle
+from google.cloud.dialogflow_v2.services.sessions.transports import SessionsGrpcTransport
 from dotenv import load_dotenv
+from sse import sse_event, sse_response
+from fallback_intents import analyze_message
+from itinerary_templates import render_itinerary
 
 # Load environment variables
 load_dotenv()
@@ -19,19 +27,99 @@ DIALOGFLOW_PROJECT_ID = os.getenv('DIALOGFLOW_PROJECT_ID', 'mineral-droplet-4721
 DIALOGFLOW_SESSION_ID = "default-session"
 DIALOGFLOW_LANGUAGE_CODE = "en"  # Default language
 GOOGLE_APPLICATION_CREDENTIALS = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'credentials/service-account-key.json')
+# Per-user Dialogflow sessions: bounded LRU, dropped after idling this long
+# (Dialogflow itself forgets session contexts after about 20 minutes)
+DIALOGFLOW_SESSION_CACHE_SIZE = int(os.getenv('DIALOGFLOW_SESSION_CACHE_SIZE', '10000'))
+DIALOGFLOW_SESSION_IDLE_SECONDS = float(os.getenv('DIALOGFLOW_SESSION_IDLE_SECONDS', '1200'))
+# Shared gRPC channels to Dialogflow, kept alive between messages, and the per-call deadline
+DIALOGFLOW_CHANNEL_POOL_SIZE = int(os.getenv('DIALOGFLOW_CHANNEL_POOL_SIZE', '2'))
+DIALOGFLOW_KEEPALIVE_MS = int(os.getenv('DIALOGFLOW_KEEPALIVE_MS', '30000'))
+DIALOGFLOW_TIMEOUT_SECONDS = float(os.getenv('DIALOGFLOW_TIMEOUT_SECONDS', '5'))
+
+class DialogflowSessions:
+    """Maps frontend session ids to Dialogflow session paths so context carries across turns"""
+    
+    def __init__(self, project_id, max_sessions=DIALOGFLOW_SESSION_CACHE_SIZE, idle_seconds=DIALOGFLOW_SESSION_IDLE_SECONDS):
+        self.project_id = project_id
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._sessions = OrderedDict()  # frontend session id -> (session path, last used)
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+    
+    def path_for(self, user_session_id=None):
+        """Session path for this user, or a one-off session when the client sent no id"""
+        if not user_session_id:
+            with self._lock:
+                self.created += 1
+            return dialogflow.SessionsClient.session_path(self.project_id, str(uuid.uuid4()))
+        
+        key = str(user_session_id)[:128]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.pop(key, None)
+            if entry is not None and now - entry[1] < self.idle_seconds:
+                path = entry[0]
+                self.reused += 1
+            else:
+                if entry is not None:
+                    self.expired += 1
+                # Dialogflow session ids are limited to 36 characters, so users get a fresh UUID
+                path = dialogflow.SessionsClient.session_path(self.project_id, str(uuid.uuid4()))
+                self.created += 1
+            self._sessions[key] = (path, now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+            return path
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'active': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'idle_seconds': self.idle_seconds,
+                'reused': self.reused,
+                'created': self.created,
+                'expired': self.expired,
+                'evicted': self.evicted
+            }
+
+def create_session_clients(credentials, pool_size=DIALOGFLOW_CHANNEL_POOL_SIZE):
+    """SessionsClients over long-lived gRPC channels with keepalive pings"""
+    options = [
+        ('grpc.keepalive_time_ms', DIALOGFLOW_KEEPALIVE_MS),
+        ('grpc.keepalive_timeout_ms', 10000),
+        ('grpc.keepalive_permit_without_calls', 1),
+        ('grpc.http2.max_pings_without_data', 0)
+    ]
+    clients = []
+    for _ in range(max(pool_size, 1)):
+        channel = SessionsGrpcTransport.create_channel(credentials=credentials, options=options)
+        clients.append(dialogflow.SessionsClient(transport=SessionsGrpcTransport(channel=channel)))
+    return clients
+
+dialogflow_sessions = DialogflowSessions(DIALOGFLOW_PROJECT_ID)
 
 # Initialize Dialogflow client
 session_client = None
 session_path = None
+session_clients = None
+_session_clients_lock = threading.Lock()
 
 try:
     if os.path.exists(GOOGLE_APPLICATION_CREDENTIALS):
         # Initialize with service account credentials
         credentials = service_account.Credentials.from_service_account_file(GOOGLE_APPLICATION_CREDENTIALS)
-        session_client = dialogflow.SessionsClient(credentials=credentials)
+        clients = create_session_clients(credentials)
+        session_client = clients[0]
+        session_clients = cycle(clients)
         session_path = session_client.session_path(DIALOGFLOW_PROJECT_ID, DIALOGFLOW_SESSION_ID)
         print("✅ Dialogflow client initialized successfully")
-        print(f"📋 Project ID: {DIALOGFLOW_PROJECT_ID}")
+        print(f"📋 Project ID: {DIALOGFLOW_PROJECT_ID} ({len(clients)} gRPC channels)")
     else:
         print("⚠️ Dialogflow credentials not found")
         print("🔄 Running in fallback mode - local intent processing only")
@@ -96,53 +184,81 @@ def index():
 def chat():
     """Handle text-based chat messages via Dialogflow"""
     try:
-        data = request.json
-        user_message = data.get('message', '')
-        language = data.get('language', 'en')
-        
-        # Map language codes for Dialogflow
-        language_map = {
-            'en': 'en-US',
-            'hi': 'hi',
-            'bn': 'bn',
-            'or': 'or',
-            'ur': 'ur'
-        }
-        
-        dialogflow_language = language_map.get(language, 'en-US')
-        
-        # Use Dialogflow if available, otherwise use fallback
-        if session_client is not None:
-            print(f"🤖 Processing with Dialogflow: '{user_message}' (Language: {dialogflow_language})")
-            response_text = query_dialogflow(user_message, dialogflow_language)
-        else:
-            print(f"🔄 Processing with fallback: '{user_message}' (Language: {language})")
-            response_text = process_intent_fallback(user_message, language)
-        
-        return jsonify({
-            'success': True,
-            'response': response_text,
-            'language': language,
-            'processing_mode': 'dialogflow' if session_client else 'fallback'
-        })
+        return jsonify(answer_chat(request.json))
     except Exception as e:
         print(f"❌ Chat error: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
-def query_dialogflow(message, language_code):
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """/chat as Server-Sent Events: start, token (one per line of the reply), done"""
+    data = request.json
+    
+    def events():
+        yield sse_event('start', {'language': data.get('language', 'en')})
+        try:
+            result = answer_chat(data)
+        except Exception as e:
+            print(f"❌ Chat error: {e}")
+            result = {'success': False, 'error': str(e)}
+        # Dialogflow and the fallback answer in one piece, so the reply is
+        # sent line by line for the client to render progressively
+        for line in result.get('response', '').splitlines(keepends=True):
+            yield sse_event('token', {'text': line})
+        yield sse_event('done', result)
+    
+    return sse_response(events())
+
+def answer_chat(data):
+    """Response body for a /chat request"""
+    user_message = data.get('message', '')
+    language = data.get('language', 'en')
+    
+    # Map language codes for Dialogflow
+    language_map = {
+        'en': 'en-US',
+        'hi': 'hi',
+        'bn': 'bn',
+        'or': 'or',
+        'ur': 'ur'
+    }
+    
+    dialogflow_language = language_map.get(language, 'en-US')
+    
+    # Use Dialogflow if available, otherwise use fallback
+    if session_client is not None:
+        print(f"🤖 Processing with Dialogflow: '{user_message}' (Language: {dialogflow_language})")
+        response_text = query_dialogflow(user_message, dialogflow_language, data.get('session_id'))
+    else:
+        print(f"🔄 Processing with fallback: '{user_message}' (Language: {language})")
+        response_text = process_intent_fallback(user_message, language)
+    
+    return {
+        'success': True,
+        'response': response_text,
+        'language': language,
+        'processing_mode': 'dialogflow' if session_client else 'fallback'
+    }
+
+def next_session_client():
+    """Round-robin over the shared channel pool"""
+    with _session_clients_lock:
+        return next(session_clients)
+
+def query_dialogflow(message, language_code, user_session_id=None):
     """Query Dialogflow for intent recognition and response"""
     try:
-        # Create session path with unique session ID for each query
-        session_id = str(uuid.uuid4())
-        current_session_path = session_client.session_path(DIALOGFLOW_PROJECT_ID, session_id)
+        # Reuse the user's session so Dialogflow keeps its conversation contexts
+        current_session_path = dialogflow_sessions.path_for(user_session_id)
         
         # Create text input
         text_input = dialogflow.TextInput(text=message, language_code=language_code)
         query_input = dialogflow.QueryInput(text=text_input)
         
         # Send request to Dialogflow
-        response = session_client.detect_intent(
-            request={"session": current_session_path, "query_input": query_input}
+        response = next_session_client().detect_intent(
+            request={"session": current_session_path, "query_input": query_input},
+            timeout=DIALOGFLOW_TIMEOUT_SECONDS
         )
         
         # Log the response for debugging
@@ -164,30 +280,21 @@ def query_dialogflow(message, language_code):
 
 def process_intent_fallback(user_message, language='en'):
     """Fallback intent processing when Dialogflow is not available"""
-    user_message_lower = user_message.lower()
+    # Intent, trip length and interests in one pass over the message
+    analysis = analyze_message(user_message)
+    intent = analysis['intent']
     
-    # Greeting intent
-    if any(word in user_message_lower for word in ['hello', 'hi', 'hey', 'namaste', 'namaskar', 'নমস্কার', 'ନମସ୍କାର', 'السلام']):
+    if intent == 'greeting':
         return get_greeting_response(language)
-    
-    # Tourist places intent
-    elif any(word in user_message_lower for word in ['places', 'tourist', 'visit', 'attraction', 'spots', 'पर्यटन', 'স্থান', 'ପର୍ଯ୍ୟଟନ', 'مقامات']):
+    elif intent == 'tourist_places':
         return get_tourist_places_response(language)
-    
-    # Itinerary planning intent
-    elif any(word in user_message_lower for word in ['plan', 'itinerary', 'trip', 'tour', 'day', 'योजना', 'পরিকল্পনা', 'ଯୋଜନା', 'منصوبہ']):
-        return plan_itinerary(user_message, language)
-    
-    # Cultural information intent
-    elif any(word in user_message_lower for word in ['cultural', 'culture', 'heritage', 'tribal', 'temple', 'सांस्कृतिक', 'সংস্কৃতি', 'ସଂସ୍କୃତି', 'ثقافت']):
+    elif intent == 'itinerary':
+        return plan_itinerary(user_message, language, analysis)
+    elif intent == 'cultural':
         return get_cultural_info(language)
-    
-    # Eco tourism intent
-    elif any(word in user_message_lower for word in ['eco', 'nature', 'wildlife', 'forest', 'falls', 'प्राकृतिक', 'প্রকৃতি', 'ପ୍ରକୃତি', 'قدرتی']):
+    elif intent == 'eco_tourism':
         return get_eco_tourism_info(language)
-    
-    # Help intent
-    elif any(word in user_message_lower for word in ['help', 'assist', 'support', 'मदद', 'সাহায্য', 'ସାହାଯ୍ୟ', 'مدد']):
+    elif intent == 'help':
         return get_help_response(language)
     
     # Default response
@@ -280,12 +387,13 @@ def get_tourist_places_response(language='en'):
 
 Would you like detailed information about any specific attraction or plan a customized itinerary?"""
 
-def plan_itinerary(user_message, language='en'):
+def plan_itinerary(user_message, language='en', analysis=None):
     """Generate itinerary based on user input and language"""
     
     # Extract information from user message
-    days = extract_days(user_message)
-    interests = extract_interests(user_message)
+    analysis = analysis or analyze_message(user_message)
+    days = analysis['days']
+    interests = analysis['interests']
     
     if not days:
         if language == 'hi':
@@ -295,186 +403,24 @@ def plan_itinerary(user_message, language='en'):
         else:
             return "To plan your perfect Jharkhand itinerary, please tell me:\n• Number of days?\n• Your interests (nature/cultural/adventure)?\n• Budget range?\n\nExample: 'Plan a 3 day nature trip'"
     
-    # Generate itinerary based on language
-    if language == 'hi':
-        return generate_hindi_itinerary(days, interests)
-    elif language == 'bn':
-        return generate_bengali_itinerary(days, interests)
-    else:
-        return generate_english_itinerary(days, interests)
-
-def generate_english_itinerary(days, interests):
-    """Generate English itinerary"""
-    itinerary = f"🗓️ {days}-Day Jharkhand Itinerary:\n\n"
-    
-    if days >= 1:
-        itinerary += "📅 Day 1: Ranchi Exploration\n"
-        itinerary += "• Morning: Visit Hundru Falls (98m waterfall)\n"
-        itinerary += "• Afternoon: Rock Garden - boating and adventure activities\n"
-        itinerary += "• Evening: Pahari Mandir for panoramic sunset views\n"
-        itinerary += "• Night: Stay in Ranchi city\n\n"
-    
-    if days >= 2:
-        itinerary += "📅 Day 2: Cultural Heritage Tour\n"
-        itinerary += "• Morning: Jagannath Temple - architectural marvel\n"
-        itinerary += "• Afternoon: Tribal Museum - rich cultural heritage\n"
-        itinerary += "• Evening: Local market shopping for tribal handicrafts\n"
-        itinerary += "• Night: Cultural folk dance performance\n\n"
-    
-    if days >= 3:
-        itinerary += "📅 Day 3: Netarhat Hill Station\n"
-        itinerary += "• Early morning: Drive to Netarhat (Queen of Chotanagpur)\n"
-        itinerary += "• Morning: Sunrise point experience\n"
-        itinerary += "• Afternoon: Nature walks and local tribal village visit\n"
-        itinerary += "• Evening: Sunset point with panoramic valley views\n\n"
-    
-    if days >= 4:
-        itinerary += "📅 Day 4: Wildlife Safari\n"
-        itinerary += "• Morning: Betla National Park safari\n"
-        itinerary += "• Afternoon: Wildlife photography and nature walks\n"
-        itinerary += "• Evening: Campfire and traditional dinner\n\n"
-    
-    if days >= 5:
-        itinerary += "📅 Day 5: Adventure & Departure\n"
-        itinerary += "• Morning: Dassam Falls - nature photography\n"
-        itinerary += "• Afternoon: Tagore Hill trekking\n"
-        itinerary += "• Evening: Return journey with memories\n\n"
-    
-    # Add travel tips
-    itinerary += "💡 Travel Tips:\n"
-    itinerary += "• Best time: October to March (pleasant weather)\n"
-    itinerary += "• Carry comfortable trekking shoes\n"
-    itinerary += "• Try local tribal cuisine (Handia, Thekua)\n"
-    itinerary += "• Book forest accommodations in advance\n"
-    itinerary += "• Respect tribal customs and traditions\n\n"
-    
-    itinerary += "🎯 Estimated Budget: ₹8,000-15,000 per person\n"
-    itinerary += "📞 Need help with bookings or more details? Just ask!"
-    
-    return itinerary
-
-def generate_hindi_itinerary(days, interests):
-    """Generate Hindi itinerary"""
-    itinerary = f"🗓️ {days}-दिन झारखंड यात्रा योजना:\n\n"
-    
-    if days >= 1:
-        itinerary += "📅 दिन 1: रांची अन्वेषण\n"
-        itinerary += "• सुबह: हुंडरू फॉल्स (98 मीटर झरना) देखें\n"
-        itinerary += "• दोपहर: रॉक गार्डन - नौका विहार और रोमांचक गतिविधियां\n"
-        itinerary += "• शाम: पहाड़ी मंदिर से सूर्यास्त का नजारा\n"
-        itinerary += "• रात: रांची शहर में ठहरें\n\n"
-    
-    if days >= 2:
-        itinerary += "📅 दिन 2: सांस्कृतिक विरासत यात्रा\n"
-        itinerary += "• सुबह: जगन्नाथ मंदिर - वास्तुकला का नमूना\n"
-        itinerary += "• दोपहर: आदिवासी संग्रहालय - समृद्ध सांस्कृतिक विरासत\n"
-        itinerary += "• शाम: स्थानीय बाजार में आदिवासी हस्तशिल्प खरीदारी\n"
-        itinerary += "• रात: सांस्कृतिक लोक नृत्य प्रदर्शन\n\n"
-    
-    if days >= 3:
-        itinerary += "📅 दिन 3: नेतरहाट हिल स्टेशन\n"
-        itinerary += "• सुबह जल्दी: नेतरहाट की यात्रा (छोटानागपुर की रानी)\n"
-        itinerary += "• सुबह: सूर्योदय बिंदु का अनुभव\n"
-        itinerary += "• दोपहर: प्रकृति सैर और स्थानीय आदिवासी गांव भ्रमण\n"
-        itinerary += "• शाम: सूर्यास्त बिंदु से घाटी का नजारा\n\n"
-    
-    # Add travel tips in Hindi
-    itinerary += "💡 यात्रा सुझाव:\n"
-    itinerary += "• सबसे अच्छा समय: अक्टूबर से मार्च (सुहावना मौसम)\n"
-    itinerary += "• आरामदायक ट्रेकिंग जूते ले जाएं\n"
-    itinerary += "• स्थानीय आदिवासी भोजन का स्वाद लें\n"
-    itinerary += "• वन विश्राम गृह पहले से बुक करें\n\n"
-    
-    itinerary += "🎯 अनुमानित बजट: ₹8,000-15,000 प्रति व्यक्ति\n"
-    itinerary += "📞 बुकिंग या अधिक जानकारी चाहिए? बस पूछें!"
-    
-    return itinerary
-
-def generate_bengali_itinerary(days, interests):
-    """Generate Bengali itinerary"""
-    itinerary = f"🗓️ {days}-দিন ঝাড়খণ্ড ভ্রমণ পরিকল্পনা:\n\n"
-    
-    if days >= 1:
-        itinerary += "📅 দিন ১: রাঁচি অন্বেষণ\n"
-        itinerary += "• সকাল: হুন্দ্রু জলপ্রপাত (৯৮ মিটার) দেখুন\n"
-        itinerary += "• বিকাল: রক গার্ডেন - নৌকা বিহার ও অ্যাডভেঞ্চার\n"
-        itinerary += "• সন্ধ্যা: পাহাড়ী মন্দির থেকে সূর্যাস্ত\n"
-        itinerary += "• রাত: রাঁচি শহরে থাকুন\n\n"
-    
-    if days >= 2:
-        itinerary += "📅 দিন ২: সাংস্কৃতিক ঐতিহ্য ভ্রমণ\n"
-        itinerary += "• সকাল: জগন্নাথ মন্দির - স্থাপত্য নিদর্শন\n"
-        itinerary += "• বিকাল: উপজাতীয় জাদুঘর - সমৃদ্ধ সাংস্কৃতিক ঐতিহ্য\n"
-        itinerary += "• সন্ধ্যা: স্থানীয় বাজারে উপজাতীয় হস্তশিল্প কেনাকাটা\n"
-        itinerary += "• রাত: সাংস্কৃতিক লোকনৃত্য পরিবেশনা\n\n"
-    
-    if days >= 3:
-        itinerary += "📅 দিন ৩: নেতরহাট পাহাড়ী স্টেশন\n"
-        itinerary += "• ভোর: নেতরহাট যাত্রা (ছোটনাগপুরের রানী)\n"
-        itinerary += "• সকাল: সূর্যোদয় বিন্দুর অভিজ্ঞতা\n"
-        itinerary += "• বিকাল: প্রকৃতি হাঁটা ও স্থানীয় উপজাতীয় গ্রাম ভ্রমণ\n"
-        itinerary += "• সন্ধ্যা: সূর্যাস্ত বিন্দু থেকে উপত্যকার দৃশ্য\n\n"
-    
-    # Add travel tips in Bengali
-    itinerary += "💡 ভ্রমণ পরামর্শ:\n"
-    itinerary += "• সবচেয়ে ভাল সময়: অক্টোবর থেকে মার্চ (মনোরম আবহাওয়া)\n"
-    itinerary += "• আরামদায়ক ট্রেকিং জুতা নিয়ে যান\n"
-    itinerary += "• স্থানীয় উপজাতীয় খাবারের স্বাদ নিন\n"
-    itinerary += "• বন বিশ্রামাগার আগে থেকে বুক করুন\n\n"
-    
-    itinerary += "🎯 আনুমানিক বাজেট: ₹৮,০০০-১৫,০০০ প্রতি ব্যক্তি\n"
-    itinerary += "📞 বুকিং বা আরও তথ্য প্রয়োজন? শুধু জিজ্ঞাসা করুন!"
-    
-    return itinerary
+    # Rendered from per-language templates, memoized per (days, interests, language)
+    return render_itinerary(days, interests, language)
 
 def extract_days(message):
     """Extract number of days from user message"""
-    import re
-    # Look for patterns like "3 day", "5 days", "তিন দিন", "3 दिन"
-    day_patterns = [
-        r'(\d+)\s*(?:day|days)',
-        r'(\d+)\s*(?:দিন|দিনের)',
-        r'(\d+)\s*(?:दिन|दिनों)',
-    ]
-    
-    for pattern in day_patterns:
-        match = re.search(pattern, message.lower())
-        if match:
-            return int(match.group(1))
-    
-    # Look for word numbers
-    word_to_num = {
-        'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
-        'ek': 1, 'do': 2, 'teen': 3, 'char': 4, 'panch': 5,
-        'এক': 1, 'দুই': 2, 'তিন': 3, 'চার': 4, 'পাঁচ': 5
-    }
-    
-    for word, num in word_to_num.items():
-        if word in message.lower():
-            return num
-    
-    return None
+    return analyze_message(message)['days']
 
 def extract_interests(message):
     """Extract interests from user message"""
-    interests = []
-    message_lower = message.lower()
-    
-    # Nature keywords in multiple languages
-    nature_keywords = ['nature', 'eco', 'wildlife', 'falls', 'forest', 'प्राकृतिक', 'প্রকৃতি', 'वन', 'বন']
-    # Cultural keywords
-    cultural_keywords = ['cultural', 'culture', 'heritage', 'tribal', 'temple', 'सांस्कृतिक', 'সংস্কৃতি', 'मंदिर', 'মন্দির']
-    # Adventure keywords
-    adventure_keywords = ['adventure', 'trekking', 'sports', 'साहसिक', 'দুঃসাহসিক', 'ट्रेकिंग', 'ট্রেকিং']
-    
-    if any(keyword in message_lower for keyword in nature_keywords):
-        interests.append('nature')
-    if any(keyword in message_lower for keyword in cultural_keywords):
-        interests.append('cultural')
-    if any(keyword in message_lower for keyword in adventure_keywords):
-        interests.append('adventure')
-    
-    return interests if interests else ['nature']  # Default to nature
+    return analyze_message(message)['interests']
+
+@app.route('/sessions/stats', methods=['GET'])
+def session_stats():
+    """Dialogflow session reuse counters"""
+    return jsonify({
+        'processing_mode': 'dialogflow' if session_client else 'fallback',
+        'sessions': dialogflow_sessions.stats()
+    })
 
 # Dialogflow webhook endpoint (for production use)
 @app.route('/dialogflow-webhook', methods=['POST'])
@@ -539,4 +485,4 @@ if __name__ == '__main__':
         debug=os.getenv('FLASK_DEBUG', 'True').lower() == 'true',
         port=int(os.getenv('FLASK_PORT', 5000)),
         host='0.0.0.0'
-    )
+    )
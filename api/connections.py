@@ -0,0 +1,278 @@
+import bisect
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from catalog import catalog_cache
+from database import db
+from mappers import TRANSPORTATION_MAPPER
+from planner import parse_hours
+from routing import CAR_HIRE_PER_KM, road_network
+
+# Transportation rows are daily services; they are repeated for this many days
+# so overnight journeys can connect to the next day's departures
+TIMETABLE_HORIZON_DAYS = int(os.getenv('TIMETABLE_HORIZON_DAYS', '2'))
+JOURNEY_MAX_TRANSFERS = int(os.getenv('JOURNEY_MAX_TRANSFERS', '3'))
+# Minimum time between arriving and boarding the next leg, by the next leg's mode
+MIN_CONNECTION_MINUTES: Dict[str, int] = {'flight': 90, 'train': 30, 'bus': 20}
+DEFAULT_CONNECTION_MINUTES = 30
+# Journeys arriving this long after the earliest possible arrival aren't searched
+JOURNEY_ARRIVAL_SLACK_MINUTES = float(os.getenv('JOURNEY_ARRIVAL_SLACK_MINUTES', '1440'))
+
+_CLOCK_PATTERN = re.compile(r'^\s*(\d{1,2}):(\d{2})')
+
+def clock_minutes(value: Optional[str]) -> Optional[int]:
+    """Minutes after midnight of "HH:MM", or None"""
+    match = _CLOCK_PATTERN.match(value or '')
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+def format_clock(minutes: float) -> str:
+    """"HH:MM", with "(+N)" for later days, of minutes after the first day's midnight"""
+    days, rest = divmod(int(round(minutes)), 1440)
+    return f"{rest // 60:02d}:{rest % 60:02d}" + (f" (+{days})" if days else '')
+
+def format_duration(minutes: float) -> str:
+    hours, rest = divmod(int(round(minutes)), 60)
+    return f"{hours}h {rest:02d}m"
+
+# A label is one non-dominated way to reach a stop:
+# (arrival minute, price, legs so far, path) with path = (previous path, leg)
+Label = Tuple[float, float, int, Optional[tuple]]
+
+def _insert(bag: List[Label], label: Label) -> bool:
+    """Add label to a Pareto bag unless one already there is as good on arrival, price and legs"""
+    arrival, price, legs = label[0], label[1], label[2]
+    for other in bag:
+        if other[0] <= arrival and other[1] <= price and other[2] <= legs:
+            return False
+    bag[:] = [other for other in bag if not (arrival <= other[0] and price <= other[1] and legs <= other[2])]
+    bag.append(label)
+    return True
+
+class Timetable:
+    """Available transportation rows unrolled into connections sorted by departure
+
+    Journeys are found with a multi-criteria connection scan: one pass over
+    the connections departing after the requested time, keeping a Pareto
+    bag of (arrival, price, legs) labels per stop.
+    """
+
+    def __init__(self, rows: Sequence[Dict], horizon_days: int = TIMETABLE_HORIZON_DAYS):
+        self.rows: List[Dict] = []
+        self.stops: Dict[str, str] = {}  # Lowercased name -> name as written
+        legs = []
+        for row in rows:
+            departure = clock_minutes(row.get('departure_time'))
+            origin, destination = row.get('from_location'), row.get('to_location')
+            if departure is None or not origin or not destination or row.get('price') is None:
+                continue
+            if row.get('duration'):
+                minutes = parse_hours(row['duration'], 0) * 60
+            else:
+                arrival = clock_minutes(row.get('arrival_time'))
+                if arrival is None:
+                    continue
+                minutes = (arrival - departure) % 1440
+            if minutes <= 0:
+                continue
+            for name in (origin, destination):
+                self.stops.setdefault(name.lower(), name)
+            change = MIN_CONNECTION_MINUTES.get(row.get('transport_type'), DEFAULT_CONNECTION_MINUTES)
+            legs.append((departure, minutes, origin.lower(), destination.lower(), float(row['price']),
+                         change, len(self.rows)))
+            self.rows.append(row)
+
+        self.connections = sorted(
+            (day * 1440 + departure, day * 1440 + departure + minutes, origin, destination, price, change, index)
+            for day in range(horizon_days)
+            for departure, minutes, origin, destination, price, change, index in legs
+        )
+        self.departures = [connection[0] for connection in self.connections]
+        self.horizon_days = horizon_days
+
+    def search(self, origin: str, destination: str, depart_after: int = 0,
+               max_transfers: int = JOURNEY_MAX_TRANSFERS, include_road: bool = True,
+               arrival_slack: Optional[float] = JOURNEY_ARRIVAL_SLACK_MINUTES) -> Dict[str, Any]:
+        """Pareto-optimal journeys by arrival time, price and transfers
+
+        depart_after is minutes after midnight. Journeys arriving more than
+        arrival_slack minutes after the earliest possible arrival are not
+        searched (None searches the whole timetable). With include_road a
+        hired car may finish the journey from any stop the road network can reach.
+        """
+        started = time.perf_counter()
+        source, target = origin.lower(), destination.lower()
+        origin, destination = self.stops.get(source, origin), self.stops.get(target, destination)
+        bags: Dict[str, List[Label]] = {source: [(depart_after, 0.0, 0, None)]}
+        target_bag = bags.setdefault(target, []) if target != source else []
+        scanned = 0
+        # A trip to where you already are has no journeys
+        first = bisect.bisect_left(self.departures, depart_after) if target != source else len(self.connections)
+        cutoff = float('inf')
+        if arrival_slack is not None:
+            earliest = self._earliest_arrival(source, target, depart_after, first,
+                                              destination if include_road else None)
+            cutoff = earliest + arrival_slack if earliest is not None else -1
+
+        connections, bag_for = self.connections, bags.get
+        for position in range(first, len(connections)):
+            departure, arrival, stop, to_stop, price, change, _ = connections[position]
+            if departure > cutoff:
+                break
+            if arrival > cutoff:
+                continue
+            bag = bag_for(stop)
+            if not bag or to_stop == source or to_stop == stop or stop == target:
+                continue
+            scanned += 1
+            # The last allowed leg only ever rides to the target
+            limit = max_transfers + 1 if to_stop == target else max_transfers
+            for reached, paid, legs, path in bag:
+                if legs >= limit or reached + (change if legs else 0) > departure:
+                    continue
+                paid += price
+                legs += 1
+                # Target pruning: nothing reached through a dominated label can beat the journeys found
+                for other in target_bag:
+                    if other[0] <= arrival and other[1] <= paid and other[2] <= legs:
+                        break
+                else:
+                    _insert(bags.setdefault(to_stop, []), (arrival, paid, legs, (path, position)))
+
+        if include_road and target != source:
+            self._finish_by_road(bags, {source: origin}, target, destination, max_transfers)
+        journeys = sorted((self._journey(label, depart_after) for label in target_bag),
+                          key=lambda journey: (journey['arrival_minutes'], journey['price'], journey['transfers']))
+        return {
+            'from': origin,
+            'to': destination,
+            'depart_after': format_clock(depart_after),
+            'journeys': journeys,
+            'search': {
+                'connections': len(self.connections),
+                'scanned': scanned,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+            }
+        }
+
+    def _earliest_arrival(self, source: str, target: str, depart_after: int, first: int,
+                          destination: Optional[str] = None) -> Optional[float]:
+        """Plain connection scan for the earliest arrival, ignoring price and transfer limits
+
+        With a destination name, finishing by road from any stop counts too.
+        """
+        earliest = {source: depart_after}
+        best = float('inf')
+        if destination is not None:
+            best = self._road_arrival(self.stops.get(source, source), destination, depart_after)
+        for position in range(first, len(self.connections)):
+            departure, arrival, stop, to_stop, _, change, _ = self.connections[position]
+            if departure >= best:
+                break
+            reached = earliest.get(stop)
+            if reached is None or to_stop == source:
+                continue
+            if reached + (0 if stop == source else change) > departure:
+                continue
+            if arrival < earliest.get(to_stop, float('inf')):
+                earliest[to_stop] = arrival
+                if to_stop == target:
+                    best = min(best, arrival)
+                elif destination is not None:
+                    best = min(best, self._road_arrival(self.stops[to_stop], destination, arrival))
+        return None if best == float('inf') else best
+
+    @staticmethod
+    def _road_arrival(origin: str, destination: str, departure: float) -> float:
+        road = road_network.travel(origin, destination)
+        return departure + road[1] if road else float('inf')
+
+    def _finish_by_road(self, bags: Dict[str, List[Label]], names: Dict[str, str], target: str,
+                        destination: str, max_transfers: int):
+        """Last leg by hired car from every stop reached, including straight from the origin"""
+        target_bag = bags[target]
+        for stop, bag in list(bags.items()):
+            if stop == target or not bag:
+                continue
+            name = names.get(stop) or self.stops[stop]
+            road = road_network.travel(name, destination)
+            if road is None:
+                continue
+            km, minutes = road
+            fare = round(km * CAR_HIRE_PER_KM)
+            leg = {'from': name, 'to': destination, 'km': km, 'minutes': minutes, 'price': fare}
+            for reached, paid, legs, path in list(bag):
+                if legs <= max_transfers:
+                    _insert(target_bag, (reached + minutes, paid + fare, legs + 1, (path, leg)))
+
+    def _journey(self, label: Label, depart_after: int) -> Dict[str, Any]:
+        steps = []
+        path = label[3]
+        while path is not None:
+            path, step = path
+            steps.append(step)
+        steps.reverse()
+
+        legs, arrival, first_departure = [], depart_after, None
+        for step in steps:
+            if isinstance(step, dict):
+                # The car leaves as soon as the previous leg arrives
+                departure = arrival
+                arrival = departure + step['minutes']
+                first_departure = departure if first_departure is None else first_departure
+                legs.append({
+                    'transport_type': 'road', 'name': 'Private car', 'id': None,
+                    'from_location': step['from'], 'to_location': step['to'],
+                    'departure': format_clock(departure), 'arrival': format_clock(arrival),
+                    'duration': format_duration(step['minutes']), 'price': step['price'],
+                    'class_type': 'Private car', 'distance_km': step['km']
+                })
+                continue
+            departure, arrival, _, _, _, _, index = self.connections[step]
+            first_departure = departure if first_departure is None else first_departure
+            row = self.rows[index]
+            legs.append({
+                'transport_type': row.get('transport_type'), 'name': row.get('name'), 'id': row.get('id'),
+                'from_location': row.get('from_location'), 'to_location': row.get('to_location'),
+                'departure': format_clock(departure), 'arrival': format_clock(arrival),
+                'duration': format_duration(arrival - departure), 'price': row.get('price'),
+                'class_type': row.get('class_type'), 'day': int(departure // 1440)
+            })
+
+        return {
+            'departure': legs[0]['departure'],
+            'arrival': format_clock(label[0]),
+            'arrival_minutes': label[0],
+            'duration': format_duration(label[0] - first_departure),
+            'price': round(label[1], 2),
+            'transfers': label[2] - 1,
+            'legs': legs
+        }
+
+def load_timetable() -> Timetable:
+    """The timetable of available services, rebuilt when the catalog changes"""
+    def loader():
+        with db.connection() as conn:
+            return Timetable(TRANSPORTATION_MAPPER.fetch(conn, " AND availability_status = 'available'"))
+    return catalog_cache.get_or_load(('timetable',), loader)
+
+def journey_option(journey: Dict[str, Any], from_location: str, to_location: str) -> Dict[str, Any]:
+    """A connecting journey shaped like a transportation row, for the search results"""
+    return {
+        'id': None,
+        'transport_type': 'connecting',
+        'name': ' + '.join(leg['name'] for leg in journey['legs']),
+        'from_location': from_location,
+        'to_location': to_location,
+        'departure_time': journey['departure'],
+        'arrival_time': journey['arrival'],
+        'duration': journey['duration'],
+        'price': journey['price'],
+        'class_type': None,
+        'availability_status': 'available',
+        'transfers': journey['transfers'],
+        'legs': journey['legs']
+    }
@@ -0,0 +1,103 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+DATABASE_PATH = os.getenv('PRORAAHI_DB_PATH', 'proraahi.db')
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared by the API routes"""
+
+    def __init__(self, database: str = DATABASE_PATH, size: int = 8,
+                 busy_timeout_ms: int = 5000, statement_cache_size: int = 256,
+                 acquire_timeout: float = 10.0):
+        self.database = database
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache_size = statement_cache_size
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the pragmas every pooled connection shares"""
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size
+        )
+        # WAL lets readers run alongside the single writer instead of
+        # queueing behind it; NORMAL sync is durable enough under WAL.
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection available after {self.acquire_timeout}s")
+
+    def _release(self, conn: sqlite3.Connection):
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; commits on success and rolls back on error"""
+        conn = self._acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            raise
+        finally:
+            self._release(conn)
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown and in scripts)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': self.size,
+            'open': self._created,
+            'idle': self._idle.qsize()
+        }
+
+# Shared pool used by the Flask routes
+db = ConnectionPool()
@@ -1,18 +1,189 @@
 import requests
 import json
-from typing import Dict, List, Any
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Any, Optional, Tuple
 import os
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cache import RefreshingCache
+from routing import road_network, route_summary
+
+# Outbound HTTP settings: keep-alive pool per host, split timeouts, retries
+# with exponential backoff for idempotent requests only
+EXTERNAL_API_POOL_SIZE = int(os.getenv('EXTERNAL_API_POOL_SIZE', '20'))
+EXTERNAL_API_CONNECT_TIMEOUT = float(os.getenv('EXTERNAL_API_CONNECT_TIMEOUT', '3.05'))
+EXTERNAL_API_READ_TIMEOUT = float(os.getenv('EXTERNAL_API_READ_TIMEOUT', '10'))
+EXTERNAL_API_MAX_RETRIES = int(os.getenv('EXTERNAL_API_MAX_RETRIES', '2'))
+EXTERNAL_API_BACKOFF = float(os.getenv('EXTERNAL_API_BACKOFF', '0.3'))
+# Consecutive failures that open a provider's circuit, and how long it stays open
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_SECONDS = float(os.getenv('BREAKER_RESET_SECONDS', '30'))
+# Weather per location: fresh for the TTL, then served stale while refreshed
+WEATHER_CACHE_TTL = float(os.getenv('WEATHER_CACHE_TTL', '600'))
+WEATHER_CACHE_STALE_SECONDS = float(os.getenv('WEATHER_CACHE_STALE_SECONDS', '1800'))
+WEATHER_CACHE_SIZE = int(os.getenv('WEATHER_CACHE_SIZE', '256'))
+# Safety alerts and events change more slowly than weather
+EXTERNAL_API_CACHE_TTL = float(os.getenv('EXTERNAL_API_CACHE_TTL', '900'))
+# Destination bundles: overall deadline and the shared fan-out pool size
+BUNDLE_DEADLINE_SECONDS = float(os.getenv('BUNDLE_DEADLINE_SECONDS', '3'))
+BUNDLE_MAX_WORKERS = int(os.getenv('BUNDLE_MAX_WORKERS', '16'))
+# Lookups queued or running on that pool at once; beyond this bundles report
+# uncached lookups as "busy" instead of queueing behind a slow upstream
+BUNDLE_MAX_PENDING = int(os.getenv('BUNDLE_MAX_PENDING', str(BUNDLE_MAX_WORKERS * 4)))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def http_session(pool_size: int = EXTERNAL_API_POOL_SIZE, max_retries: int = EXTERNAL_API_MAX_RETRIES,
+                 backoff: float = EXTERNAL_API_BACKOFF) -> requests.Session:
+    """A keep-alive requests.Session with a bounded pool that retries GET/HEAD"""
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures; after
+    `reset_seconds` one trial call is let through (half-open) and its outcome
+    closes or re-opens the circuit"""
+    
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._counters = {"calls": 0, "failures": 0, "short_circuited": 0, "opened": 0}
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+    
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+    
+    def allow(self) -> bool:
+        """Whether a call may go out now; counts short circuits"""
+        with self._lock:
+            state = self._state()
+            if state == "closed" or (state == "half_open" and not self._trial_in_flight):
+                self._trial_in_flight = state == "half_open"
+                self._counters["calls"] += 1
+                return True
+            self._counters["short_circuited"] += 1
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._counters["failures"] += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    self._counters["opened"] += 1
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self._state(), "consecutive_failures": self._failures, **self._counters}
 
 class ExternalAPIIntegrator:
     """Handles integration with external APIs for real-time data"""
     
-    def __init__(self):
+    def __init__(self, session: requests.Session = None):
         self.weather_api_key = os.getenv('OPENWEATHER_API_KEY')
         self.maps_api_key = os.getenv('GOOGLE_MAPS_API_KEY')
+        # One pooled session for all providers: connections are reused across requests
+        self.session = session or http_session()
+        self.timeout = (EXTERNAL_API_CONNECT_TIMEOUT, EXTERNAL_API_READ_TIMEOUT)
+        self.breakers = {'weather': CircuitBreaker('weather')}
+        # Per-source lookups, cached and refreshable by the prefetcher (all share
+        # the weather cache's size and stale window)
+        self._loaders = {
+            'weather': self._fetch_weather,
+            'safety_alerts': self._load_safety_alerts,
+            'local_events': self._load_local_events
+        }
+        self.caches = {
+            source: RefreshingCache(
+                WEATHER_CACHE_SIZE,
+                WEATHER_CACHE_TTL if source == 'weather' else EXTERNAL_API_CACHE_TTL,
+                WEATHER_CACHE_STALE_SECONDS
+            )
+            for source in self._loaders
+        }
+        # Shared so lookups still running past a bundle's deadline finish (and
+        # fill the cache) without each request leaking its own pool
+        self._executor = ThreadPoolExecutor(max_workers=BUNDLE_MAX_WORKERS, thread_name_prefix='bundle')
+        self._pending = threading.BoundedSemaphore(BUNDLE_MAX_PENDING)
+    
+    def _get_json(self, provider: str, url: str, params: Dict) -> Optional[Dict]:
+        """GET through the provider's circuit breaker; None means use fallback data"""
+        breaker = self.breakers[provider]
+        if not breaker.allow():
+            return None
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"⚠️ {provider} API error: {e}")
+            breaker.record_failure()
+            return None
+        
+        if response.status_code in RETRY_STATUSES:
+            print(f"⚠️ {provider} API unavailable: HTTP {response.status_code}")
+            breaker.record_failure()
+            return None
+        # Other statuses (e.g. an unknown city) mean the provider itself is healthy
+        breaker.record_success()
+        return response.json() if response.status_code == 200 else None
+    
+    @staticmethod
+    def _key(*args) -> Tuple[str, ...]:
+        return tuple(str(arg).strip().lower() for arg in args)
+    
+    def _cached(self, source: str, *args) -> Any:
+        """A source's lookup through its cache, keyed by normalized arguments"""
+        return self.caches[source].get_or_load(self._key(*args), lambda: self._loaders[source](*args))
+    
+    def refresh(self, source: str, *args) -> bool:
+        """Reload one lookup into its cache now; False if the source was unavailable"""
+        key = self._key(*args)
+        return self.caches[source].refresh(key, lambda: self._loaders[source](*args)) is not None
     
     def get_weather_data(self, location: str) -> Dict[str, Any]:
-        """Fetch real-time weather data"""
+        """Fetch real-time weather data, cached per location"""
+        weather = self._cached('weather', location)
+        if weather is None:
+            return self._fallback_weather(location)
+        return {**weather, 'location': location}
+    
+    def _fetch_weather(self, location: str) -> Optional[Dict[str, Any]]:
+        """Live weather from OpenWeatherMap, or None when it is unavailable"""
         try:
             # Using OpenWeatherMap API (free tier)
             url = f"http://api.openweathermap.org/data/2.5/weather"
@@ -22,9 +193,9 @@ class ExternalAPIIntegrator:
                 'units': 'metric'
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            # Without a key every call would be rejected, so skip the round trip
+            data = self._get_json('weather', url, params) if self.weather_api_key else None
+            if data is not None:
                 return {
                     'location': location,
                     'temperature': f"{data['main']['temp']}°C",
@@ -35,7 +206,9 @@ class ExternalAPIIntegrator:
                 }
         except Exception as e:
             print(f"Weather API error: {e}")
-        
+        return None
+    
+    def _fallback_weather(self, location: str) -> Dict[str, Any]:
         # Fallback to mock data
         return {
             'location': location,
@@ -48,6 +221,9 @@ class ExternalAPIIntegrator:
     
     def get_safety_alerts(self, location: str) -> Dict[str, Any]:
         """Get safety alerts and emergency information"""
+        return {**self._cached('safety_alerts', location), 'location': location}
+    
+    def _load_safety_alerts(self, location: str) -> Dict[str, Any]:
         # This would integrate with government APIs or news sources
         # For now, returning structured mock data
         return {
@@ -113,6 +289,9 @@ class ExternalAPIIntegrator:
     
     def get_local_events(self, location: str, date_range: str = "30") -> List[Dict]:
         """Get local events and festivals"""
+        return list(self._cached('local_events', location, date_range))
+    
+    def _load_local_events(self, location: str, date_range: str) -> List[Dict]:
         # This would integrate with event APIs like Eventbrite
         return [
             {
@@ -137,21 +316,91 @@ class ExternalAPIIntegrator:
             }
         ]
     
-    def get_route_information(self, from_location: str, to_location: str) -> Dict[str, Any]:
-        """Get route and navigation information"""
-        # This would use Google Maps API or similar
+    def get_route_information(self, from_location: str, to_location: str) -> Optional[Dict[str, Any]]:
+        """Fastest road route from the local road network; None for unknown places"""
+        route = road_network.route(from_location, to_location)
+        return route_summary(route) if route else None
+
+    def _bundle_lookup(self, source: str, getter, *args) -> Future:
+        """Cached lookups are answered inline; the rest go to the pool while it has room
+
+        A future cancelled up front means the pool was saturated.
+        """
+        future = Future()
+        if self._key(*args) in self.caches[source]:
+            try:
+                future.set_result(getter(*args))
+            except Exception as e:
+                future.set_exception(e)
+        elif self._pending.acquire(blocking=False):
+            future = self._executor.submit(getter, *args)
+            future.add_done_callback(lambda _: self._pending.release())
+        else:
+            future.cancel()
+        return future
+
+    def get_destination_bundle(self, locations: List[str], routes: Optional[List[Tuple[str, str]]] = None,
+                               date_range: str = "30", deadline: float = BUNDLE_DEADLINE_SECONDS) -> Dict[str, Any]:
+        """Weather, safety alerts and events for each location, fetched concurrently, plus road routes per leg
+
+        Routes default to consecutive legs of `locations`. Lookups that miss
+        the deadline are reported as "timeout" with a null value instead of
+        holding up the rest, and ones the saturated pool couldn't take as "busy".
+        """
+        if routes is None:
+            routes = list(zip(locations, locations[1:]))
+        started = time.monotonic()
+        
+        lookups = {}
+        for location in locations:
+            lookups[(location, 'weather')] = self._bundle_lookup('weather', self.get_weather_data, location)
+            lookups[(location, 'safety_alerts')] = self._bundle_lookup('safety_alerts', self.get_safety_alerts, location)
+            lookups[(location, 'local_events')] = self._bundle_lookup(
+                'local_events', self.get_local_events, location, date_range)
+        busy = {key for key, future in lookups.items() if future.cancelled()}
+        wait(lookups.values(), timeout=deadline)
+        # Lookups still queued would only hold pool slots for answers nobody waits for
+        for future in lookups.values():
+            future.cancel()
+        
+        def outcome(key, future):
+            if key in busy:
+                return None, 'busy'
+            if future.cancelled() or not future.done():
+                return None, 'timeout'
+            if future.exception() is not None:
+                print(f"⚠️ Bundle lookup failed: {future.exception()}")
+                return None, 'error'
+            return future.result(), 'ok'
+        
+        bundle_locations = []
+        for location in locations:
+            entry = {'location': location, 'status': {}}
+            for source in ('weather', 'safety_alerts', 'local_events'):
+                entry[source], entry['status'][source] = outcome((location, source), lookups[(location, source)])
+            bundle_locations.append(entry)
+        
+        bundle_routes = []
+        for origin, destination in routes:
+            # A local lookup, so routes never wait on the pool
+            route = self.get_route_information(origin, destination)
+            bundle_routes.append({'from': origin, 'to': destination, 'route_information': route,
+                                  'status': 'ok' if route else 'not_found'})
+        
+        statuses = [status for entry in bundle_locations for status in entry['status'].values()]
+        statuses += [entry['status'] for entry in bundle_routes]
+        return {
+            'locations': bundle_locations,
+            'routes': bundle_routes,
+            'complete': all(status == 'ok' for status in statuses),
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1)
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        """Circuit breaker state per provider and cache counters per source"""
         return {
-            'distance': '350 km',
-            'estimated_time': '6 hours 30 minutes',
-            'route_type': 'fastest',
-            'toll_cost': '₹200',
-            'fuel_cost': '₹1,200',
-            'waypoints': [
-                {'name': 'Dhanbad', 'distance': '180 km'},
-                {'name': 'Bokaro', 'distance': '280 km'}
-            ],
-            'road_conditions': 'Good',
-            'traffic_status': 'Moderate'
+            "circuits": {name: breaker.stats() for name, breaker in self.breakers.items()},
+            "caches": {source: cache.stats() for source, cache in self.caches.items()}
         }
 
 # Initialize the external API integrator
@@ -0,0 +1,99 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Local intents of the chatbot service, in priority order: when a message
+# matches several, the first one listed wins. English keywords include their
+# common inflections because they only match whole words ("hi" must not
+# match "this"); other scripts match inside words so inflected forms count.
+FALLBACK_INTENTS: List[Tuple[str, List[str]]] = [
+    ('greeting', ['hello', 'hi', 'hey', 'namaste', 'namaskar', 'नमस्ते', 'नमस्कार', 'নমস্কার', 'ନମସ୍କାର', 'السلام']),
+    ('tourist_places', ['places', 'tourist', 'tourists', 'visit', 'visiting', 'attraction', 'attractions',
+                        'spots', 'पर्यटन', 'স্থান', 'ପର୍ଯ୍ୟଟନ', 'مقامات']),
+    ('itinerary', ['plan', 'plans', 'planning', 'itinerary', 'trip', 'trips', 'tour', 'tours', 'day', 'days',
+                   'योजना', 'পরিকল্পনা', 'ଯୋଜନା', 'منصوبہ']),
+    ('cultural', ['cultural', 'culture', 'heritage', 'tribal', 'temple', 'temples',
+                  'सांस्कृतिक', 'সংস্কৃতি', 'ସଂସ୍କୃତି', 'ثقافت']),
+    ('eco_tourism', ['eco', 'ecotourism', 'nature', 'wildlife', 'forest', 'forests', 'falls', 'waterfall',
+                     'waterfalls', 'प्राकृतिक', 'প্রকৃতি', 'ପ୍ରକୃତি', 'قدرتی']),
+    ('help', ['help', 'assist', 'assistance', 'support', 'मदद', 'সাহায্য', 'ସାହାଯ୍ୟ', 'مدد'])
+]
+
+# Trip interests, reported in this order; nature is assumed when none match
+INTEREST_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ('nature', ['nature', 'eco', 'ecotourism', 'wildlife', 'falls', 'waterfall', 'waterfalls', 'forest',
+                'forests', 'प्राकृतिक', 'প্রকৃতি', 'वन', 'বন']),
+    ('cultural', ['cultural', 'culture', 'heritage', 'tribal', 'temple', 'temples',
+                  'सांस्कृतिक', 'সংস্কৃতি', 'मंदिर', 'মন্দির']),
+    ('adventure', ['adventure', 'adventures', 'trek', 'trekking', 'sports', 'साहसिक', 'দুঃসাহসিক',
+                   'ट्रेकिंग', 'ট্রেকিং'])
+]
+
+# Day counts written as words; like digits they only count before a day unit
+# ("teen din", "তিন দিন"), so "what do you suggest" is not a two day trip
+NUMBER_WORDS: Dict[str, int] = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'ek': 1, 'do': 2, 'teen': 3, 'char': 4, 'panch': 5,
+    'এক': 1, 'দুই': 2, 'তিন': 3, 'চার': 4, 'পাঁচ': 5
+}
+
+DAY_UNITS = ['days', 'day', 'din', 'দিনের', 'দিন', 'दिनों', 'दिन']
+
+def _build_lexicon() -> Dict[str, List[Tuple[str, Any]]]:
+    """Lowercased keyword -> (kind, label) for intents and interests"""
+    lexicon: Dict[str, List[Tuple[str, Any]]] = {}
+    for intent, keywords in FALLBACK_INTENTS:
+        for keyword in keywords:
+            lexicon.setdefault(keyword.lower(), []).append(('intent', intent))
+    for interest, keywords in INTEREST_KEYWORDS:
+        for keyword in keywords:
+            lexicon.setdefault(keyword.lower(), []).append(('interest', interest))
+    return lexicon
+
+def _build_pattern(keywords: List[str]) -> re.Pattern:
+    """Trip lengths ("3 days") first, then every keyword in one alternation, longest first"""
+    ordered = sorted(keywords, key=len, reverse=True)
+    ascii_words = '|'.join(re.escape(keyword) for keyword in ordered if keyword.isascii())
+    other_words = '|'.join(re.escape(keyword) for keyword in ordered if not keyword.isascii())
+    numbers = '|'.join(re.escape(word) for word in sorted(NUMBER_WORDS, key=len, reverse=True))
+    # English units end at a word boundary ("5 dinners" is not a trip length);
+    # Bengali and Hindi units also match their inflected forms
+    ascii_units = '|'.join(re.escape(unit) for unit in DAY_UNITS if unit.isascii())
+    other_units = '|'.join(re.escape(unit) for unit in DAY_UNITS if not unit.isascii())
+    # \d also matches Devanagari and Bengali digits, which int() understands
+    return re.compile(
+        rf'(?<!\w)(?P<days>\d+|{numbers})[\s-]*(?:(?:{ascii_units})(?!\w)|{other_units})'
+        rf'|(?<!\w)(?:{ascii_words})(?!\w)|{other_words}')
+
+_LEXICON = _build_lexicon()
+_PATTERN = _build_pattern(list(_LEXICON))
+_PRIORITY = {intent: rank for rank, (intent, _) in enumerate(FALLBACK_INTENTS)}
+_INTEREST_ORDER = [interest for interest, _ in INTEREST_KEYWORDS]
+
+def analyze_message(message: str) -> Dict[str, Any]:
+    """Intent, day count and interests of a chat message from one regex pass
+
+    intent is one of FALLBACK_INTENTS or "default"; days is None when the
+    message gives no trip length; interests defaults to ["nature"].
+    """
+    intents = set()
+    interests = set()
+    days: Optional[int] = None
+    for match in _PATTERN.finditer(message.lower()):
+        if match.group('days') is not None:
+            # "3 days" both sets the length and marks an itinerary request
+            intents.add('itinerary')
+            if days is None:
+                count = match.group('days')
+                days = NUMBER_WORDS[count] if count in NUMBER_WORDS else int(count)
+            continue
+        for kind, label in _LEXICON[match.group(0)]:
+            if kind == 'intent':
+                intents.add(label)
+            else:
+                interests.add(label)
+
+    return {
+        'intent': min(intents, key=_PRIORITY.__getitem__) if intents else 'default',
+        'days': days,
+        'interests': [interest for interest in _INTEREST_ORDER if interest in interests] or ['nature']
+    }
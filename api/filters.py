@@ -0,0 +1,58 @@
+from tags import tag_filter
+
+# Catalog filters used by the API routes (and audited by
+# scripts/check_query_plans.py): each returns an "AND ..." WHERE fragment
+# and its parameters
+
+def guide_filters(location=None, specialty=None, language=None):
+    where = ""
+    params = []
+    
+    if location:
+        where += " AND location = ?"
+        params.append(location)
+        
+    if specialty:
+        sql, tag_params = tag_filter('guides', 'specialty', specialty)
+        where += sql
+        params.extend(tag_params)
+        
+    if language:
+        sql, tag_params = tag_filter('guides', 'language', language)
+        where += sql
+        params.extend(tag_params)
+    
+    return where, params
+
+def activity_filters(category=None, location=None):
+    where = ""
+    params = []
+    
+    if category:
+        where += " AND category = ?"
+        params.append(category)
+        
+    if location:
+        where += " AND location = ?"
+        params.append(location)
+    
+    return where, params
+
+def hotel_filters(location=None, amenity=None):
+    where = ""
+    params = []
+    
+    if location:
+        where += " AND location = ?"
+        params.append(location)
+        
+    if amenity:
+        sql, tag_params = tag_filter('hotels', 'amenity', amenity)
+        where += sql
+        params.extend(tag_params)
+    
+    return where, params
+
+def transportation_filters(from_location, to_location):
+    where = " AND from_location = ? AND to_location = ? AND availability_status = 'available'"
+    return where, [from_location, to_location]
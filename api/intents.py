@@ -0,0 +1,330 @@
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import MISSING, TTLCache
+from llm_cache import normalize_message
+
+INTENT_CACHE_SIZE = int(os.getenv('INTENT_CACHE_SIZE', '5000'))
+INTENT_CACHE_TTL = float(os.getenv('INTENT_CACHE_TTL', '3600'))
+# Rule-based results below this confidence are escalated to the LLM
+INTENT_MIN_CONFIDENCE = float(os.getenv('INTENT_MIN_CONFIDENCE', '0.7'))
+
+INTENTS = (
+    'transportation_booking', 'accommodation_booking', 'guide_booking',
+    'activity_planning', 'itinerary_creation', 'general_inquiry'
+)
+
+# Keyword -> weight per intent. 2.0 marks words that name the intent on
+# their own ("train", "hotel"); 1.0 words only lean towards it ("stay").
+# Hindi and Bengali entries follow the keywords in chatbot_service.py.
+INTENT_KEYWORDS: Dict[str, Dict[str, float]] = {
+    'transportation_booking': {
+        'train': 2.0, 'trains': 2.0, 'flight': 2.0, 'flights': 2.0, 'bus': 2.0, 'ticket': 1.5,
+        'tickets': 1.5, 'cab': 2.0, 'taxi': 2.0, 'rajdhani': 2.0, 'shatabdi': 2.0, 'airport': 1.5,
+        'railway': 2.0, 'transport': 2.0, 'transportation': 2.0, 'travel from': 1.5, 'get to': 1.0,
+        'how to reach': 1.5, 'reach': 1.0, 'commute': 1.0,
+        'ट्रेन': 2.0, 'टिकट': 1.5, 'बस': 2.0, 'फ्लाइट': 2.0, 'उड़ान': 2.0, 'गाड़ी': 1.5,
+        'ট্রেন': 2.0, 'টিকিট': 1.5, 'বাস': 2.0, 'বিমান': 2.0
+    },
+    'accommodation_booking': {
+        'hotel': 2.0, 'hotels': 2.0, 'resort': 2.0, 'resorts': 2.0, 'homestay': 2.0,
+        'homestays': 2.0, 'lodge': 2.0, 'lodges': 2.0, 'room': 1.5,
+        'rooms': 1.5, 'accommodation': 2.0, 'stay': 1.0, 'check in': 1.5, 'check-in': 1.5,
+        'night': 0.5, 'nights': 1.0, 'guest house': 2.0, 'dharamshala': 2.0,
+        'होटल': 2.0, 'कमरा': 1.5, 'ठहरने': 1.5, 'रुकने': 1.5,
+        'হোটেল': 2.0, 'ঘর': 1.0, 'থাকার': 1.5
+    },
+    'guide_booking': {
+        'guide': 2.0, 'guides': 2.0, 'a guide': 3.0, 'local guide': 2.5, 'tour guide': 2.5,
+        'escort': 1.0, 'someone to show': 1.5, 'show us around': 1.5, 'translator': 1.5,
+        'speaks': 1.0, 'speaking': 1.0, 'specialise': 1.0, 'specialize': 1.0,
+        'गाइड': 2.0, 'গাইড': 2.0
+    },
+    'activity_planning': {
+        'activity': 2.0, 'activities': 2.0, 'things to do': 2.0, 'trek': 1.5, 'trekking': 1.5,
+        'safari': 1.5, 'workshop': 2.0, 'workshops': 2.0, 'class': 1.0, 'dance': 1.0, 'experience': 1.0,
+        'experiences': 1.0, 'adventure': 1.0, 'rafting': 1.5, 'boating': 1.5, 'camping': 1.5,
+        'sohrai': 1.0, 'dokra': 1.0, 'paitkar': 1.0, 'festival': 1.0, 'festivals': 1.0,
+        'गतिविधि': 2.0, 'ट्रेकिंग': 1.5, 'সাফারি': 1.5, 'কার্যকলাপ': 2.0
+    },
+    'itinerary_creation': {
+        'itinerary': 2.5, 'plan': 1.5, 'planning': 1.5, 'schedule': 1.5, 'trip': 1.0,
+        'tour': 0.5, 'day trip': 1.5, 'weekend': 1.0, 'route plan': 2.0,
+        'योजना': 2.0, 'यात्रा': 1.0, 'কার্যক্রম': 2.0, 'পরিকল্পনা': 2.0, 'ভ্রমণ': 1.0
+    },
+    'general_inquiry': {
+        'best time': 2.0, 'weather': 1.5, 'history': 1.5, 'culture': 1.0, 'tell me about': 1.5,
+        'what is': 1.5, 'famous for': 2.0, 'safe': 1.0, 'language': 1.0, 'languages': 1.5,
+        'spoken': 1.0, 'food': 1.0,
+        'hello': 2.0, 'hi': 2.0, 'namaste': 2.0, 'thank': 2.0, 'thanks': 2.0, 'why': 1.0,
+        'नमस्ते': 2.0, 'मौसम': 1.5, 'इतिहास': 1.5, 'संस्कृति': 1.0, 'धन्यवाद': 2.0,
+        'নমস্কার': 2.0, 'আবহাওয়া': 1.5, 'ইতিহাস': 1.5, 'ধন্যবাদ': 2.0
+    }
+}
+
+# Slots each handler needs; a rules result missing them is less trustworthy
+# because the LLM might have extracted them from phrasing the rules miss.
+REQUIRED_ENTITIES = {
+    'transportation_booking': ('from_location', 'to_location', 'travel_date'),
+    'accommodation_booking': ('location', 'check_in_date')
+}
+
+NEXT_ACTIONS = {
+    'transportation_booking': ['collect_transportation_details', 'search_transportation'],
+    'accommodation_booking': ['collect_accommodation_details', 'search_accommodations'],
+    'guide_booking': ['search_guides', 'present_guide_profiles'],
+    'activity_planning': ['search_activities', 'present_activity_details'],
+    'itinerary_creation': ['create_itinerary'],
+    'general_inquiry': ['provide_general_assistance']
+}
+
+KNOWN_PLACES = (
+    'Ranchi', 'Jamshedpur', 'Deoghar', 'Hazaribagh', 'Netarhat', 'Betla', 'Dhanbad', 'Bokaro',
+    'Giridih', 'Dumka', 'Palamu', 'Patratu', 'Hundru', 'Dassam', 'Jonha', 'Rajrappa', 'Parasnath',
+    'Delhi', 'New Delhi', 'Kolkata', 'Mumbai', 'Patna', 'Bangalore', 'Bengaluru', 'Chennai',
+    'Hyderabad', 'Bhubaneswar', 'Varanasi', 'Lucknow', 'Gaya'
+)
+
+# Hindi and Bengali spellings of the places travellers ask about most
+PLACE_ALIASES = {
+    'Ranchi': ('रांची', 'राँची', 'রাঁচি'),
+    'Jamshedpur': ('जमशेदपुर', 'জামশেদপুর'),
+    'Deoghar': ('देवघर', 'দেওঘর'),
+    'Hazaribagh': ('हजारीबाग', 'হাজারীবাগ'),
+    'Netarhat': ('नेतरहाट', 'নেতারহাট', 'নেতরহাট'),
+    'Betla': ('बेतला', 'বেতলা'),
+    'Dhanbad': ('धनबाद', 'ধানবাদ'),
+    'Bokaro': ('बोकारो', 'বোকারো'),
+    'Delhi': ('दिल्ली', 'দিল্লি'),
+    'Kolkata': ('कोलकाता', 'কলকাতা'),
+    'Mumbai': ('मुंबई', 'মুম্বাই'),
+    'Patna': ('पटना', 'পাটনা')
+}
+
+INTEREST_KEYWORDS = {
+    'culture': ('culture', 'cultural', 'heritage', 'tribal', 'museum', 'संस्कृति', 'সংস্কৃতি'),
+    'nature': ('nature', 'waterfall', 'waterfalls', 'falls', 'hill', 'hills', 'lake', 'प्रकृति', 'প্রকৃতি'),
+    'adventure': ('adventure', 'trek', 'trekking', 'rafting', 'camping', 'climbing'),
+    'wildlife': ('wildlife', 'safari', 'tiger', 'elephant', 'national park', 'birding'),
+    'spiritual': ('temple', 'temples', 'spiritual', 'pilgrimage', 'baidyanath', 'मंदिर', 'মন্দির'),
+    'art': ('art', 'painting', 'sohrai', 'dokra', 'paitkar', 'craft', 'crafts'),
+    'food': ('food', 'cuisine', 'dish', 'dishes', 'street food'),
+    'photography': ('photography', 'photo', 'photos'),
+    'budget': ('budget', 'cheap', 'affordable'),
+    'luxury': ('luxury', 'premium', 'five star', '5 star')
+}
+
+# Words marking the origin: before the place in English, after it in
+# Hindi ("रांची से") and Bengali ("কলকাতা থেকে")
+_FROM_BEFORE = frozenset(['from'])
+_FROM_AFTER = frozenset(['to', 'से', 'থেকে'])
+_TO_BEFORE = frozenset(['to'])
+
+_MONTHS = (
+    'jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec|january|february|march|april|june|july|'
+    'august|september|october|november|december|जनवरी|फरवरी|मार्च|अप्रैल|मई|जून|जुलाई|अगस्त|सितंबर|'
+    'अक्टूबर|नवंबर|दिसंबर'
+)
+# All patterns run on the lowercased message
+_DATE_PATTERN = re.compile(
+    r'\b(\d{4}-\d{2}-\d{2}|\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?'
+    rf'|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:{_MONTHS})\b|(?:{_MONTHS})\s+\d{{1,2}}(?:st|nd|rd|th)?'
+    r'|today|tomorrow|day after tomorrow|next (?:week|weekend|month|monday|tuesday|wednesday|thursday|friday|saturday|sunday)'
+    r'|this (?:weekend|friday|saturday|sunday)|आज|कल|আজ|আগামীকাল)(?!\w)'
+)
+_DURATION_PATTERN = re.compile(r'\b(\d{1,2})\s*[- ]?\s*(?:days?|nights?|दिन|দিন)')
+_GROUP_PATTERN = re.compile(
+    r'\b(\d{1,3})\s+(?:people|persons|adults|travellers|travelers|friends|of us|pax|guests|लोग|জন)'
+)
+_WORD_PATTERN = re.compile(r"[A-Za-z][\w'-]*")
+
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    """One alternation over all keywords; ASCII ones only match whole words"""
+    ordered = sorted(keywords, key=len, reverse=True)
+    ascii_words = '|'.join(re.escape(keyword) for keyword in ordered if keyword.isascii())
+    other_words = '|'.join(re.escape(keyword) for keyword in ordered if not keyword.isascii())
+    # Non-ASCII keywords match inside words so inflected forms (দেওঘরে) count
+    return re.compile('|'.join(filter(None, [ascii_words and rf'(?<!\w)(?:{ascii_words})(?!\w)', other_words])))
+
+def _build_lexicon() -> Dict[str, List[Tuple[str, str, float]]]:
+    """Lowercased keyword -> (kind, label, weight) for intents, interests and places"""
+    lexicon: Dict[str, List[Tuple[str, str, float]]] = {}
+    for intent, keywords in INTENT_KEYWORDS.items():
+        for keyword, weight in keywords.items():
+            lexicon.setdefault(keyword.lower(), []).append(('intent', intent, weight))
+    for interest, keywords in INTEREST_KEYWORDS.items():
+        for keyword in keywords:
+            lexicon.setdefault(keyword.lower(), []).append(('interest', interest, 0.0))
+    for place in KNOWN_PLACES:
+        lexicon.setdefault(place.lower(), []).append(('place', place, 0.0))
+    for place, aliases in PLACE_ALIASES.items():
+        for alias in aliases:
+            lexicon.setdefault(alias, []).append(('place', place, 0.0))
+    return lexicon
+
+# Every keyword is found in a single regex pass over the message
+_LEXICON = _build_lexicon()
+_LEXICON_PATTERN = _keyword_pattern(list(_LEXICON))
+_LEXICON_WORDS = frozenset(word for keyword in _LEXICON for word in keyword.split())
+
+def _scan(lowered: str) -> List[Tuple[int, int, List[Tuple[str, str, float]]]]:
+    return [(match.start(), match.end(), _LEXICON[match.group(0)]) for match in _LEXICON_PATTERN.finditer(lowered)]
+
+def _route_entities(lowered: str, places: List[Tuple[int, int, str]]) -> Dict[str, Any]:
+    from_place = to_place = None
+    for start, end, place in places:
+        before = lowered[:start].split()[-1:]
+        after = lowered[end:].split()[:1]
+        if from_place is None and (before and before[0] in _FROM_BEFORE or after and after[0] in _FROM_AFTER):
+            from_place = place
+        elif to_place is None and before and before[0] in _TO_BEFORE:
+            to_place = place
+    if from_place and not to_place:
+        to_place = next((place for _, _, place in places if place != from_place), None)
+
+    names = list(dict.fromkeys(place for _, _, place in places))
+    entities: Dict[str, Any] = {'locations': names}
+    if from_place:
+        entities['from_location'] = from_place
+    if to_place:
+        entities['to_location'] = to_place
+    entities['location'] = to_place or next((name for name in names if name != from_place), names[0])
+    return entities
+
+def extract_entities(message: str, lowered: Optional[str] = None,
+                     matches: Optional[list] = None) -> Dict[str, Any]:
+    """Locations, dates, duration, group size and interests found by pattern"""
+    lowered = message.lower() if lowered is None else lowered
+    matches = _scan(lowered) if matches is None else matches
+    entities: Dict[str, Any] = {}
+
+    places = [(start, end, label) for start, end, roles in matches for kind, label, _ in roles if kind == 'place']
+    if places:
+        entities.update(_route_entities(lowered, places))
+
+    date = _DATE_PATTERN.search(lowered)
+    if date:
+        entities['travel_date'] = date.group(0)
+        entities['check_in_date'] = date.group(0)
+
+    duration = _DURATION_PATTERN.search(lowered)
+    if duration:
+        entities['duration'] = f"{int(duration.group(1))} days"
+
+    group = _GROUP_PATTERN.search(lowered)
+    if group:
+        entities['group_size'] = int(group.group(1))
+
+    interests = list(dict.fromkeys(label for _, _, roles in matches for kind, label, _ in roles if kind == 'interest'))
+    if interests:
+        entities['interests'] = interests
+
+    return entities
+
+def _has_unparsed_details(message: str, entities: Dict[str, Any]) -> bool:
+    """Numbers or proper nouns the patterns could not place in an entity"""
+    if any(character.isdigit() for character in message) and not (
+            {'travel_date', 'duration', 'group_size'} & entities.keys()):
+        return True
+    words = _WORD_PATTERN.findall(message)[1:]
+    return any(word[0].isupper() and word != 'I' and word.lower() not in _LEXICON_WORDS for word in words)
+
+def score_intents(message: str, matches: Optional[list] = None) -> Dict[str, float]:
+    matches = _scan(message.lower()) if matches is None else matches
+    scores: Dict[str, float] = {}
+    for _, _, roles in matches:
+        for kind, intent, weight in roles:
+            if kind == 'intent':
+                scores[intent] = scores.get(intent, 0.0) + weight
+    return scores
+
+def classify_rules(message: str) -> Dict[str, Any]:
+    """Keyword/regex intent analysis in the same shape as the LLM's JSON answer"""
+    lowered = message.lower()
+    matches = _scan(lowered)
+    scores = score_intents(message, matches)
+    entities = extract_entities(message, lowered, matches)
+    # Day counts are a strong itinerary signal ("5 day trip") unless the
+    # message is clearly about rooms ("3 nights at a hotel")
+    if 'duration' in entities and 'accommodation_booking' not in scores:
+        scores['itinerary_creation'] = scores.get('itinerary_creation', 0.0) + 1.5
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    if not ranked:
+        intent, confidence = 'general_inquiry', 0.3
+    else:
+        intent, top = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        # Grows with the winning score and shrinks with competition
+        confidence = top / (top + runner_up + 0.5)
+
+    # Missing slots only count against the rules when the message holds
+    # details (dates, names) the LLM might have extracted
+    required = REQUIRED_ENTITIES.get(intent, ())
+    found = sum(1 for slot in required if slot in entities)
+    if found < len(required) and _has_unparsed_details(message, entities):
+        confidence *= (found + 1) / (len(required) + 1)
+
+    return {
+        'primary_intent': intent,
+        'entities': entities,
+        'confidence': round(confidence, 3),
+        'next_actions': NEXT_ACTIONS[intent],
+        'classifier': 'rules'
+    }
+
+class IntentClassifier:
+    """Tiered intent analysis: cache, then rules, then (via the agent) the LLM"""
+
+    def __init__(self, min_confidence: float = INTENT_MIN_CONFIDENCE,
+                 cache_size: int = INTENT_CACHE_SIZE, cache_ttl: float = INTENT_CACHE_TTL):
+        self.min_confidence = min_confidence
+        self._cache = TTLCache(cache_size, cache_ttl)
+        self._lock = threading.Lock()
+        self.tiers = {'cache': 0, 'rules': 0, 'llm': 0, 'llm_failed': 0}
+
+    def _count(self, tier: str):
+        with self._lock:
+            self.tiers[tier] += 1
+
+    def cached(self, message: str) -> Optional[Dict[str, Any]]:
+        analysis = self._cache.get(normalize_message(message))
+        if analysis is MISSING:
+            return None
+        self._count('cache')
+        return analysis
+
+    def classify_local(self, message: str) -> Tuple[Dict[str, Any], bool]:
+        """Rules analysis and whether it is confident enough to skip the LLM"""
+        analysis = classify_rules(message)
+        confident = analysis['confidence'] >= self.min_confidence
+        if confident:
+            self._count('rules')
+            self.remember(message, analysis)
+        return analysis, confident
+
+    def remember(self, message: str, analysis: Dict[str, Any]):
+        self._cache.set(normalize_message(message), analysis)
+
+    def record_llm(self, message: str, analysis: Optional[Dict[str, Any]]):
+        if analysis is None:
+            self._count('llm_failed')
+            return
+        self._count('llm')
+        self.remember(message, analysis)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tiers = dict(self.tiers)
+        total = sum(tiers.values())
+        return {
+            'tiers': tiers,
+            'llm_share': round((tiers['llm'] + tiers['llm_failed']) / total, 4) if total else 0.0,
+            'min_confidence': self.min_confidence,
+            'cache': self._cache.stats()
+        }
+
+# Shared classifier used by the AI agent
+intent_classifier = IntentClassifier()
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Bookable resources: booking_type -> (catalog table, status column, units
+# per date until a capacity is set for that date)
+INVENTORY_RESOURCES: Dict[str, Tuple[str, Optional[str], int]] = {
+    'transportation': ('transportation', 'availability_status', int(os.getenv('INVENTORY_DEFAULT_SEATS', '40'))),
+    'hotel': ('hotels', None, int(os.getenv('INVENTORY_DEFAULT_ROOMS', '10'))),
+    'guide': ('guides', 'availability_status', 1)
+}
+# How long a pending booking keeps its seats/rooms/guide-days before they
+# go back on sale
+BOOKING_HOLD_SECONDS = float(os.getenv('BOOKING_HOLD_SECONDS', '900'))
+MAX_BOOKING_DAYS = 30
+
+class BookingConflict(Exception):
+    """The booking can't go ahead as asked: sold out, unavailable or no longer pending"""
+
+class Reservation:
+    """quantity units of one resource on each of days dates from start"""
+    __slots__ = ('resource_type', 'resource_id', 'start', 'days', 'quantity')
+
+    def __init__(self, resource_type: str, resource_id: int, start: str, days: int = 1, quantity: int = 1):
+        if resource_type not in INVENTORY_RESOURCES:
+            raise ValueError(f"booking_type must be one of: {', '.join(INVENTORY_RESOURCES)}")
+        for name, value, most in (('item_id', resource_id, None), ('days', days, MAX_BOOKING_DAYS),
+                                  ('quantity', quantity, None)):
+            if not isinstance(value, int) or isinstance(value, bool) or value < 1 or (most and value > most):
+                raise ValueError(f"{name} must be an integer from 1" + (f" to {most}" if most else ''))
+        self.resource_type = resource_type
+        self.resource_id = resource_id
+        self.start = parse_date(start).isoformat()
+        self.days = days
+        self.quantity = quantity
+
+    @property
+    def end(self) -> str:
+        """First date after the reservation"""
+        return (date.fromisoformat(self.start) + timedelta(days=self.days)).isoformat()
+
+    def dates(self) -> List[str]:
+        first = date.fromisoformat(self.start)
+        return [(first + timedelta(days=offset)).isoformat() for offset in range(self.days)]
+
+def parse_date(value: Any) -> date:
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError("date must be YYYY-MM-DD")
+
+def reservation_for(booking_type: Optional[str], booking_data: Dict) -> Optional[Reservation]:
+    """The inventory a booking asks for, or None for bookings that don't name an item"""
+    if booking_data.get('item_id') is None:
+        return None
+    return Reservation(booking_type, booking_data['item_id'], booking_data.get('date'),
+                       booking_data.get('days', 1), booking_data.get('quantity', 1))
+
+def hold(conn: sqlite3.Connection, reservation: Reservation):
+    """Take the reservation's units out of inventory, or raise BookingConflict
+
+    Must run inside the caller's write transaction so a conflict rolls back
+    any dates already taken.
+    """
+    table, status, default_capacity = INVENTORY_RESOURCES[reservation.resource_type]
+    # Hotels have no status column and are always on sale
+    column = status or "'available'"
+    row = conn.execute(f"SELECT {column} FROM {table} WHERE id = ?", (reservation.resource_id,)).fetchone()
+    if row is None:
+        raise LookupError(f"No {reservation.resource_type} with id {reservation.resource_id}")
+    if row[0] != 'available':
+        raise BookingConflict(f"This {reservation.resource_type} is not available")
+
+    key = (reservation.resource_type, reservation.resource_id)
+    dates = reservation.dates()
+    conn.executemany('''
+        INSERT OR IGNORE INTO inventory (resource_type, resource_id, date, capacity)
+        VALUES (?, ?, ?, ?)
+    ''', [key + (day, default_capacity) for day in dates])
+    # One conditional update over the date range: every date must have room
+    taken = conn.execute('''
+        UPDATE inventory SET reserved = reserved + ?
+        WHERE resource_type = ? AND resource_id = ? AND date >= ? AND date < ?
+          AND capacity - reserved >= ?
+    ''', (reservation.quantity,) + key + (reservation.start, reservation.end, reservation.quantity)).rowcount
+    if taken != len(dates):
+        span = reservation.start if len(dates) == 1 else f"some dates from {reservation.start} to {dates[-1]}"
+        raise BookingConflict(f"Fewer than {reservation.quantity} left on {span}")
+
+# Booking columns read back when a hold is released
+_HOLD_COLUMNS = 'id, status, resource_type, resource_id, start_date, days, quantity'
+
+def _give_back(conn: sqlite3.Connection, bookings: Iterable[tuple]):
+    conn.executemany('''
+        UPDATE inventory SET reserved = reserved - ?
+        WHERE resource_type = ? AND resource_id = ? AND date >= ? AND date < ?
+    ''', [(quantity, resource_type, resource_id, start,
+           (date.fromisoformat(start) + timedelta(days=days)).isoformat())
+          for _, _, resource_type, resource_id, start, days, quantity in bookings if resource_type is not None])
+
+def release_expired(conn: sqlite3.Connection, now: Optional[float] = None) -> int:
+    """Expire pending bookings whose hold has lapsed and put their units back on sale
+
+    Must run inside the caller's write transaction.
+    """
+    expired = conn.execute(f'''
+        SELECT {_HOLD_COLUMNS} FROM bookings WHERE status = 'pending' AND hold_expires_at <= ?
+    ''', (time.time() if now is None else now,)).fetchall()
+    _give_back(conn, expired)
+    conn.executemany("UPDATE bookings SET status = 'expired', hold_expires_at = NULL WHERE id = ?",
+                     [(booking[0],) for booking in expired])
+    return len(expired)
+
+def sweep_expired(conn: sqlite3.Connection, now: Optional[float] = None) -> int:
+    """release_expired() in its own transaction, taken only when a hold has lapsed
+
+    Called from read routes (search_transportation, GET /api/availability) so
+    lapsed units show as free without a background job. Those GETs therefore
+    take a short BEGIN IMMEDIATE write lock whenever a hold has lapsed; it
+    waits out concurrent writers for at most the connection's busy_timeout.
+    Most requests find nothing lapsed and stay read-only.
+    """
+    now = time.time() if now is None else now
+    lapsed = conn.execute(
+        "SELECT 1 FROM bookings WHERE status = 'pending' AND hold_expires_at <= ? LIMIT 1", (now,)
+    ).fetchone()
+    if lapsed is None:
+        return 0
+    conn.execute('BEGIN IMMEDIATE')
+    released = release_expired(conn, now)
+    conn.commit()
+    return released
+
+def _booking(conn: sqlite3.Connection, booking_id: int) -> tuple:
+    booking = conn.execute(f"SELECT {_HOLD_COLUMNS} FROM bookings WHERE id = ?", (booking_id,)).fetchone()
+    if booking is None:
+        raise LookupError(f"No booking with id {booking_id}")
+    return booking
+
+def confirm(conn: sqlite3.Connection, booking_id: int, now: Optional[float] = None):
+    """Turn a pending hold into a confirmed booking; lapsed holds can't be confirmed"""
+    release_expired(conn, now)
+    booking = _booking(conn, booking_id)
+    if booking[1] != 'pending':
+        raise BookingConflict(f"Booking {booking_id} is {booking[1]}")
+    conn.execute("UPDATE bookings SET status = 'confirmed', hold_expires_at = NULL WHERE id = ?", (booking_id,))
+
+def cancel(conn: sqlite3.Connection, booking_id: int, now: Optional[float] = None):
+    """Cancel a pending or confirmed booking and put its units back on sale"""
+    release_expired(conn, now)
+    booking = _booking(conn, booking_id)
+    if booking[1] not in ('pending', 'confirmed'):
+        raise BookingConflict(f"Booking {booking_id} is {booking[1]}")
+    _give_back(conn, [booking])
+    conn.execute("UPDATE bookings SET status = 'cancelled', hold_expires_at = NULL WHERE id = ?", (booking_id,))
+
+def availability(conn: sqlite3.Connection, resource_type: str, resource_id: int,
+                 start: str, days: int) -> List[Dict[str, Any]]:
+    """Capacity, reserved and available units for each date of the span"""
+    reservation = Reservation(resource_type, resource_id, start, days)
+    rows = {row[0]: (row[1], row[2]) for row in conn.execute('''
+        SELECT date, capacity, reserved FROM inventory
+        WHERE resource_type = ? AND resource_id = ? AND date >= ? AND date < ?
+    ''', (resource_type, resource_id, reservation.start, reservation.end))}
+    default_capacity = INVENTORY_RESOURCES[resource_type][2]
+    return [{'date': day, 'capacity': capacity, 'reserved': reserved, 'available': capacity - reserved}
+            for day in reservation.dates()
+            for capacity, reserved in [rows.get(day, (default_capacity, 0))]]
+
+def units_left(conn: sqlite3.Connection, resource_type: str,
+               wanted: Iterable[Tuple[int, str]]) -> Dict[Tuple[int, str], int]:
+    """Units left for each (resource id, date); dates never booked have the default capacity"""
+    wanted = set(wanted)
+    default_capacity = INVENTORY_RESOURCES[resource_type][2]
+    left = dict.fromkeys(wanted, default_capacity)
+    by_date: Dict[str, List[int]] = {}
+    for resource_id, day in wanted:
+        by_date.setdefault(day, []).append(resource_id)
+    for day, ids in by_date.items():
+        placeholders = ', '.join('?' * len(ids))
+        for resource_id, available in conn.execute(f'''
+            SELECT resource_id, capacity - reserved FROM inventory
+            WHERE resource_type = ? AND resource_id IN ({placeholders}) AND date = ?
+        ''', [resource_type] + ids + [day]):
+            left[(resource_id, day)] = available
+    return left
+
+def set_capacity(conn: sqlite3.Connection, reservation: Reservation, capacity: int):
+    """Set the units on sale for each date of the span; never below what's already reserved"""
+    if not isinstance(capacity, int) or isinstance(capacity, bool) or capacity < 0:
+        raise ValueError("capacity must be a non-negative integer")
+    key = (reservation.resource_type, reservation.resource_id)
+    try:
+        conn.executemany('''
+            INSERT INTO inventory (resource_type, resource_id, date, capacity) VALUES (?, ?, ?, ?)
+            ON CONFLICT (resource_type, resource_id, date) DO UPDATE SET capacity = excluded.capacity
+        ''', [key + (day, capacity) for day in reservation.dates()])
+    except sqlite3.IntegrityError:
+        raise BookingConflict(f"More than {capacity} already reserved on some of these dates")
@@ -0,0 +1,262 @@
+import os
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+# Longest itinerary rendered; longer requests are planned for this many days
+ITINERARY_MAX_DAYS = int(os.getenv('ITINERARY_MAX_DAYS', '14'))
+ITINERARY_CACHE_SIZE = int(os.getenv('ITINERARY_CACHE_SIZE', '1024'))
+
+# Day plans in route order. The first is always day 1 (arrival in Ranchi);
+# the others are picked by how well their themes match the traveller's
+# interests, and a "last" plan ends the trip when picked. Days beyond the
+# available plans become leisure days.
+DAY_PLANS: List[Dict] = [
+    {'id': 'ranchi', 'themes': ('nature', 'adventure'), 'first': True},
+    {'id': 'heritage', 'themes': ('cultural',)},
+    {'id': 'netarhat', 'themes': ('nature',)},
+    {'id': 'betla', 'themes': ('nature',)},
+    {'id': 'deoghar', 'themes': ('cultural', 'adventure')},
+    {'id': 'patratu', 'themes': ('nature', 'adventure')},
+    {'id': 'dassam', 'themes': ('adventure', 'nature'), 'last': True}
+]
+
+# Text per language. A language only needs the plans it translates: missing
+# ones fall back to English, and unknown languages render in English.
+ITINERARY_TEXT: Dict[str, Dict] = {
+    'en': {
+        'title': "🗓️ {days}-Day Jharkhand Itinerary:",
+        'day': "📅 Day {number}: {title}",
+        'plans': {
+            'ranchi': ("Ranchi Exploration", [
+                "Morning: Visit Hundru Falls (98m waterfall)",
+                "Afternoon: Rock Garden - boating and adventure activities",
+                "Evening: Pahari Mandir for panoramic sunset views",
+                "Night: Stay in Ranchi city"
+            ]),
+            'heritage': ("Cultural Heritage Tour", [
+                "Morning: Jagannath Temple - architectural marvel",
+                "Afternoon: Tribal Museum - rich cultural heritage",
+                "Evening: Local market shopping for tribal handicrafts",
+                "Night: Cultural folk dance performance"
+            ]),
+            'netarhat': ("Netarhat Hill Station", [
+                "Early morning: Drive to Netarhat (Queen of Chotanagpur)",
+                "Morning: Sunrise point experience",
+                "Afternoon: Nature walks and local tribal village visit",
+                "Evening: Sunset point with panoramic valley views"
+            ]),
+            'betla': ("Wildlife Safari", [
+                "Morning: Betla National Park safari",
+                "Afternoon: Wildlife photography and nature walks",
+                "Evening: Campfire and traditional dinner"
+            ]),
+            'deoghar': ("Deoghar Pilgrimage", [
+                "Morning: Darshan at Baba Baidyanath Dham",
+                "Afternoon: Naulakha Mandir",
+                "Evening: Trikut Parvat ropeway"
+            ]),
+            'patratu': ("Patratu Valley & Hazaribagh", [
+                "Morning: Drive the hairpin bends of Patratu Valley",
+                "Afternoon: Hazaribagh National Park",
+                "Evening: Sunset from Canary Hill"
+            ]),
+            'dassam': ("Adventure & Departure", [
+                "Morning: Dassam Falls - nature photography",
+                "Afternoon: Tagore Hill trekking",
+                "Evening: Return journey with memories"
+            ]),
+            'leisure': ("Leisure Day", [
+                "Explore local markets, cafés and parks at your own pace",
+                "Optional: revisit a favourite spot from your trip"
+            ])
+        },
+        'tips_title': "💡 Travel Tips:",
+        'tips': [
+            "Best time: October to March (pleasant weather)",
+            "Carry comfortable trekking shoes",
+            "Try local tribal cuisine (Handia, Thekua)",
+            "Book forest accommodations in advance",
+            "Respect tribal customs and traditions"
+        ],
+        'interest_tips': {
+            'nature': "Carry binoculars and rain gear for forest trails",
+            'cultural': "Check festival dates (Sarhul, Karma) before you travel",
+            'adventure': "Book trekking guides and ropeway tickets a day ahead"
+        },
+        'footer': [
+            "🎯 Estimated Budget: ₹8,000-15,000 per person",
+            "📞 Need help with bookings or more details? Just ask!"
+        ]
+    },
+    'hi': {
+        'title': "🗓️ {days}-दिन झारखंड यात्रा योजना:",
+        'day': "📅 दिन {number}: {title}",
+        'plans': {
+            'ranchi': ("रांची अन्वेषण", [
+                "सुबह: हुंडरू फॉल्स (98 मीटर झरना) देखें",
+                "दोपहर: रॉक गार्डन - नौका विहार और रोमांचक गतिविधियां",
+                "शाम: पहाड़ी मंदिर से सूर्यास्त का नजारा",
+                "रात: रांची शहर में ठहरें"
+            ]),
+            'heritage': ("सांस्कृतिक विरासत यात्रा", [
+                "सुबह: जगन्नाथ मंदिर - वास्तुकला का नमूना",
+                "दोपहर: आदिवासी संग्रहालय - समृद्ध सांस्कृतिक विरासत",
+                "शाम: स्थानीय बाजार में आदिवासी हस्तशिल्प खरीदारी",
+                "रात: सांस्कृतिक लोक नृत्य प्रदर्शन"
+            ]),
+            'netarhat': ("नेतरहाट हिल स्टेशन", [
+                "सुबह जल्दी: नेतरहाट की यात्रा (छोटानागपुर की रानी)",
+                "सुबह: सूर्योदय बिंदु का अनुभव",
+                "दोपहर: प्रकृति सैर और स्थानीय आदिवासी गांव भ्रमण",
+                "शाम: सूर्यास्त बिंदु से घाटी का नजारा"
+            ]),
+            'betla': ("वन्यजीव सफारी", [
+                "सुबह: बेतला राष्ट्रीय उद्यान में सफारी",
+                "दोपहर: वन्यजीव फोटोग्राफी और प्रकृति सैर",
+                "शाम: अलाव और पारंपरिक रात्रिभोज"
+            ]),
+            'deoghar': ("देवघर तीर्थ यात्रा", [
+                "सुबह: बाबा बैद्यनाथ धाम के दर्शन",
+                "दोपहर: नौलखा मंदिर",
+                "शाम: त्रिकूट पर्वत रोपवे"
+            ]),
+            'patratu': ("पतरातू घाटी और हजारीबाग", [
+                "सुबह: पतरातू घाटी की घुमावदार सड़कें",
+                "दोपहर: हजारीबाग राष्ट्रीय उद्यान",
+                "शाम: कैनरी हिल से सूर्यास्त"
+            ]),
+            'dassam': ("रोमांच और वापसी", [
+                "सुबह: दशम फॉल्स - प्रकृति फोटोग्राफी",
+                "दोपहर: टैगोर हिल ट्रेकिंग",
+                "शाम: यादों के साथ वापसी"
+            ]),
+            'leisure': ("आराम का दिन", [
+                "अपनी गति से स्थानीय बाजार और पार्क घूमें",
+                "वैकल्पिक: किसी पसंदीदा जगह पर दोबारा जाएं"
+            ])
+        },
+        'tips_title': "💡 यात्रा सुझाव:",
+        'tips': [
+            "सबसे अच्छा समय: अक्टूबर से मार्च (सुहावना मौसम)",
+            "आरामदायक ट्रेकिंग जूते ले जाएं",
+            "स्थानीय आदिवासी भोजन का स्वाद लें",
+            "वन विश्राम गृह पहले से बुक करें"
+        ],
+        'interest_tips': {
+            'nature': "जंगल की पगडंडियों के लिए दूरबीन और बरसाती साथ रखें",
+            'cultural': "यात्रा से पहले त्योहारों (सरहुल, करमा) की तिथियां देखें",
+            'adventure': "ट्रेकिंग गाइड और रोपवे टिकट एक दिन पहले बुक करें"
+        },
+        'footer': [
+            "🎯 अनुमानित बजट: ₹8,000-15,000 प्रति व्यक्ति",
+            "📞 बुकिंग या अधिक जानकारी चाहिए? बस पूछें!"
+        ]
+    },
+    'bn': {
+        'title': "🗓️ {days}-দিন ঝাড়খণ্ড ভ্রমণ পরিকল্পনা:",
+        'day': "📅 দিন {number}: {title}",
+        'digits': "০১২৩৪৫৬৭৮৯",
+        'plans': {
+            'ranchi': ("রাঁচি অন্বেষণ", [
+                "সকাল: হুন্দ্রু জলপ্রপাত (৯৮ মিটার) দেখুন",
+                "বিকাল: রক গার্ডেন - নৌকা বিহার ও অ্যাডভেঞ্চার",
+                "সন্ধ্যা: পাহাড়ী মন্দির থেকে সূর্যাস্ত",
+                "রাত: রাঁচি শহরে থাকুন"
+            ]),
+            'heritage': ("সাংস্কৃতিক ঐতিহ্য ভ্রমণ", [
+                "সকাল: জগন্নাথ মন্দির - স্থাপত্য নিদর্শন",
+                "বিকাল: উপজাতীয় জাদুঘর - সমৃদ্ধ সাংস্কৃতিক ঐতিহ্য",
+                "সন্ধ্যা: স্থানীয় বাজারে উপজাতীয় হস্তশিল্প কেনাকাটা",
+                "রাত: সাংস্কৃতিক লোকনৃত্য পরিবেশনা"
+            ]),
+            'netarhat': ("নেতরহাট পাহাড়ী স্টেশন", [
+                "ভোর: নেতরহাট যাত্রা (ছোটনাগপুরের রানী)",
+                "সকাল: সূর্যোদয় বিন্দুর অভিজ্ঞতা",
+                "বিকাল: প্রকৃতি হাঁটা ও স্থানীয় উপজাতীয় গ্রাম ভ্রমণ",
+                "সন্ধ্যা: সূর্যাস্ত বিন্দু থেকে উপত্যকার দৃশ্য"
+            ]),
+            'betla': ("বন্যপ্রাণী সাফারি", [
+                "সকাল: বেতলা জাতীয় উদ্যানে সাফারি",
+                "বিকাল: বন্যপ্রাণী ফটোগ্রাফি ও প্রকৃতি হাঁটা",
+                "সন্ধ্যা: ক্যাম্পফায়ার ও ঐতিহ্যবাহী নৈশভোজ"
+            ]),
+            'deoghar': ("দেওঘর তীর্থযাত্রা", [
+                "সকাল: বাবা বৈদ্যনাথ ধাম দর্শন",
+                "বিকাল: নওলাখা মন্দির",
+                "সন্ধ্যা: ত্রিকূট পর্বত রোপওয়ে"
+            ]),
+            'patratu': ("পতরাতু উপত্যকা ও হাজারিবাগ", [
+                "সকাল: পতরাতু উপত্যকার পাহাড়ি পথ",
+                "বিকাল: হাজারিবাগ জাতীয় উদ্যান",
+                "সন্ধ্যা: ক্যানারি হিল থেকে সূর্যাস্ত"
+            ]),
+            'dassam': ("অ্যাডভেঞ্চার ও প্রত্যাবর্তন", [
+                "সকাল: দশম জলপ্রপাত - প্রকৃতি ফটোগ্রাফি",
+                "বিকাল: টেগোর হিলে ট্রেকিং",
+                "সন্ধ্যা: স্মৃতি নিয়ে ফেরার যাত্রা"
+            ]),
+            'leisure': ("অবসরের দিন", [
+                "নিজের গতিতে স্থানীয় বাজার ও পার্ক ঘুরে দেখুন",
+                "ঐচ্ছিক: প্রিয় কোনো জায়গায় আবার যান"
+            ])
+        },
+        'tips_title': "💡 ভ্রমণ পরামর্শ:",
+        'tips': [
+            "সবচেয়ে ভাল সময়: অক্টোবর থেকে মার্চ (মনোরম আবহাওয়া)",
+            "আরামদায়ক ট্রেকিং জুতা নিয়ে যান",
+            "স্থানীয় উপজাতীয় খাবারের স্বাদ নিন",
+            "বন বিশ্রামাগার আগে থেকে বুক করুন"
+        ],
+        'interest_tips': {
+            'nature': "বনপথের জন্য দূরবীন ও বর্ষাতি সঙ্গে রাখুন",
+            'cultural': "ভ্রমণের আগে উৎসবের (সরহুল, করম) তারিখ দেখে নিন",
+            'adventure': "ট্রেকিং গাইড ও রোপওয়ে টিকিট একদিন আগে বুক করুন"
+        },
+        'footer': [
+            "🎯 আনুমানিক বাজেট: ₹৮,০০০-১৫,০০০ প্রতি ব্যক্তি",
+            "📞 বুকিং বা আরও তথ্য প্রয়োজন? শুধু জিজ্ঞাসা করুন!"
+        ]
+    }
+}
+
+def plan_days(days: int, interests: Sequence[str]) -> List[str]:
+    """Plan ids for each day of the trip, in travel order"""
+    first = [plan for plan in DAY_PLANS if plan.get('first')][:days]
+    others = [plan for plan in DAY_PLANS if not plan.get('first')]
+    slots = days - len(first)
+    # Plans sharing more of the traveller's interests first, route order breaking ties
+    ranked = sorted(others, key=lambda plan: -len(set(plan['themes']) & set(interests)))
+    picked = {plan['id'] for plan in ranked[:slots]}
+
+    route = [plan['id'] for plan in others if plan['id'] in picked and not plan.get('last')]
+    last = [plan['id'] for plan in others if plan['id'] in picked and plan.get('last')]
+    leisure = ['leisure'] * (slots - len(route) - len(last))
+    return [plan['id'] for plan in first] + route + leisure + last
+
+def _numerals(number: int, digits: str = None) -> str:
+    return ''.join(digits[int(digit)] for digit in str(number)) if digits else str(number)
+
+@lru_cache(maxsize=ITINERARY_CACHE_SIZE)
+def _render(days: int, interests: tuple, language: str) -> str:
+    text = ITINERARY_TEXT.get(language, ITINERARY_TEXT['en'])
+    english = ITINERARY_TEXT['en']
+    sections = [text['title'].format(days=days)]
+
+    for number, plan_id in enumerate(plan_days(days, interests), 1):
+        title, items = text['plans'].get(plan_id) or english['plans'][plan_id]
+        heading = text['day'].format(number=_numerals(number, text.get('digits')), title=title)
+        sections.append('\n'.join([heading] + [f"• {item}" for item in items]))
+
+    tips = text['tips'] + [tip for interest, tip in text['interest_tips'].items() if interest in interests]
+    sections.append('\n'.join([text['tips_title']] + [f"• {tip}" for tip in tips]))
+    sections.append('\n'.join(text['footer']))
+    return '\n\n'.join(sections)
+
+def render_itinerary(days: int, interests: Sequence[str], language: str = 'en') -> str:
+    """Itinerary text for a trip; each (days, interests, language) is rendered once"""
+    days = max(1, min(int(days), ITINERARY_MAX_DAYS))
+    return _render(days, tuple(sorted(set(interests))), language if language in ITINERARY_TEXT else 'en')
+
+def cache_info() -> Dict[str, int]:
+    info = _render.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'entries': info.currsize, 'max_entries': info.maxsize}
@@ -0,0 +1,208 @@
+import atexit
+import json
+import math
+import os
+import string
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# File the cache is loaded from and saved to; empty (the default) keeps it
+# in memory only, so importing this module never writes into the working directory
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', '')
+LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', '2000'))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', '86400'))
+# Cosine similarity a cached question needs to answer a new one; 0 turns
+# the similarity layer off and leaves only exact (normalized) matches
+LLM_CACHE_SIMILARITY = float(os.getenv('LLM_CACHE_SIMILARITY', '0.9'))
+# Most recent entries per scope compared by the similarity layer
+LLM_CACHE_SCAN_LIMIT = int(os.getenv('LLM_CACHE_SCAN_LIMIT', '200'))
+# Persist after this many new answers (and always at exit)
+LLM_CACHE_SAVE_EVERY = int(os.getenv('LLM_CACHE_SAVE_EVERY', '50'))
+
+_PUNCTUATION = string.punctuation + '।॥“”‘’…'
+# Filler words ignored by the similarity layer (never by the exact layer)
+_STOPWORDS = frozenset(
+    'a an the is are was be to of for in on at and or me my i we our you your '
+    'what which please can could would tell about do does some any '
+    'का की के है हैं में को से और'.split()
+)
+
+def normalize_message(text: str) -> str:
+    """Casefolded, punctuation-free, single-spaced form of a user message"""
+    tokens = (token.strip(_PUNCTUATION) for token in unicodedata.normalize('NFKC', text).casefold().split())
+    return ' '.join(token for token in tokens if token)
+
+def message_vector(normalized: str) -> Dict[str, float]:
+    """Unit-length bag of words and word pairs; the pairs keep word order relevant"""
+    words = [word for word in normalized.split() if word not in _STOPWORDS]
+    terms = Counter(words)
+    terms.update(f'{first} {second}' for first, second in zip(words, words[1:]))
+    norm = math.sqrt(sum(count * count for count in terms.values())) or 1.0
+    return {term: count / norm for term, count in terms.items()}
+
+def cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+class ResponseCache:
+    """LLM answers keyed by scope (workflow + entities) and normalized user message"""
+
+    def __init__(self, path: Optional[str] = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_SIZE,
+                 ttl_seconds: float = LLM_CACHE_TTL, similarity_threshold: float = LLM_CACHE_SIMILARITY,
+                 save_every: int = LLM_CACHE_SAVE_EVERY):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.save_every = save_every
+        # (scope, normalized message) -> (expires_at, response, vector); wall
+        # clock expiry so entries survive a restart with their remaining TTL
+        self._entries: OrderedDict = OrderedDict()
+        self._scopes: Dict[str, Dict[str, None]] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        if path:
+            self.load()
+
+    def _remove(self, key: Tuple[str, str]):
+        del self._entries[key]
+        scope, normalized = key
+        members = self._scopes.get(scope)
+        if members is not None:
+            members.pop(normalized, None)
+            if not members:
+                del self._scopes[scope]
+
+    def _find_similar(self, scope: str, vector: Dict[str, float], now: float) -> Optional[Tuple[str, str]]:
+        members = self._scopes.get(scope)
+        if not members or self.similarity_threshold <= 0:
+            return None
+        best_key, best_score = None, self.similarity_threshold
+        for scanned, normalized in enumerate(reversed(members)):
+            if scanned >= LLM_CACHE_SCAN_LIMIT:
+                break
+            expires_at, _, candidate = self._entries[(scope, normalized)]
+            if expires_at <= now:
+                continue
+            score = cosine(vector, candidate)
+            if score >= best_score:
+                best_key, best_score = (scope, normalized), score
+        return best_key
+
+    def lookup(self, scope: str, message: str) -> Optional[str]:
+        """Cached answer for an identical or sufficiently similar message in scope"""
+        normalized = normalize_message(message)
+        key = (scope, normalized)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.exact_hits += 1
+                    return entry[1]
+                self._remove(key)
+
+            similar = self._find_similar(scope, message_vector(normalized), now)
+            if similar is not None:
+                self._entries.move_to_end(similar)
+                self.similar_hits += 1
+                return self._entries[similar][1]
+
+            self.misses += 1
+            return None
+
+    def store(self, scope: str, message: str, response: str):
+        normalized = normalize_message(message)
+        key = (scope, normalized)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + self.ttl_seconds, response, message_vector(normalized))
+            self._scopes.setdefault(scope, {})[normalized] = None
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self.stores += 1
+            self._unsaved += 1
+            should_save = self.path and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+            self._unsaved += 1
+
+    def load(self):
+        """Restore unexpired entries saved by a previous process"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable LLM cache {self.path}: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            for scope, normalized, expires_at, response in saved.get('entries', []):
+                if expires_at > now:
+                    self._entries[(scope, normalized)] = (expires_at, response, message_vector(normalized))
+                    self._scopes.setdefault(scope, {})[normalized] = None
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def save(self):
+        """Write entries (oldest first, so LRU order survives) atomically to disk"""
+        if not self.path:
+            return
+        with self._lock:
+            entries = [
+                [scope, normalized, expires_at, response]
+                for (scope, normalized), (expires_at, response, _) in self._entries.items()
+            ]
+            self._unsaved = 0
+        temp_path = f"{self.path}.tmp"
+        with self._save_lock:
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'entries': entries}, f, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ Could not save LLM cache to {self.path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl_seconds,
+            'similarity_threshold': self.similarity_threshold,
+            'exact_hits': self.exact_hits,
+            'similar_hits': self.similar_hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'hit_rate': round((self.exact_hits + self.similar_hits) / lookups, 4) if lookups else 0.0,
+            'path': self.path
+        }
+
+# Shared cache for the agent's generated answers; saved when the process exits
+response_cache = ResponseCache()
+atexit.register(response_cache.save)
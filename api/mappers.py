@@ -0,0 +1,90 @@
+import sqlite3
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+def decode_list(value: Optional[str]) -> List[str]:
+    """Decode a comma-joined list column (specialties, languages, highlights, amenities)"""
+    return value.split(',') if value else []
+
+def _compile_row_mapper(columns: Sequence[str], list_columns: Sequence[str]) -> Callable[[tuple], Dict]:
+    """Build `lambda row: {column0: row[0], ...}` once per table instead of mapping by hand"""
+    items = ', '.join(
+        f'{column!r}: decode_list(row[{index}])' if column in list_columns else f'{column!r}: row[{index}]'
+        for index, column in enumerate(columns)
+    )
+    return eval(f'lambda row: {{{items}}}', {'decode_list': decode_list})
+
+class RowMapper:
+    """Explicit column list and compiled tuple -> dict mapping for one catalog table"""
+
+    def __init__(self, table: str, columns: Sequence[str], list_columns: Sequence[str] = (),
+                 sort_keys: Optional[Dict[str, Tuple[str, bool]]] = None):
+        self.table = table
+        self.columns = tuple(columns)
+        self.list_columns = tuple(column for column in list_columns if column in self.columns)
+        # Public sort name -> (SQL expression, descending); id breaks ties
+        self.sort_keys = dict(sort_keys or {'id': ('id', False)})
+        self.select_sql = f"SELECT {', '.join(self.columns)} FROM {table}"
+        self.map_row = _compile_row_mapper(self.columns, self.list_columns)
+
+    def project(self, fields: Optional[Sequence[str]]) -> 'RowMapper':
+        """Mapper selecting only the requested columns (plus id), in table order"""
+        if not fields:
+            return self
+        unknown = set(fields) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown fields for {self.table}: {', '.join(sorted(unknown))}")
+        return _projected(self, frozenset(fields) | {'id'})
+
+    def map_rows(self, rows: List[tuple]) -> List[Dict]:
+        map_row = self.map_row
+        return [map_row(row) for row in rows]
+
+    def fetch(self, conn: sqlite3.Connection, where: str = '', params: Sequence = ()) -> List[Dict]:
+        """Run the mapper's SELECT with an optional `AND ...` filter and map every row"""
+        return self.map_rows(conn.execute(f"{self.select_sql} WHERE 1=1{where}", params).fetchall())
+
+@lru_cache(maxsize=128)
+def _projected(mapper: RowMapper, fields: frozenset) -> RowMapper:
+    return RowMapper(
+        mapper.table,
+        [column for column in mapper.columns if column in fields],
+        mapper.list_columns,
+        mapper.sort_keys
+    )
+
+# The comma-joined columns stay the written source of truth; the tag join
+# tables derived from them (see migrations.TAG_SOURCES) are only used for
+# filtering, since reading lists back through the join costs ~2x per row
+# (scripts/bench_row_mapping.py).
+GUIDE_MAPPER = RowMapper('guides', [
+    'id', 'name', 'location', 'specialties', 'languages', 'experience_years',
+    'price_per_day', 'rating', 'total_reviews', 'availability_status', 'description'
+], list_columns=['specialties', 'languages'], sort_keys={
+    'id': ('id', False),
+    'rating': ('IFNULL(rating, 0)', True),
+    'price': ('IFNULL(price_per_day, 0)', False)
+})
+
+ACTIVITY_MAPPER = RowMapper('activities', [
+    'id', 'title', 'category', 'location', 'duration', 'group_size', 'price',
+    'rating', 'total_reviews', 'description', 'highlights'
+], list_columns=['highlights'], sort_keys={
+    'id': ('id', False),
+    'rating': ('IFNULL(rating, 0)', True),
+    'price': ('IFNULL(price, 0)', False)
+})
+
+TRANSPORTATION_MAPPER = RowMapper('transportation', [
+    'id', 'transport_type', 'name', 'from_location', 'to_location', 'departure_time',
+    'arrival_time', 'duration', 'price', 'class_type', 'availability_status'
+])
+
+HOTEL_MAPPER = RowMapper('hotels', [
+    'id', 'name', 'category', 'location', 'rating', 'total_reviews',
+    'price_per_night', 'amenities', 'description', 'image_url'
+], list_columns=['amenities'], sort_keys={
+    'id': ('id', False),
+    'rating': ('IFNULL(rating, 0)', True),
+    'price': ('IFNULL(price_per_night, 0)', False)
+})
@@ -0,0 +1,340 @@
+import sqlite3
+from typing import List, Tuple
+
+# Tables created by init_db() before any migration runs
+BASE_SCHEMA = '''
+        -- Users table
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            phone TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Bookings table
+        CREATE TABLE IF NOT EXISTS bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            booking_type TEXT NOT NULL,
+            booking_data TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            total_amount REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        );
+
+        -- Guides table
+        CREATE TABLE IF NOT EXISTS guides (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            location TEXT NOT NULL,
+            specialties TEXT NOT NULL,
+            languages TEXT NOT NULL,
+            experience_years INTEGER,
+            price_per_day REAL,
+            rating REAL DEFAULT 0.0,
+            total_reviews INTEGER DEFAULT 0,
+            availability_status TEXT DEFAULT 'available',
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Activities table
+        CREATE TABLE IF NOT EXISTS activities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            category TEXT NOT NULL,
+            location TEXT NOT NULL,
+            duration TEXT,
+            group_size TEXT,
+            price REAL,
+            rating REAL DEFAULT 0.0,
+            total_reviews INTEGER DEFAULT 0,
+            description TEXT,
+            highlights TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Chat messages table
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            user_message TEXT,
+            ai_response TEXT,
+            context_data TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Transportation table
+        CREATE TABLE IF NOT EXISTS transportation (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transport_type TEXT NOT NULL,
+            name TEXT NOT NULL,
+            from_location TEXT NOT NULL,
+            to_location TEXT NOT NULL,
+            departure_time TEXT,
+            arrival_time TEXT,
+            duration TEXT,
+            price REAL,
+            class_type TEXT,
+            availability_status TEXT DEFAULT 'available',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Hotels table
+        CREATE TABLE IF NOT EXISTS hotels (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            location TEXT NOT NULL,
+            rating REAL DEFAULT 0.0,
+            total_reviews INTEGER DEFAULT 0,
+            price_per_night REAL,
+            amenities TEXT,
+            description TEXT,
+            image_url TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+'''
+
+# Comma-joined TEXT columns normalized into tags + <entity>_tags join tables:
+# entity table -> (join table, foreign key column, [(source column, tag kind)])
+TAG_SOURCES = {
+    'guides': ('guide_tags', 'guide_id', [('specialties', 'specialty'), ('languages', 'language')]),
+    'activities': ('activity_tags', 'activity_id', [('highlights', 'highlight')]),
+    'hotels': ('hotel_tags', 'hotel_id', [('amenities', 'amenity')]),
+}
+
+def _split_tags_sql(value: str) -> str:
+    """Recursive CTE yielding (name, position) for each item of a comma-joined value"""
+    return f"""(
+        WITH RECURSIVE split(item, rest, position) AS (
+            SELECT NULL, coalesce({value}, '') || ',', -1
+            UNION ALL
+            SELECT trim(substr(rest, 1, instr(rest, ',') - 1)),
+                   substr(rest, instr(rest, ',') + 1),
+                   position + 1
+            FROM split WHERE rest <> ''
+        )
+        SELECT item AS name, position FROM split WHERE item IS NOT NULL AND item <> ''
+    )"""
+
+def _sync_tags_sql(join_table: str, fk: str, columns, row: str) -> str:
+    """Statements that (re)insert the tag links for one entity row"""
+    statements = []
+    for column, kind in columns:
+        split = _split_tags_sql(f"{row}.{column}")
+        statements.append(f"""
+            INSERT OR IGNORE INTO tags (kind, name) SELECT '{kind}', name FROM {split};
+            INSERT OR IGNORE INTO {join_table} ({fk}, tag_id, position)
+                SELECT {row}.id, tags.id, s.position FROM {split} AS s
+                JOIN tags ON tags.kind = '{kind}' AND tags.name = s.name;""")
+    return ''.join(statements)
+
+def _normalized_tags_sql() -> str:
+    sql = """
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            name TEXT NOT NULL COLLATE NOCASE,
+            UNIQUE (kind, name)
+        );
+    """
+    for table, (join_table, fk, columns) in TAG_SOURCES.items():
+        sync_new = _sync_tags_sql(join_table, fk, columns, 'new')
+        source_columns = ', '.join(column for column, _ in columns)
+        sql += f"""
+        CREATE TABLE IF NOT EXISTS {join_table} (
+            {fk} INTEGER NOT NULL REFERENCES {table} (id),
+            tag_id INTEGER NOT NULL REFERENCES tags (id),
+            position INTEGER NOT NULL,
+            PRIMARY KEY ({fk}, tag_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_{join_table}_tag ON {join_table} (tag_id, {fk});
+
+        CREATE TRIGGER IF NOT EXISTS {table}_tags_insert AFTER INSERT ON {table} BEGIN
+            {sync_new}
+        END;
+        CREATE TRIGGER IF NOT EXISTS {table}_tags_update AFTER UPDATE OF {source_columns} ON {table} BEGIN
+            DELETE FROM {join_table} WHERE {fk} = old.id;
+            {sync_new}
+        END;
+        CREATE TRIGGER IF NOT EXISTS {table}_tags_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM {join_table} WHERE {fk} = old.id;
+        END;
+
+        -- Backfill existing rows by firing the update trigger once per row
+        UPDATE {table} SET {columns[0][0]} = {columns[0][0]};
+        """
+    return sql
+
+# Tables whose writes bump catalog_version (read caches key off it)
+CATALOG_TABLES = ('guides', 'activities', 'transportation', 'hotels')
+
+def _catalog_version_sql() -> str:
+    sql = """
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 1);
+    """
+    for table in CATALOG_TABLES:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            sql += f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+        END;"""
+    return sql
+
+# Ordered schema migrations applied on top of the base tables created in
+# init_db(). PRAGMA user_version records how many have run, so append new
+# entries at the end and never edit one that has shipped.
+MIGRATIONS: List[Tuple[str, str]] = [
+    ('catalog_indexes', '''
+        CREATE INDEX IF NOT EXISTS idx_guides_location
+            ON guides (location);
+        CREATE INDEX IF NOT EXISTS idx_activities_location_category
+            ON activities (location, category);
+        CREATE INDEX IF NOT EXISTS idx_activities_category
+            ON activities (category);
+        CREATE INDEX IF NOT EXISTS idx_transportation_route
+            ON transportation (from_location, to_location, availability_status);
+        CREATE INDEX IF NOT EXISTS idx_hotels_location
+            ON hotels (location);
+        CREATE INDEX IF NOT EXISTS idx_bookings_user
+            ON bookings (user_id);
+        CREATE INDEX IF NOT EXISTS idx_chat_messages_session
+            ON chat_messages (session_id, created_at);
+    '''),
+    ('catalog_search_fts', '''
+        -- One FTS5 index over guides, activities and hotels. rowid encodes
+        -- the source row (id * 10 + kind: 1 guide, 2 activity, 3 hotel) so
+        -- triggers can update entries without scanning the index.
+        CREATE VIRTUAL TABLE IF NOT EXISTS catalog_search USING fts5(
+            entity_type UNINDEXED,
+            entity_id UNINDEXED,
+            title,
+            tags,
+            location,
+            description,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS guides_search_insert AFTER INSERT ON guides BEGIN
+            INSERT INTO catalog_search (rowid, entity_type, entity_id, title, tags, location, description)
+            VALUES (new.id * 10 + 1, 'guide', new.id, new.name,
+                    new.specialties || ',' || new.languages, new.location, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS guides_search_update AFTER UPDATE ON guides BEGIN
+            DELETE FROM catalog_search WHERE rowid = old.id * 10 + 1;
+            INSERT INTO catalog_search (rowid, entity_type, entity_id, title, tags, location, description)
+            VALUES (new.id * 10 + 1, 'guide', new.id, new.name,
+                    new.specialties || ',' || new.languages, new.location, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS guides_search_delete AFTER DELETE ON guides BEGIN
+            DELETE FROM catalog_search WHERE rowid = old.id * 10 + 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS activities_search_insert AFTER INSERT ON activities BEGIN
+            INSERT INTO catalog_search (rowid, entity_type, entity_id, title, tags, location, description)
+            VALUES (new.id * 10 + 2, 'activity', new.id, new.title,
+                    new.category || ',' || coalesce(new.highlights, ''), new.location, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS activities_search_update AFTER UPDATE ON activities BEGIN
+            DELETE FROM catalog_search WHERE rowid = old.id * 10 + 2;
+            INSERT INTO catalog_search (rowid, entity_type, entity_id, title, tags, location, description)
+            VALUES (new.id * 10 + 2, 'activity', new.id, new.title,
+                    new.category || ',' || coalesce(new.highlights, ''), new.location, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS activities_search_delete AFTER DELETE ON activities BEGIN
+            DELETE FROM catalog_search WHERE rowid = old.id * 10 + 2;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS hotels_search_insert AFTER INSERT ON hotels BEGIN
+            INSERT INTO catalog_search (rowid, entity_type, entity_id, title, tags, location, description)
+            VALUES (new.id * 10 + 3, 'hotel', new.id, new.name,
+                    new.category || ',' || coalesce(new.amenities, ''), new.location, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS hotels_search_update AFTER UPDATE ON hotels BEGIN
+            DELETE FROM catalog_search WHERE rowid = old.id * 10 + 3;
+            INSERT INTO catalog_search (rowid, entity_type, entity_id, title, tags, location, description)
+            VALUES (new.id * 10 + 3, 'hotel', new.id, new.name,
+                    new.category || ',' || coalesce(new.amenities, ''), new.location, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS hotels_search_delete AFTER DELETE ON hotels BEGIN
+            DELETE FROM catalog_search WHERE rowid = old.id * 10 + 3;
+        END;
+
+        -- Backfill rows that existed before the index
+        DELETE FROM catalog_search;
+        INSERT INTO catalog_search (rowid, entity_type, entity_id, title, tags, location, description)
+            SELECT id * 10 + 1, 'guide', id, name, specialties || ',' || languages, location, description
+            FROM guides;
+        INSERT INTO catalog_search (rowid, entity_type, entity_id, title, tags, location, description)
+            SELECT id * 10 + 2, 'activity', id, title, category || ',' || coalesce(highlights, ''), location, description
+            FROM activities;
+        INSERT INTO catalog_search (rowid, entity_type, entity_id, title, tags, location, description)
+            SELECT id * 10 + 3, 'hotel', id, name, category || ',' || coalesce(amenities, ''), location, description
+            FROM hotels;
+    '''),
+    ('normalized_tags', _normalized_tags_sql()),
+    ('catalog_version', _catalog_version_sql()),
+    ('catalog_sort_indexes', '''
+        -- Keyset pagination walks these in (sort key, id) order; the
+        -- expressions must match mappers.RowMapper.sort_keys exactly.
+        CREATE INDEX IF NOT EXISTS idx_guides_rating ON guides (IFNULL(rating, 0), id);
+        CREATE INDEX IF NOT EXISTS idx_guides_price ON guides (IFNULL(price_per_day, 0), id);
+        CREATE INDEX IF NOT EXISTS idx_activities_rating ON activities (IFNULL(rating, 0), id);
+        CREATE INDEX IF NOT EXISTS idx_activities_price ON activities (IFNULL(price, 0), id);
+        CREATE INDEX IF NOT EXISTS idx_hotels_rating ON hotels (IFNULL(rating, 0), id);
+        CREATE INDEX IF NOT EXISTS idx_hotels_price ON hotels (IFNULL(price_per_night, 0), id);
+    '''),
+    ('inventory', '''
+        -- Seats, rooms or guide-days per resource and date. Rows appear the
+        -- first time a date is booked or its capacity is set; reserved
+        -- counts pending holds and confirmed bookings alike.
+        CREATE TABLE IF NOT EXISTS inventory (
+            resource_type TEXT NOT NULL,
+            resource_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            capacity INTEGER NOT NULL,
+            reserved INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (resource_type, resource_id, date),
+            CHECK (reserved >= 0 AND reserved <= capacity)
+        ) WITHOUT ROWID;
+
+        -- What a booking holds: quantity units per date from start_date for
+        -- days dates. Pending holds lapse at hold_expires_at.
+        ALTER TABLE bookings ADD COLUMN resource_type TEXT;
+        ALTER TABLE bookings ADD COLUMN resource_id INTEGER;
+        ALTER TABLE bookings ADD COLUMN start_date TEXT;
+        ALTER TABLE bookings ADD COLUMN days INTEGER;
+        ALTER TABLE bookings ADD COLUMN quantity INTEGER;
+        ALTER TABLE bookings ADD COLUMN hold_expires_at REAL;
+        CREATE INDEX IF NOT EXISTS idx_bookings_hold_expiry
+            ON bookings (hold_expires_at) WHERE status = 'pending';
+    '''),
+]
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Run every migration newer than the database's user_version"""
+    current = schema_version(conn)
+    for version, (name, sql) in enumerate(MIGRATIONS, start=1):
+        if version <= current:
+            continue
+        # executescript commits first, so each migration runs in its own
+        # transaction together with the version bump.
+        conn.executescript(f"BEGIN;\n{sql}\nPRAGMA user_version = {version};\nCOMMIT;")
+        print(f"🗄️ Applied migration {version}: {name}")
+    return schema_version(conn)
+
+def create_schema(conn: sqlite3.Connection) -> int:
+    """Create the base tables if needed and bring the schema up to date"""
+    conn.executescript(BASE_SCHEMA)
+    return apply_migrations(conn)
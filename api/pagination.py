@@ -0,0 +1,101 @@
+import base64
+import json
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from database import ConnectionPool
+from mappers import RowMapper
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+def encode_cursor(sort: str, sort_value: Any, row_id: int) -> str:
+    raw = json.dumps([sort, sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """Return (sort value, id) of the last row of the previous page"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(row_id, int):
+        raise ValueError("Cursor does not match the requested sort")
+    return sort_value, row_id
+
+def sort_key(mapper: RowMapper, sort: str) -> Tuple[str, bool]:
+    if sort not in mapper.sort_keys:
+        raise ValueError(f"Unsupported sort '{sort}'; use one of: {', '.join(mapper.sort_keys)}")
+    return mapper.sort_keys[sort]
+
+def _ordered_query(mapper: RowMapper, where: str, sort: str) -> Tuple[str, str, bool]:
+    expression, descending = sort_key(mapper, sort)
+    direction = 'DESC' if descending else 'ASC'
+    # Sort key and id run in the same direction so the keyset condition is a
+    # single row-value comparison SQLite can seek on with the sort indexes.
+    order = f"{expression} {direction}" if expression == 'id' else f"{expression} {direction}, id {direction}"
+    query = f"SELECT {', '.join(mapper.columns)}, {expression} FROM {mapper.table} WHERE 1=1{where}"
+    return query, order, descending
+
+def fetch_page(conn: sqlite3.Connection, mapper: RowMapper, where: str, params: Sequence,
+               sort: str = 'id', limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """One keyset page: {"items": [...], "next_cursor": str | None}"""
+    query, order, descending = _ordered_query(mapper, where, sort)
+    expression, _ = mapper.sort_keys[sort]
+    params = list(params)
+
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort)
+        comparison = '<' if descending else '>'
+        if expression == 'id':
+            query += f" AND id {comparison} ?"
+            params.append(row_id)
+        else:
+            # The redundant leading-key bound lets SQLite seek into the sort
+            # index; it does not seek on the row-value comparison alone.
+            query += f" AND {expression} {comparison}= ? AND ({expression}, id) {comparison} (?, ?)"
+            params.extend([sort_value, sort_value, row_id])
+
+    # Fetch one extra row to learn whether another page exists
+    rows = conn.execute(f"{query} ORDER BY {order} LIMIT ?", params + [limit + 1]).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, last[-1], last[0])
+
+    return {
+        "items": mapper.map_rows(rows),
+        "next_cursor": next_cursor,
+        "limit": limit,
+        "sort": sort
+    }
+
+def fetch_all(conn: sqlite3.Connection, mapper: RowMapper, where: str, params: Sequence,
+              sort: str = 'id') -> List[Dict]:
+    query, order, _ = _ordered_query(mapper, where, sort)
+    return mapper.map_rows(conn.execute(f"{query} ORDER BY {order}", params).fetchall())
+
+def stream_json_array(pool: ConnectionPool, mapper: RowMapper, where: str, params: Sequence,
+                      sort: str = 'id') -> Iterator[str]:
+    """Yield a JSON array chunk by chunk so memory stays flat for any result size"""
+    query, order, _ = _ordered_query(mapper, where, sort)
+    with pool.connection() as conn:
+        rows = conn.execute(f"{query} ORDER BY {order}", params)
+        yield '['
+        separator = ''
+        while True:
+            batch = rows.fetchmany(STREAM_BATCH_SIZE)
+            if not batch:
+                break
+            chunk = ','.join(
+                json.dumps(item, sort_keys=True, separators=(',', ':'))
+                for item in mapper.map_rows(batch)
+            )
+            yield separator + chunk
+            separator = ','
+        yield ']'
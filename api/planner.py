@@ -0,0 +1,415 @@
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from catalog import catalog_cache
+from database import db
+from mappers import ACTIVITY_MAPPER, HOTEL_MAPPER, TRANSPORTATION_MAPPER
+from routing import CAR_HIRE_PER_KM, road_network
+
+PLANNER_TIME_LIMIT_MS = float(os.getenv('PLANNER_TIME_LIMIT_MS', '50'))
+PLANNER_BEAM_WIDTH = int(os.getenv('PLANNER_BEAM_WIDTH', '32'))
+PLANNER_MAX_DAYS = int(os.getenv('PLANNER_MAX_DAYS', '14'))
+# Hours of sightseeing and road travel that fit in one day
+PLANNER_DAY_HOURS = float(os.getenv('PLANNER_DAY_HOURS', '10'))
+DEFAULT_START_CITY = os.getenv('PLANNER_START_CITY', 'Ranchi')
+
+# Rough trip costs in INR where neither the catalog nor the road network prices them
+ROAD_COST_PER_HOUR = 600
+MEALS_PER_DAY = 800
+DEFAULT_NIGHT_COST = 2500
+# Objective weights: an activity is worth its rating, doubled when it matches
+# an interest; every hour on the road costs TRAVEL_PENALTY of that
+INTEREST_BONUS = 2.0
+TRAVEL_PENALTY = 0.3
+
+# Places off the road network ("Various Villages") are assumed this far from anywhere
+UNKNOWN_TRAVEL_HOURS = 3.0
+
+# Trip interests (intents.INTEREST_KEYWORDS and the chatbot's) -> activity categories
+INTEREST_CATEGORIES: Dict[str, Tuple[str, ...]] = {
+    'culture': ('Art & Culture', 'Festival', 'Spiritual'),
+    'cultural': ('Art & Culture', 'Festival', 'Spiritual'),
+    'art': ('Art & Culture',),
+    'nature': ('Adventure', 'Wildlife'),
+    'adventure': ('Adventure',),
+    'wildlife': ('Wildlife',),
+    'spiritual': ('Spiritual',),
+    'festival': ('Festival',),
+    'photography': ('Adventure', 'Wildlife', 'Festival')
+}
+
+_HOURS_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*h')
+_MINUTES_PATTERN = re.compile(r'(\d+)\s*m(?!o)')
+_BUDGET_PATTERN = re.compile(
+    r'(?:₹|rs\.?|inr|budget(?: of)?)\s*(\d[\d,]*(?:\.\d+)?)\s*(k|lakh)?'
+    r'|(\d[\d,]*(?:\.\d+)?)\s*(k|lakh)?\s*(?:₹|rs\b|rupees|inr)', re.IGNORECASE)
+
+def parse_hours(duration: Optional[str], default: float = 3.0) -> float:
+    """Hours in "4 hours", "2h 15m", "Full Day" or "Half Day" """
+    text = (duration or '').lower()
+    if 'full day' in text:
+        return 8.0
+    if 'half day' in text:
+        return 4.0
+    hours = _HOURS_PATTERN.search(text)
+    minutes = _MINUTES_PATTERN.search(text)
+    if not hours and not minutes:
+        return default
+    return (float(hours.group(1)) if hours else 0.0) + (int(minutes.group(1)) / 60 if minutes else 0.0)
+
+def parse_budget(text: Optional[str]) -> Optional[float]:
+    """Trip budget in INR from "₹20,000", "15k rupees" or "budget of 2 lakh"; None if not given"""
+    match = _BUDGET_PATTERN.search(text or '')
+    if not match:
+        return None
+    amount = float((match.group(1) or match.group(3)).replace(',', ''))
+    unit = (match.group(2) or match.group(4) or '').lower()
+    return amount * {'k': 1000, 'lakh': 100000}.get(unit, 1)
+
+# Places a trip can start from; travellers from elsewhere arrive at DEFAULT_START_CITY
+TRIP_START_PLACES = frozenset(road_network.places)
+
+class TripCatalog:
+    """Activities, hotels and transport legs a plan is built from"""
+
+    def __init__(self, activities: List[Dict], hotels: List[Dict], transportation: List[Dict] = ()):
+        self.activities = [activity for activity in activities if activity.get('location')]
+        for activity in self.activities:
+            activity['hours'] = parse_hours(activity.get('duration'))
+        self.hotels: Dict[str, List[Dict]] = {}
+        for hotel in hotels:
+            self.hotels.setdefault(hotel.get('location'), []).append(hotel)
+        # Cheapest scheduled connection per (from, to) beats the road estimate
+        self.legs: Dict[Tuple[str, str], Dict] = {}
+        for leg in transportation:
+            key = (leg.get('from_location'), leg.get('to_location'))
+            if leg.get('price') is not None and (key not in self.legs or leg['price'] < self.legs[key]['price']):
+                self.legs[key] = leg
+        self._travel: Dict[Tuple[str, str], Dict] = {}
+        self._hotel_choice: Dict[Tuple[str, str], Optional[Dict]] = {}
+
+    def travel(self, origin: str, destination: str) -> Dict:
+        """Hours, cost and mode of getting from one place to another"""
+        key = (origin, destination)
+        if key not in self._travel:
+            if origin == destination:
+                leg = {'hours': 0.0, 'cost': 0.0, 'mode': None}
+            elif key in self.legs:
+                row = self.legs[key]
+                leg = {'hours': parse_hours(row.get('duration'), UNKNOWN_TRAVEL_HOURS), 'cost': float(row['price']),
+                       'mode': row.get('transport_type'), 'name': row.get('name')}
+            else:
+                road = road_network.travel(origin, destination)
+                if road is None:
+                    hours, cost = UNKNOWN_TRAVEL_HOURS, UNKNOWN_TRAVEL_HOURS * ROAD_COST_PER_HOUR
+                else:
+                    hours, cost = road[1] / 60, road[0] * CAR_HIRE_PER_KM
+                leg = {'hours': hours, 'cost': cost, 'mode': 'road'}
+            self._travel[key] = leg
+        return self._travel[key]
+
+    def hotel_for(self, city: str, style: str) -> Optional[Dict]:
+        """Hotel for a night in city: cheapest on a budget, best rated for luxury, else best value"""
+        key = (city, style)
+        if key not in self._hotel_choice:
+            self._hotel_choice[key] = self._choose_hotel(city, style)
+        return self._hotel_choice[key]
+
+    def _choose_hotel(self, city: str, style: str) -> Optional[Dict]:
+        options = self.hotels.get(city)
+        if not options:
+            return None
+        if style == 'budget':
+            return min(options, key=lambda hotel: (hotel.get('price_per_night') or 0, -(hotel.get('rating') or 0)))
+        if style == 'luxury':
+            return max(options, key=lambda hotel: (hotel.get('rating') or 0, -(hotel.get('price_per_night') or 0)))
+        return max(options, key=lambda hotel: (hotel.get('rating') or 0) - (hotel.get('price_per_night') or 0) / 2000)
+
+def load_catalog() -> TripCatalog:
+    """Catalog rows for planning, cached until the catalog changes"""
+    def loader():
+        with db.connection() as conn:
+            return TripCatalog(
+                ACTIVITY_MAPPER.fetch(conn),
+                HOTEL_MAPPER.fetch(conn),
+                TRANSPORTATION_MAPPER.fetch(conn, " AND IFNULL(availability_status, 'available') = 'available'")
+            )
+    return catalog_cache.get_or_load(('planner',), loader)
+
+class _Request:
+    __slots__ = ('days', 'categories', 'budget', 'start', 'style')
+
+    def __init__(self, days: int, interests: Sequence[str], budget: Optional[float], start: str):
+        self.days = days
+        self.categories = {category for interest in interests
+                           for category in INTEREST_CATEGORIES.get(interest.lower(), ())}
+        self.budget = budget
+        self.start = start
+        lowered = {interest.lower() for interest in interests}
+        self.style = 'luxury' if 'luxury' in lowered else 'budget' if 'budget' in lowered else 'value'
+
+class _Partial:
+    """A schedule being built: where the traveller is, on which day, and its running totals"""
+    __slots__ = ('sequence', 'day', 'used', 'city', 'activity_cost', 'transport_cost',
+                 'hotel_cost', 'travel_hours', 'value')
+
+    def __init__(self, start: str):
+        self.sequence: Tuple[int, ...] = ()
+        self.day, self.used, self.city = 1, 0.0, start
+        self.activity_cost = self.transport_cost = self.hotel_cost = 0.0
+        self.travel_hours = self.value = 0.0
+
+    def copy(self) -> '_Partial':
+        other = _Partial.__new__(_Partial)
+        other.sequence, other.day, other.used, other.city = self.sequence, self.day, self.used, self.city
+        other.activity_cost, other.transport_cost = self.activity_cost, self.transport_cost
+        other.hotel_cost, other.travel_hours, other.value = self.hotel_cost, self.travel_hours, self.value
+        return other
+
+    def key(self) -> tuple:
+        return frozenset(self.sequence), self.city, self.day, round(self.used, 2)
+
+def _new_days(request: _Request) -> List[Dict]:
+    return [{'day': number, 'items': [], 'hours': 0.0} for number in range(1, request.days + 1)]
+
+def _sleep(partial: _Partial, catalog: TripCatalog, request: _Request, days: Optional[List[Dict]]) -> bool:
+    """End the day with a night in the current city; False when the trip has no days left"""
+    if partial.day >= request.days:
+        return False
+    hotel = catalog.hotel_for(partial.city, request.style)
+    cost = hotel['price_per_night'] if hotel and hotel.get('price_per_night') else DEFAULT_NIGHT_COST
+    partial.hotel_cost += cost
+    if days is not None:
+        days[partial.day - 1]['city'] = partial.city
+        days[partial.day - 1]['hotel'] = {
+            'id': hotel.get('id') if hotel else None, 'name': hotel.get('name') if hotel else None,
+            'location': partial.city, 'cost': cost
+        }
+    partial.day, partial.used = partial.day + 1, 0.0
+    return True
+
+def _travel(partial: _Partial, destination: str, leg: Dict, days: Optional[List[Dict]]):
+    if days is not None:
+        days[partial.day - 1]['items'].append({'type': 'travel', 'from': partial.city, 'to': destination,
+                                               'mode': leg['mode'], 'hours': round(leg['hours'], 2),
+                                               'cost': leg['cost']})
+        days[partial.day - 1]['hours'] += leg['hours']
+    partial.used += leg['hours']
+    partial.transport_cost += leg['cost']
+    partial.travel_hours += leg['hours']
+    partial.city = destination
+
+def _extend(partial: _Partial, index: int, catalog: TripCatalog, request: _Request,
+            days: Optional[List[Dict]] = None) -> bool:
+    """Schedule one more activity in place; False when it doesn't fit the days or budget
+
+    It goes on the current day when the drive and the activity both fit;
+    otherwise the drive takes the evening (or a day of its own) and the
+    activity starts the next morning.
+    """
+    activity = catalog.activities[index]
+    destination = activity['location']
+    leg = catalog.travel(partial.city, destination)
+    if activity['hours'] > PLANNER_DAY_HOURS or leg['hours'] > PLANNER_DAY_HOURS:
+        return False
+
+    if partial.used + leg['hours'] + activity['hours'] > PLANNER_DAY_HOURS:
+        if not (leg['mode'] and partial.used + leg['hours'] <= PLANNER_DAY_HOURS):
+            if not _sleep(partial, catalog, request, days):
+                return False
+        if leg['mode'] and partial.used + leg['hours'] + activity['hours'] > PLANNER_DAY_HOURS:
+            _travel(partial, destination, leg, days)
+            if not _sleep(partial, catalog, request, days):
+                return False
+    if partial.city != destination:
+        _travel(partial, destination, leg, days)
+
+    if days is not None:
+        days[partial.day - 1]['items'].append({
+            'type': 'activity', 'id': activity.get('id'), 'title': activity.get('title'),
+            'category': activity.get('category'), 'location': destination,
+            'hours': activity['hours'], 'cost': activity.get('price') or 0
+        })
+        days[partial.day - 1]['hours'] += activity['hours']
+    partial.used += activity['hours']
+    partial.activity_cost += activity.get('price') or 0
+    partial.value += (activity.get('rating') or 3.0) * \
+        (INTEREST_BONUS if activity.get('category') in request.categories else 1.0)
+    partial.sequence += (index,)
+    # Costs only grow from here, so a partial plan over budget is pruned
+    return request.budget is None or \
+        partial.activity_cost + partial.transport_cost + partial.hotel_cost + MEALS_PER_DAY * request.days <= request.budget
+
+def _finish(partial: _Partial, catalog: TripCatalog, request: _Request,
+            days: Optional[List[Dict]] = None) -> Optional[Dict]:
+    """Close the trip: spare days where it ended, then the drive back to the start city on the last day"""
+    partial = partial.copy()
+    while partial.day < request.days:
+        _sleep(partial, catalog, request, days)
+    home = catalog.travel(partial.city, request.start)
+    if partial.used + home['hours'] > PLANNER_DAY_HOURS:
+        return None
+    if home['mode']:
+        _travel(partial, request.start, home, days)
+    if days is not None:
+        days[-1]['city'] = partial.city
+
+    meals = MEALS_PER_DAY * request.days
+    total = partial.activity_cost + partial.transport_cost + partial.hotel_cost + meals
+    if request.budget is not None and total > request.budget:
+        return None
+    return {
+        'sequence': partial.sequence,
+        'score': partial.value - TRAVEL_PENALTY * partial.travel_hours - total / 1e6,
+        'total': total,
+        'costs': {'activities': partial.activity_cost, 'hotels': partial.hotel_cost,
+                  'transport': partial.transport_cost, 'meals': meals}
+    }
+
+def _evaluate(sequence: Sequence[int], catalog: TripCatalog, request: _Request,
+              days: Optional[List[Dict]] = None) -> Optional[Dict]:
+    partial = _Partial(request.start)
+    for index in sequence:
+        if not _extend(partial, index, catalog, request, days):
+            return None
+    return _finish(partial, catalog, request, days)
+
+def _cut_short(deadline: float, stats: Dict) -> bool:
+    """True once the search has used up its time limit or its expansion budget"""
+    if time.perf_counter() > deadline:
+        stats['timed_out'] = True
+        return True
+    return stats['max_expanded'] is not None and stats['expanded'] >= stats['max_expanded']
+
+def _beam_search(catalog: TripCatalog, request: _Request, width: int, deadline: float, stats: Dict):
+    """Grow schedules one activity at a time, keeping the width best partial plans per round"""
+    best = _finish(_Partial(request.start), catalog, request)
+    beam = [_Partial(request.start)]
+    while beam:
+        # Keep the best partial per (activities, city, day, hours used)
+        candidates: Dict[tuple, Tuple[float, _Partial]] = {}
+        for partial in beam:
+            for index in range(len(catalog.activities)):
+                if index in partial.sequence:
+                    continue
+                if _cut_short(deadline, stats):
+                    return best
+                stats['expanded'] += 1
+                extended = partial.copy()
+                if not _extend(extended, index, catalog, request):
+                    continue
+                score = extended.value - TRAVEL_PENALTY * extended.travel_hours
+                key = extended.key()
+                if key not in candidates or score > candidates[key][0]:
+                    candidates[key] = (score, extended)
+        ranked = sorted(candidates.values(), key=lambda candidate: (-candidate[0], candidate[1].sequence))
+        beam = [partial for _, partial in ranked[:width]]
+        # Only the survivors are closed into full plans
+        for partial in beam:
+            result = _finish(partial, catalog, request)
+            if result is not None and (best is None or result['score'] > best['score']):
+                best = result
+    return best
+
+def _neighbours(sequence: Tuple[int, ...], unused: List[int]):
+    """Remove, swap, replace and insert moves around a schedule"""
+    for i in range(len(sequence)):
+        yield sequence[:i] + sequence[i + 1:]
+        for j in range(i + 1, len(sequence)):
+            swapped = list(sequence)
+            swapped[i], swapped[j] = swapped[j], swapped[i]
+            yield tuple(swapped)
+        for index in unused:
+            yield sequence[:i] + (index,) + sequence[i + 1:]
+    for index in unused:
+        for i in range(len(sequence) + 1):
+            yield sequence[:i] + (index,) + sequence[i:]
+
+def _local_search(best: Optional[Dict], catalog: TripCatalog, request: _Request, deadline: float, stats: Dict):
+    """First-improvement moves on the beam's best plan until none helps or time runs out"""
+    improved = best is not None
+    while improved:
+        improved = False
+        sequence = best['sequence']
+        unused = [index for index in range(len(catalog.activities)) if index not in sequence]
+        for candidate in _neighbours(sequence, unused):
+            if _cut_short(deadline, stats):
+                return best
+            stats['expanded'] += 1
+            result = _evaluate(candidate, catalog, request)
+            if result is not None and result['score'] > best['score'] + 1e-9:
+                best, improved = result, True
+                stats['improvements'] += 1
+                break
+    return best
+
+def plan_trip(days: int, interests: Sequence[str] = (), budget: Optional[float] = None,
+              start_city: Optional[str] = None, catalog: Optional[TripCatalog] = None,
+              time_limit_ms: float = PLANNER_TIME_LIMIT_MS, beam_width: int = PLANNER_BEAM_WIDTH,
+              max_expanded: Optional[int] = None) -> Dict[str, Any]:
+    """Day-by-day schedule from the catalog that maximises interest-weighted ratings
+
+    A greedy pass, beam search over activity orders, then local search, all within
+    time_limit_ms and at most max_expanded schedule expansions; a search that
+    isn't cut short by the time limit always gives the same plan for the same
+    inputs and catalog.
+    """
+    started = time.perf_counter()
+    deadline = started + time_limit_ms / 1000
+    catalog = catalog or load_catalog()
+    request = _Request(max(1, min(int(days), PLANNER_MAX_DAYS)), list(interests), budget,
+                       start_city or DEFAULT_START_CITY)
+    stats = {'expanded': 0, 'improvements': 0, 'timed_out': False, 'max_expanded': max_expanded}
+
+    # A greedy pass (width 1) first, so a search cut short still has a full plan
+    best = None
+    for width in (1, beam_width):
+        result = _beam_search(catalog, request, width, deadline, stats)
+        if result is not None and (best is None or result['score'] > best['score']):
+            best = result
+    best = _local_search(best, catalog, request, deadline, stats)
+    if best is None:
+        # Even a stay without activities is over budget; report what it costs
+        request.budget = None
+        best = _evaluate((), catalog, request)
+
+    days_out = _new_days(request)
+    _evaluate(best['sequence'], catalog, request, days_out)
+    for entry in days_out:
+        entry['hours'] = round(entry['hours'], 2)
+    return {
+        'days': days_out,
+        'start_city': request.start,
+        'interests': list(interests),
+        'budget': budget,
+        'total_cost': round(best['total'], 2),
+        'cost_breakdown': {name: round(cost, 2) for name, cost in best['costs'].items()},
+        'currency': 'INR',
+        'within_budget': budget is None or best['total'] <= budget,
+        'search': {
+            'expanded': stats['expanded'],
+            'improvements': stats['improvements'],
+            'timed_out': stats['timed_out'],
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+    }
+
+def describe_plan(plan: Dict[str, Any]) -> str:
+    """Plain-text itinerary, used when the plan can't be phrased by the LLM"""
+    lines = [f"Your {len(plan['days'])}-day Jharkhand itinerary from {plan['start_city']}:"]
+    for entry in plan['days']:
+        parts = []
+        for item in entry['items']:
+            if item['type'] == 'activity':
+                parts.append(f"{item['title']} in {item['location']} ({item['hours']:g}h, ₹{item['cost']:,.0f})")
+            else:
+                parts.append(f"travel {item['from']} → {item['to']} by {item['mode']} (~{round(item['hours'], 1):g}h)")
+        line = f"Day {entry['day']}: " + ('; '.join(parts) if parts else f"free day in {entry['city']}")
+        if entry.get('hotel'):
+            line += f". Stay: {entry['hotel']['name'] or 'a local guesthouse'} in {entry['hotel']['location']}"
+        lines.append(line + '.')
+    lines.append(f"Estimated total: ₹{plan['total_cost']:,.0f}"
+                 + ('' if plan['within_budget'] else ' (over your budget)') + '.')
+    return '\n'.join(lines)
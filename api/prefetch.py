@@ -0,0 +1,125 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ai_agent import ai_agent
+from external_apis import external_api, ExternalAPIIntegrator
+
+# Re-warm every interval (keep it below WEATHER_CACHE_TTL so entries never go
+# stale), +/- PREFETCH_JITTER of it so restarts don't synchronise upstream load
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'true').lower() == 'true'
+PREFETCH_INTERVAL_SECONDS = float(os.getenv('PREFETCH_INTERVAL_SECONDS', '300'))
+PREFETCH_JITTER = float(os.getenv('PREFETCH_JITTER', '0.1'))
+# Each task also starts after a random delay up to this, spreading a cycle's calls
+PREFETCH_SPREAD_SECONDS = float(os.getenv('PREFETCH_SPREAD_SECONDS', '2'))
+PREFETCH_CONCURRENCY = int(os.getenv('PREFETCH_CONCURRENCY', '4'))
+
+class PrefetchScheduler:
+    """Background thread that keeps external API caches warm for known destinations"""
+
+    def __init__(self, integrator: ExternalAPIIntegrator, locations: List[str],
+                 interval: float = PREFETCH_INTERVAL_SECONDS, jitter: float = PREFETCH_JITTER,
+                 spread: float = PREFETCH_SPREAD_SECONDS, concurrency: int = PREFETCH_CONCURRENCY):
+        self.integrator = integrator
+        self.locations = locations
+        self.interval = interval
+        self.jitter = jitter
+        self.spread = spread
+        self.concurrency = concurrency
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._running = False
+        self._cycles = 0
+        self._next_run_at: Optional[float] = None
+        self._last_run: Optional[Dict[str, Any]] = None
+
+    def tasks(self) -> List[Tuple[str, tuple]]:
+        """(source, arguments) for every lookup the cycle warms"""
+        tasks = []
+        for location in self.locations:
+            tasks += [('weather', (location,)), ('safety_alerts', (location,)), ('local_events', (location, '30'))]
+        return tasks
+
+    def start(self) -> 'PrefetchScheduler':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='prefetch', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_now(self):
+        """Start a cycle without waiting for the interval"""
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            self.run_once()
+            delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            with self._lock:
+                self._next_run_at = time.time() + delay
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def run_once(self) -> Dict[str, Any]:
+        """Warm every task with at most `concurrency` upstream calls at a time"""
+        with self._lock:
+            self._running = True
+            self._next_run_at = None
+        started = time.time()
+        tasks = self.tasks()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='prefetch') as pool:
+            outcomes = list(pool.map(self._warm, tasks))
+
+        by_source: Dict[str, Dict[str, int]] = {}
+        for (source, _), outcome in zip(tasks, outcomes):
+            counts = by_source.setdefault(source, {"ok": 0, "unavailable": 0, "failed": 0})
+            counts[outcome] += 1
+        run = {
+            "started_at": datetime.fromtimestamp(started).isoformat(),
+            "duration_seconds": round(time.time() - started, 3),
+            "tasks": len(tasks),
+            "sources": by_source
+        }
+        with self._lock:
+            self._running = False
+            self._cycles += 1
+            self._last_run = run
+        print(f"🔥 Prefetched {len(tasks)} external API lookups in {run['duration_seconds']}s")
+        return run
+
+    def _warm(self, task: Tuple[str, tuple]) -> str:
+        source, args = task
+        if self._stopped.wait(random.uniform(0, self.spread)):
+            return "failed"
+        try:
+            return "ok" if self.integrator.refresh(source, *args) else "unavailable"
+        except Exception as e:
+            print(f"⚠️ Prefetch {source}{args} failed: {e}")
+            return "failed"
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self._thread is not None and not self._stopped.is_set(),
+                "running": self._running,
+                "cycles": self._cycles,
+                "interval_seconds": self.interval,
+                "jitter": self.jitter,
+                "concurrency": self.concurrency,
+                "locations": self.locations,
+                "next_run_at": datetime.fromtimestamp(self._next_run_at).isoformat() if self._next_run_at else None,
+                "last_run": self._last_run
+            }
+
+prefetcher = PrefetchScheduler(external_api, ai_agent.agent_context["knowledge_base"]["locations"])
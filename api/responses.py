@@ -0,0 +1,62 @@
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+COMPRESSION_MIN_BYTES = 1024
+
+class PreparedResponse:
+    """A JSON payload serialized once, with its ETag and compressed variants"""
+
+    __slots__ = ('body', 'etag', 'variants')
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+        self.variants: Dict[str, bytes] = {}
+        if len(body) >= COMPRESSION_MIN_BYTES:
+            self.variants['gzip'] = gzip.compress(body, compresslevel=6)
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(body, quality=5)
+
+def prepare_json(data: Any, version: Optional[int] = None) -> PreparedResponse:
+    """Serialize data and derive a strong ETag from the catalog version and body"""
+    body = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+    return PreparedResponse(body, f"v{version}-{digest}" if version is not None else digest)
+
+def _choose_encoding(prepared: PreparedResponse) -> Optional[str]:
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in prepared.variants and accepted[encoding]:
+            return encoding
+    return None
+
+def send_prepared(prepared: PreparedResponse) -> Response:
+    """Serve a PreparedResponse, answering If-None-Match with 304 Not Modified"""
+    encoding = _choose_encoding(prepared)
+    # Each encoding is a distinct representation, so it gets its own strong
+    # ETag; a client holding any of them for this payload is up to date.
+    etag = f"{prepared.etag}-{encoding}" if encoding else prepared.etag
+    known_etags = [prepared.etag] + [f"{prepared.etag}-{name}" for name in prepared.variants]
+
+    if any(request.if_none_match.contains_weak(tag) for tag in known_etags):
+        response = Response(status=304)
+    else:
+        body = prepared.variants[encoding] if encoding else prepared.body
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
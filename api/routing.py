@@ -0,0 +1,302 @@
+import hashlib
+import heapq
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Precomputed all-pairs matrix; rebuilt whenever the road graph below changes.
+# Saved to this file when set; empty (the default) keeps it in memory only.
+ROUTE_MATRIX_PATH = os.getenv('ROUTE_MATRIX_PATH', '')
+
+# Average speeds per road kind, used to turn distances into driving times
+SPEED_KMPH: Dict[str, float] = {'highway': 55, 'state': 40, 'local': 30, 'hill': 28}
+# Rough car running costs and hired-car fares in INR
+FUEL_COST_PER_KM = 7.0
+HIGHWAY_TOLL_PER_KM = 1.5
+CAR_HIRE_PER_KM = 12.0
+
+# Road links between Jharkhand towns and attractions: (place, place, km, road kind).
+# Distances are approximate road distances; routes between places not linked
+# directly go through the towns in between.
+ROAD_EDGES: List[Tuple[str, str, float, str]] = [
+    ('Ranchi', 'Ramgarh', 45, 'highway'),
+    ('Ramgarh', 'Hazaribagh', 50, 'highway'),
+    ('Ranchi', 'Patratu', 40, 'hill'),
+    ('Ramgarh', 'Patratu', 30, 'state'),
+    ('Ramgarh', 'Rajrappa', 28, 'local'),
+    ('Ramgarh', 'Bokaro', 75, 'highway'),
+    ('Bokaro', 'Dhanbad', 42, 'highway'),
+    ('Dhanbad', 'Giridih', 80, 'state'),
+    ('Giridih', 'Madhuban', 30, 'hill'),
+    ('Hazaribagh', 'Giridih', 105, 'state'),
+    ('Hazaribagh', 'Koderma', 60, 'highway'),
+    ('Koderma', 'Tilaiya Dam', 15, 'local'),
+    ('Koderma', 'Giridih', 80, 'state'),
+    ('Hazaribagh', 'Chatra', 60, 'state'),
+    ('Giridih', 'Deoghar', 110, 'state'),
+    ('Dhanbad', 'Jamtara', 60, 'state'),
+    ('Jamtara', 'Deoghar', 80, 'state'),
+    ('Deoghar', 'Dumka', 65, 'state'),
+    ('Dumka', 'Massanjore', 30, 'local'),
+    ('Dumka', 'Godda', 70, 'state'),
+    ('Dumka', 'Pakur', 80, 'state'),
+    ('Pakur', 'Sahibganj', 75, 'state'),
+    ('Godda', 'Sahibganj', 85, 'state'),
+    ('Ranchi', 'Khunti', 40, 'highway'),
+    ('Khunti', 'Chaibasa', 110, 'state'),
+    ('Ranchi', 'Dassam Falls', 40, 'state'),
+    ('Ranchi', 'Hundru Falls', 45, 'local'),
+    ('Ranchi', 'Jonha Falls', 40, 'local'),
+    ('Ranchi', 'Jamshedpur', 130, 'highway'),
+    ('Jamshedpur', 'Dalma', 30, 'hill'),
+    ('Jamshedpur', 'Saraikela', 35, 'state'),
+    ('Jamshedpur', 'Chaibasa', 60, 'state'),
+    ('Jamshedpur', 'Ghatshila', 45, 'highway'),
+    ('Ranchi', 'Lohardaga', 75, 'state'),
+    ('Lohardaga', 'Gumla', 55, 'state'),
+    ('Ranchi', 'Gumla', 95, 'highway'),
+    ('Gumla', 'Simdega', 75, 'state'),
+    ('Lohardaga', 'Netarhat', 85, 'hill'),
+    ('Gumla', 'Netarhat', 90, 'hill'),
+    ('Netarhat', 'Mahuadanr', 45, 'hill'),
+    ('Mahuadanr', 'Lodh Falls', 15, 'local'),
+    ('Mahuadanr', 'Betla', 70, 'hill'),
+    ('Netarhat', 'Latehar', 65, 'hill'),
+    ('Ranchi', 'Latehar', 100, 'highway'),
+    ('Latehar', 'Betla', 70, 'state'),
+    ('Betla', 'Daltonganj', 25, 'state'),
+    ('Latehar', 'Daltonganj', 75, 'highway')
+]
+
+# Other names travellers and the catalog use for the same places
+PLACE_ALIASES: Dict[str, str] = {
+    'Medininagar': 'Daltonganj',
+    'Palamu': 'Daltonganj',
+    'Baidyanath Dham': 'Deoghar',
+    'Babadham': 'Deoghar',
+    'Parasnath': 'Madhuban',
+    'Betla National Park': 'Betla',
+    'Tatanagar': 'Jamshedpur',
+    'Tata': 'Jamshedpur',
+    'Dalma Wildlife Sanctuary': 'Dalma',
+    'Patratu Valley': 'Patratu',
+    'Tilaiya': 'Tilaiya Dam',
+    'Massanjore Dam': 'Massanjore',
+    'Dassam': 'Dassam Falls',
+    'Hundru': 'Hundru Falls',
+    'Jonha': 'Jonha Falls',
+    'Lodh': 'Lodh Falls'
+}
+
+def _format_minutes(minutes: float) -> str:
+    hours, rest = divmod(int(round(minutes)), 60)
+    if not hours:
+        return f"{rest} minutes"
+    return f"{hours} hour{'s' if hours != 1 else ''} {rest} minutes" if rest else f"{hours} hour{'s' if hours != 1 else ''}"
+
+class RoadNetwork:
+    """Fastest road routes between every pair of places, precomputed once and cached on disk
+
+    The matrix (driving minutes, kilometres and the previous stop on each
+    fastest path) comes from one Dijkstra run per place. Lookups are list
+    indexing; `route` also walks the previous stops to list the waypoints.
+    """
+
+    def __init__(self, edges: Sequence[Tuple[str, str, float, str]] = ROAD_EDGES,
+                 aliases: Optional[Dict[str, str]] = None, cache_path: Optional[str] = ROUTE_MATRIX_PATH):
+        self.edges = list(edges)
+        self.places = sorted({place for a, b, _, _ in self.edges for place in (a, b)})
+        self._index = {place: i for i, place in enumerate(self.places)}
+        self._names = {place.lower(): place for place in self.places}
+        for alias, place in (PLACE_ALIASES if aliases is None else aliases).items():
+            if place in self._index:
+                self._names[alias.lower()] = place
+        self._links: Dict[Tuple[int, int], Tuple[float, float, str]] = {}
+        for a, b, km, kind in self.edges:
+            minutes = km / SPEED_KMPH[kind] * 60
+            for i, j in ((self._index[a], self._index[b]), (self._index[b], self._index[a])):
+                if (i, j) not in self._links or minutes < self._links[(i, j)][1]:
+                    self._links[(i, j)] = (km, minutes, kind)
+        self.cache_path = cache_path
+        self._matrix: Optional[Dict[str, List[List[float]]]] = None
+        self._lock = threading.Lock()
+        self.source: Optional[str] = None
+        self.build_ms: Optional[float] = None
+
+    def fingerprint(self) -> str:
+        """Changes whenever the graph or speeds do, so a stale matrix file is ignored"""
+        body = json.dumps([sorted(self.edges), sorted(SPEED_KMPH.items())]).encode('utf-8')
+        return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+    def _ensure(self) -> Dict[str, List[List[float]]]:
+        if self._matrix is None:
+            with self._lock:
+                if self._matrix is None:
+                    started = time.perf_counter()
+                    matrix = self._load()
+                    self.source = 'disk'
+                    if matrix is None:
+                        matrix = self._compute()
+                        self.source = 'computed'
+                        self._save(matrix)
+                    self.build_ms = round((time.perf_counter() - started) * 1000, 2)
+                    self._matrix = matrix
+        return self._matrix
+
+    def _compute(self) -> Dict[str, List[List[float]]]:
+        """Dijkstra by driving minutes from every place"""
+        count = len(self.places)
+        neighbours: List[List[Tuple[int, float, float]]] = [[] for _ in range(count)]
+        for (i, j), (km, minutes, _) in self._links.items():
+            neighbours[i].append((j, km, minutes))
+
+        all_minutes, all_km, all_prev = [], [], []
+        for source in range(count):
+            minutes = [float('inf')] * count
+            km = [float('inf')] * count
+            prev = [-1] * count
+            minutes[source] = km[source] = 0.0
+            heap = [(0.0, 0.0, source)]
+            while heap:
+                time_so_far, distance, place = heapq.heappop(heap)
+                if time_so_far > minutes[place]:
+                    continue
+                for nxt, leg_km, leg_minutes in neighbours[place]:
+                    candidate = (time_so_far + leg_minutes, distance + leg_km)
+                    if candidate < (minutes[nxt], km[nxt]):
+                        minutes[nxt], km[nxt] = candidate
+                        prev[nxt] = place
+                        heapq.heappush(heap, (candidate[0], candidate[1], nxt))
+            all_minutes.append([round(value, 1) if value != float('inf') else None for value in minutes])
+            all_km.append([round(value, 1) if value != float('inf') else None for value in km])
+            all_prev.append(prev)
+        return {'minutes': all_minutes, 'km': all_km, 'prev': all_prev}
+
+    def _load(self) -> Optional[Dict[str, List[List[float]]]]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable route matrix {self.cache_path}: {e}")
+            return None
+        if data.get('fingerprint') != self.fingerprint() or data.get('places') != self.places:
+            return None
+        return {'minutes': data['minutes'], 'km': data['km'], 'prev': data['prev']}
+
+    def _save(self, matrix: Dict[str, List[List[float]]]):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.route_matrix.')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': self.fingerprint(), 'places': self.places, **matrix}, f)
+            os.replace(temp_path, self.cache_path)
+            print(f"🗺️ Saved route matrix for {len(self.places)} places to {self.cache_path}")
+        except OSError as e:
+            print(f"⚠️ Could not save route matrix: {e}")
+
+    def resolve(self, name: Optional[str]) -> Optional[str]:
+        """Canonical place name for a name or alias, any case; None if the place is unknown"""
+        return self._names.get(name.strip().lower()) if name else None
+
+    def travel(self, origin: str, destination: str) -> Optional[Tuple[float, float]]:
+        """(km, minutes) of the fastest road route, or None when either place is unknown"""
+        origin, destination = self.resolve(origin), self.resolve(destination)
+        if origin is None or destination is None:
+            return None
+        matrix = self._ensure()
+        i, j = self._index[origin], self._index[destination]
+        if matrix['minutes'][i][j] is None:
+            return None
+        return matrix['km'][i][j], matrix['minutes'][i][j]
+
+    def route(self, origin: str, destination: str) -> Optional[Dict[str, Any]]:
+        """Fastest road route with its legs, or None when either place is unknown or unreachable"""
+        start, end = self.resolve(origin), self.resolve(destination)
+        if start is None or end is None:
+            return None
+        matrix = self._ensure()
+        i, j = self._index[start], self._index[end]
+        if matrix['minutes'][i][j] is None:
+            return None
+
+        stops = [j]
+        while stops[-1] != i:
+            stops.append(matrix['prev'][i][stops[-1]])
+        stops.reverse()
+        legs = []
+        for a, b in zip(stops, stops[1:]):
+            km, minutes, kind = self._links[(a, b)]
+            legs.append({'from': self.places[a], 'to': self.places[b], 'distance_km': km,
+                         'duration_minutes': round(minutes, 1), 'road': kind})
+        return {
+            'from': start,
+            'to': end,
+            'distance_km': matrix['km'][i][j],
+            'duration_minutes': matrix['minutes'][i][j],
+            'path': [self.places[stop] for stop in stops],
+            'legs': legs
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'places': len(self.places),
+            'links': len(self.edges),
+            'loaded': self._matrix is not None,
+            'source': self.source,
+            'build_ms': self.build_ms,
+            'cache_path': self.cache_path or None
+        }
+
+def route_summary(route: Dict[str, Any]) -> Dict[str, Any]:
+    """A road route in the route-info shape: readable distance, time, costs and waypoints"""
+    highway_km = sum(leg['distance_km'] for leg in route['legs'] if leg['road'] == 'highway')
+    waypoints, covered = [], 0.0
+    for leg in route['legs'][:-1]:
+        covered += leg['distance_km']
+        waypoints.append({'name': leg['to'], 'distance': f"{covered:g} km"})
+    hill_km = sum(leg['distance_km'] for leg in route['legs'] if leg['road'] == 'hill')
+    return {
+        **route,
+        'distance': f"{route['distance_km']:g} km",
+        'estimated_time': _format_minutes(route['duration_minutes']),
+        'route_type': 'fastest',
+        'toll_cost': f"₹{highway_km * HIGHWAY_TOLL_PER_KM:,.0f}",
+        'fuel_cost': f"₹{route['distance_km'] * FUEL_COST_PER_KM:,.0f}",
+        'waypoints': waypoints,
+        'road_conditions': 'Winding hill roads on part of the way' if hill_km else 'Good'
+    }
+
+def road_option(from_location: str, to_location: str) -> Optional[Dict[str, Any]]:
+    """A hired car for the trip, shaped like a transportation row; None when there's no road route"""
+    # Aliases of one place ("Tata", "Jamshedpur") are not a trip
+    origin, destination = road_network.resolve(from_location), road_network.resolve(to_location)
+    route = road_network.route(origin, destination) if origin and origin != destination else None
+    if route is None:
+        return None
+    hours, minutes = divmod(int(round(route['duration_minutes'])), 60)
+    via = route['path'][1:-1]
+    return {
+        'id': None,
+        'transport_type': 'road',
+        'name': 'Private car' + (f" via {', '.join(via)}" if via else ''),
+        'from_location': from_location,
+        'to_location': to_location,
+        'departure_time': None,
+        'arrival_time': None,
+        'duration': f"{hours}h {minutes:02d}m",
+        'price': round(route['distance_km'] * CAR_HIRE_PER_KM),
+        'class_type': 'Private car',
+        'availability_status': 'available',
+        'distance_km': route['distance_km'],
+        'path': route['path']
+    }
+
+# Shared network; the matrix is loaded or computed on first lookup
+road_network = RoadNetwork()
@@ -0,0 +1,53 @@
+import re
+import sqlite3
+from typing import Dict, List, Optional
+
+# bm25 column weights, in catalog_search column order:
+# entity_type, entity_id, title, tags, location, description
+SEARCH_WEIGHTS = (0.0, 0.0, 10.0, 5.0, 3.0, 1.0)
+SEARCH_ENTITY_TYPES = ('guide', 'activity', 'hotel')
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+_SEARCH_QUERY = f'''
+    SELECT entity_type, entity_id, title, location,
+           snippet(catalog_search, 5, '[', ']', '…', 12) AS snippet,
+           bm25(catalog_search, {', '.join(str(w) for w in SEARCH_WEIGHTS)}) AS score
+    FROM catalog_search
+    WHERE catalog_search MATCH ?
+'''
+
+def build_match_query(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query where every word is a prefix term"""
+    tokens = _TOKEN_PATTERN.findall(text or '')
+    if not tokens:
+        return None
+    # Quoting each token keeps FTS5 operators in user input from being parsed
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def search_catalog(conn: sqlite3.Connection, text: str, entity_type: Optional[str] = None,
+                   limit: int = 20) -> List[Dict]:
+    """Ranked full-text search over guides, activities and hotels"""
+    match_query = build_match_query(text)
+    if match_query is None:
+        return []
+
+    query = _SEARCH_QUERY
+    params = [match_query]
+    if entity_type in SEARCH_ENTITY_TYPES:
+        query += " AND entity_type = ?"
+        params.append(entity_type)
+    query += " ORDER BY score LIMIT ?"
+    params.append(limit)
+
+    return [
+        {
+            "type": row[0],
+            "id": row[1],
+            "title": row[2],
+            "location": row[3],
+            "snippet": row[4],
+            "score": round(-row[5], 4)
+        }
+        for row in conn.execute(query, params)
+    ]
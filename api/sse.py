@@ -0,0 +1,15 @@
+import json
+from typing import Any, Iterator
+
+from flask import Response
+
+def sse_event(event: str, data: Any) -> str:
+    """One Server-Sent Events frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(events: Iterator[str]) -> Response:
+    """Stream SSE frames as they are produced, with proxy buffering disabled"""
+    response = Response(events, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,19 @@
+from typing import List, Tuple
+
+from migrations import TAG_SOURCES
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def tag_filter(table: str, kind: str, value: str) -> Tuple[str, List]:
+    """WHERE fragment keeping rows that have a tag starting with value"""
+    join_table, fk, _ = TAG_SOURCES[table]
+    # tags.name is NOCASE, so this prefix LIKE is answered from the
+    # (kind, name) index and the join table's (tag_id, fk) index.
+    sql = f'''
+        AND id IN (
+            SELECT jt.{fk} FROM tags t
+            JOIN {join_table} jt ON jt.tag_id = t.id
+            WHERE t.kind = ? AND t.name LIKE ? ESCAPE '\\'
+        )'''
+    return sql, [kind, _escape_like(value) + '%']
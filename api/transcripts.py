@@ -0,0 +1,165 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import ConnectionPool, db
+
+TRANSCRIPT_BATCH_SIZE = int(os.getenv('TRANSCRIPT_BATCH_SIZE', '50'))
+TRANSCRIPT_FLUSH_INTERVAL_MS = float(os.getenv('TRANSCRIPT_FLUSH_INTERVAL_MS', '200'))
+TRANSCRIPT_QUEUE_SIZE = int(os.getenv('TRANSCRIPT_QUEUE_SIZE', '10000'))
+
+INSERT_SQL = '''
+    INSERT INTO chat_messages (session_id, user_message, ai_response, context_data, created_at)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+# Queued after the last transcript on shutdown to stop the writer thread
+_STOP = object()
+
+class TranscriptWriter:
+    """Background writer that group-commits chat transcripts to chat_messages"""
+
+    def __init__(self, pool: ConnectionPool, batch_size: int = TRANSCRIPT_BATCH_SIZE,
+                 flush_interval_ms: float = TRANSCRIPT_FLUSH_INTERVAL_MS,
+                 max_queue: int = TRANSCRIPT_QUEUE_SIZE):
+        self._pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_error: Optional[str] = None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name='transcript-writer', daemon=True)
+                self._thread.start()
+
+    def record(self, session_id: str, user_message: str, ai_response: str,
+               context_data: Dict[str, Any]) -> bool:
+        """Queue one chat turn without blocking; False if it had to be dropped"""
+        if self._thread is None:
+            self._start()
+        if self._closed:
+            self._count_drop()
+            return False
+
+        # Stamp the turn now so batching delay doesn't shift created_at
+        created_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        row = (session_id, user_message, ai_response, json.dumps(context_data), created_at)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._count_drop()
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _count_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def _collect_batch(self, first: tuple) -> Tuple[List[tuple], bool]:
+        """Gather up to batch_size rows, waiting at most flush_interval after the first"""
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                row = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if row is _STOP:
+                self._queue.task_done()
+                return batch, True
+            batch.append(row)
+        return batch, False
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                self._queue.task_done()
+                break
+
+            batch, stopping = self._collect_batch(first)
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if stopping:
+                break
+
+    def _write(self, batch: List[tuple]):
+        try:
+            with self._pool.connection() as conn:
+                conn.executemany(INSERT_SQL, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            self.last_error = str(e)
+            print(f"❌ Failed to write {len(batch)} chat transcripts: {e}")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued transcript is committed; False on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Stop accepting transcripts, write out the queue and stop the thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print("⚠️ Transcript queue did not drain before shutdown")
+            return
+        thread.join(timeout)
+        if thread.is_alive():
+            print(f"⚠️ Transcript writer still busy after {timeout}s; {self._queue.qsize()} rows pending")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches,
+            'avg_batch_size': round(self.written / self.batches, 2) if self.batches else 0.0,
+            'batch_size': self.batch_size,
+            'flush_interval_ms': self.flush_interval * 1000,
+            'last_error': self.last_error
+        }
+
+# Shared writer used by the chat routes; flushed when the process exits
+transcript_writer = TranscriptWriter(db)
+atexit.register(transcript_writer.close)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Concurrent POST /api/bookings calls against scarce inventory (api/inventory.py)
+on a seeded database:
+
+- waves of bookings from many threads for a few seats, rooms and guide-days
+  over overlapping date spans; every reply is 200 or 409, never a 500 from a
+  locked database
+- after each wave no date is oversold, and every date's reserved count equals
+  the units held by its pending and confirmed bookings
+- lapsed holds go back on sale, and concurrent confirm/cancel calls keep the
+  counts consistent
+
+Exits non-zero on any violation.
+
+Usage: python scripts/bench_booking_contention.py [bookings per wave] [threads]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, '..', 'api'))
+
+START = date(2026, 12, 20)
+# (booking_type, item_id, capacity per date, most days per booking, most units per booking)
+RESOURCES = [
+    ('transportation', 1, 30, 1, 4),
+    ('transportation', 2, 8, 1, 2),
+    ('hotel', 1, 5, 4, 2),
+    ('guide', 1, 1, 3, 1)
+]
+SPAN_DAYS = 6
+
+def booking_request(rng, number):
+    booking_type, item_id, _, most_days, most_units = rng.choice(RESOURCES)
+    return {
+        'user': {'name': f"Traveller {number % 50}", 'email': f"traveller{number % 50}@example.com"},
+        'booking_type': booking_type,
+        'booking_data': {
+            'item_id': item_id,
+            'date': (START + timedelta(days=rng.randrange(SPAN_DAYS))).isoformat(),
+            'days': rng.randint(1, most_days),
+            'quantity': rng.randint(1, most_units)
+        },
+        'total_amount': 1000
+    }
+
+def run_wave(app, requests, threads):
+    """POST every request from a pool of threads; returns [(status, booking id, ms)]"""
+    local = threading.local()
+
+    def post(body):
+        client = getattr(local, 'client', None) or app.test_client()
+        local.client = client
+        start = time.perf_counter()
+        response = client.post('/api/bookings', json=body)
+        elapsed = (time.perf_counter() - start) * 1000
+        return response.status_code, (response.get_json() or {}).get('booking_id'), elapsed
+
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(post, requests))
+
+def consistency_failures(db, label):
+    """Oversold dates and dates whose reserved count differs from their live bookings"""
+    failures = []
+    with db.connection() as conn:
+        held = Counter()
+        for resource_type, resource_id, start, days, quantity in conn.execute('''
+            SELECT resource_type, resource_id, start_date, days, quantity FROM bookings
+            WHERE status IN ('pending', 'confirmed') AND resource_type IS NOT NULL
+        '''):
+            first = date.fromisoformat(start)
+            for offset in range(days):
+                held[(resource_type, resource_id, (first + timedelta(days=offset)).isoformat())] += quantity
+        for resource_type, resource_id, day, capacity, reserved in conn.execute(
+                'SELECT resource_type, resource_id, date, capacity, reserved FROM inventory'):
+            key = (resource_type, resource_id, day)
+            if reserved > capacity:
+                failures.append(f"{label}: {key} oversold, {reserved} of {capacity}")
+            units = held.pop(key, 0)
+            if reserved != units:
+                failures.append(f"{label}: {key} reserved {reserved} but bookings hold {units}")
+        failures.extend(f"{label}: {key} held without an inventory row" for key, units in held.items() if units)
+    return failures
+
+def report(label, results, elapsed):
+    statuses = Counter(status for status, _, _ in results)
+    timings = sorted(ms for _, _, ms in results)
+    print(f"{label:<22}{len(results):>7}{statuses[200]:>7}{statuses[409]:>7}"
+          f"{sum(count for status, count in statuses.items() if status not in (200, 409)):>7}"
+          f"{len(results) / elapsed:>9.0f}{statistics.median(timings):>9.2f}{timings[int(len(timings) * 0.95)]:>9.2f}")
+    return [f"{label}: HTTP {status} x{count}" for status, count in statuses.items() if status not in (200, 409)]
+
+if __name__ == "__main__":
+    per_wave = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    os.environ.update({
+        'OPENAI_API_KEY': 'unused',
+        'LLM_CACHE_PATH': '',
+        'ROUTE_MATRIX_PATH': '',
+        'PREFETCH_ENABLED': 'false',
+        'PRORAAHI_DB_PATH': os.path.join(tempfile.mkdtemp(), 'bookings.db')
+    })
+
+    from app import app
+    from database import db
+    with db.connection() as conn:
+        with open(os.path.join(SCRIPTS_DIR, 'seed_database.sql')) as file:
+            conn.executescript(file.read())
+
+    client = app.test_client()
+    for booking_type, item_id, capacity, _, _ in RESOURCES:
+        response = client.put('/api/admin/inventory', json={
+            'type': booking_type, 'item_id': item_id, 'date': START.isoformat(),
+            'days': SPAN_DAYS + 4, 'capacity': capacity
+        })
+        assert response.status_code == 200, response.get_json()
+
+    rng = random.Random(5)
+    failures = []
+    print(f"{per_wave} bookings per wave from {threads} threads, pool of {db.size} connections\n")
+    print(f"{'wave':<22}{'calls':>7}{'200':>7}{'409':>7}{'other':>7}{'calls/s':>9}{'p50 ms':>9}{'p95 ms':>9}")
+
+    # Wave 1: everything is sold out long before the wave ends
+    start = time.perf_counter()
+    results = run_wave(app, [booking_request(rng, i) for i in range(per_wave)], threads)
+    failures += report('holds', results, time.perf_counter() - start)
+    failures += consistency_failures(db, 'holds')
+    booked = [booking_id for status, booking_id, _ in results if status == 200]
+
+    # Lapse half of the holds: the next wave can take those units again
+    lapsed = booked[::2]
+    with db.connection() as conn:
+        conn.executemany('UPDATE bookings SET hold_expires_at = 0 WHERE id = ?', [(i,) for i in lapsed])
+    start = time.perf_counter()
+    results = run_wave(app, [booking_request(rng, i) for i in range(per_wave)], threads)
+    failures += report('after expiry', results, time.perf_counter() - start)
+    failures += consistency_failures(db, 'after expiry')
+    with db.connection() as conn:
+        still_pending = conn.execute(
+            f"SELECT COUNT(*) FROM bookings WHERE status = 'pending' AND id IN ({', '.join('?' * len(lapsed))})",
+            lapsed).fetchone()[0] if lapsed else 0
+    if still_pending:
+        failures.append(f"after expiry: {still_pending} lapsed holds are still pending")
+    if not any(status == 200 for status, _, _ in results):
+        failures.append("after expiry: no lapsed units were booked again")
+
+    # Confirm or cancel every live booking while new bookings keep arriving
+    with db.connection() as conn:
+        live = [row[0] for row in conn.execute("SELECT id FROM bookings WHERE status = 'pending'")]
+    local = threading.local()
+
+    def settle(booking_id):
+        client = getattr(local, 'client', None) or app.test_client()
+        local.client = client
+        action = 'confirm' if booking_id % 3 else 'cancel'
+        started = time.perf_counter()
+        status = client.post(f'/api/bookings/{booking_id}/{action}').status_code
+        return status, booking_id, (time.perf_counter() - started) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        settled = pool.map(settle, live)
+        results = run_wave(app, [booking_request(rng, i) for i in range(per_wave // 2)], threads // 2 or 1)
+        settled = list(settled)
+    failures += report('confirm/cancel', settled, time.perf_counter() - start)
+    failures += report('  with new bookings', results, time.perf_counter() - start)
+    failures += consistency_failures(db, 'confirm/cancel')
+
+    with db.connection() as conn:
+        counts = dict(conn.execute('SELECT status, COUNT(*) FROM bookings GROUP BY status').fetchall())
+    print(f"\nbookings by status: {counts}")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures[:20]))
+        sys.exit(1)
+    print("\n✅ no date oversold and inventory matches the live bookings after every wave")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Connection search (api/connections.py) on synthetic daily timetables:
+
+- correctness: on a small timetable, the journeys found for every pair of
+  stops equal the Pareto set (arrival, price, transfers) of all journeys
+  enumerated by brute force
+- latency: random queries against timetables of growing size, searching
+  journeys that arrive within JOURNEY_ARRIVAL_SLACK_MINUTES of the earliest
+- the seeded catalog finds Mumbai -> Jamshedpur through Ranchi
+
+Exits non-zero on any mismatch.
+
+Usage: python scripts/bench_connection_search.py [queries]
+"""
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, '..', 'api'))
+
+from connections import JOURNEY_ARRIVAL_SLACK_MINUTES, JOURNEY_MAX_TRANSFERS, Timetable
+from mappers import TRANSPORTATION_MAPPER
+from migrations import create_schema
+
+MODES = ['train', 'bus', 'flight']
+
+def synthetic_rows(legs, stops, seed=7):
+    rng = random.Random(seed)
+    names = [f"Stop {i}" for i in range(stops)]
+    rows = []
+    for i in range(legs):
+        origin, destination = rng.sample(names, 2)
+        departure = rng.randrange(0, 1440, 5)
+        minutes = rng.randrange(30, 12 * 60, 5)
+        rows.append({
+            'id': i, 'transport_type': rng.choice(MODES), 'name': f"Service {i}",
+            'from_location': origin, 'to_location': destination,
+            'departure_time': f"{departure // 60:02d}:{departure % 60:02d}",
+            'arrival_time': None, 'duration': f"{minutes // 60}h {minutes % 60:02d}m",
+            'price': rng.randrange(200, 5000, 50), 'class_type': None
+        })
+    return names, rows
+
+def brute_force(timetable, origin, destination, depart_after, max_transfers):
+    """Every journey up to max_transfers, reduced to its Pareto set"""
+    source, target = origin.lower(), destination.lower()
+    found = set()
+
+    def extend(stop, ready_at, price, legs, visited):
+        for departure, arrival, start, end, cost, change, _ in timetable.connections:
+            if start != stop or end in visited:
+                continue
+            if departure < ready_at + (change if legs else 0):
+                continue
+            if end == target:
+                found.add((arrival, price + cost, legs))
+            elif legs < max_transfers:
+                extend(end, arrival, price + cost, legs + 1, visited | {end})
+
+    extend(source, depart_after, 0.0, 0, {source})
+    return {a for a in found
+            if not any(b != a and b[0] <= a[0] and b[1] <= a[1] and b[2] <= a[2] for b in found)}
+
+def seeded_timetable():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    with open(os.path.join(SCRIPTS_DIR, 'seed_database.sql')) as file:
+        conn.executescript(file.read())
+    return Timetable(TRANSPORTATION_MAPPER.fetch(conn))
+
+if __name__ == "__main__":
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    failures = []
+
+    # Correctness against brute force
+    names, rows = synthetic_rows(60, 8)
+    timetable = Timetable(rows)
+    checked = 0
+    for origin, destination in itertools.permutations(names, 2):
+        for depart_after in (0, 9 * 60, 18 * 60):
+            result = timetable.search(origin, destination, depart_after, max_transfers=2, include_road=False,
+                                      arrival_slack=None)
+            got = {(j['arrival_minutes'], j['price'], j['transfers']) for j in result['journeys']}
+            expected = brute_force(timetable, origin, destination, depart_after, 2)
+            checked += 1
+            if got != expected:
+                failures.append(f"{origin} -> {destination} after {depart_after}: {sorted(got)} != {sorted(expected)}")
+    print(f"brute force: {checked} queries on {len(rows)} legs, {checked - len(failures)} match")
+
+    # Latency
+    print(f"\n{'legs':>7}{'stops':>7}{'connections':>13}{'p50 ms':>9}{'p95 ms':>9}{'journeys':>10}")
+    rng = random.Random(11)
+    for legs, stops in [(1000, 50), (10000, 200), (30000, 400)]:
+        names, rows = synthetic_rows(legs, stops)
+        start = time.perf_counter()
+        timetable = Timetable(rows)
+        build_ms = (time.perf_counter() - start) * 1000
+        timings, counts = [], []
+        for _ in range(queries):
+            origin, destination = rng.sample(names, 2)
+            start = time.perf_counter()
+            result = timetable.search(origin, destination, rng.randrange(0, 1440), include_road=False)
+            timings.append((time.perf_counter() - start) * 1000)
+            counts.append(len(result['journeys']))
+        timings.sort()
+        print(f"{legs:>7}{stops:>7}{len(timetable.connections):>13}{statistics.median(timings):>9.2f}"
+              f"{timings[int(len(timings) * 0.95)]:>9.2f}{statistics.mean(counts):>10.1f}   (built in {build_ms:.0f} ms)")
+
+    # Seeded catalog: no direct Mumbai -> Jamshedpur service
+    result = seeded_timetable().search('Mumbai', 'Jamshedpur')
+    print("\nMumbai -> Jamshedpur (seeded):")
+    for journey in result['journeys']:
+        print(f"  {journey['departure']} -> {journey['arrival']}  ₹{journey['price']:,.0f}  "
+              + ' + '.join(f"{leg['name']} ({leg['from_location']}-{leg['to_location']})" for leg in journey['legs']))
+    if not any(len(journey['legs']) == 2 and journey['legs'][0]['to_location'] == 'Ranchi' for journey in result['journeys']):
+        failures.append("seeded: no Mumbai -> Ranchi -> Jamshedpur journey")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures[:20]))
+        sys.exit(1)
+    print(f"\n✅ connection search matches brute force (up to {JOURNEY_MAX_TRANSFERS} transfers served)")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Accuracy and latency of the chatbot service's local intent matching over
+the labelled multilingual messages in scripts/fallback_eval_set.jsonl.
+
+  legacy    the previous per-intent substring scans plus separate
+            extract_days / extract_interests passes (kept here as the
+            baseline)
+  compiled  api/fallback_intents.analyze_message: one precompiled regex
+            pass returning intent, day count and interests
+
+Usage: python scripts/bench_fallback_intents.py [repeats]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from fallback_intents import analyze_message
+
+EVAL_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fallback_eval_set.jsonl')
+
+LEGACY_INTENTS = [
+    ('greeting', ['hello', 'hi', 'hey', 'namaste', 'namaskar', 'নমস্কার', 'ନମସ୍କାର', 'السلام']),
+    ('tourist_places', ['places', 'tourist', 'visit', 'attraction', 'spots', 'पर्यटन', 'স্থান', 'ପର୍ଯ୍ୟଟନ', 'مقامات']),
+    ('itinerary', ['plan', 'itinerary', 'trip', 'tour', 'day', 'योजना', 'পরিকল্পনা', 'ଯୋଜନା', 'منصوبہ']),
+    ('cultural', ['cultural', 'culture', 'heritage', 'tribal', 'temple', 'सांस्कृतिक', 'সংস্কৃতি', 'ସଂସ୍କୃତି', 'ثقافت']),
+    ('eco_tourism', ['eco', 'nature', 'wildlife', 'forest', 'falls', 'प्राकृतिक', 'প্রকৃতি', 'ପ୍ରକୃତি', 'قدرتی']),
+    ('help', ['help', 'assist', 'support', 'मदद', 'সাহায্য', 'ସାହାଯ୍ୟ', 'مدد'])
+]
+
+def legacy_days(message):
+    import re
+    day_patterns = [r'(\d+)\s*(?:day|days)', r'(\d+)\s*(?:দিন|দিনের)', r'(\d+)\s*(?:दिन|दिनों)']
+    for pattern in day_patterns:
+        match = re.search(pattern, message.lower())
+        if match:
+            return int(match.group(1))
+    word_to_num = {
+        'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+        'ek': 1, 'do': 2, 'teen': 3, 'char': 4, 'panch': 5,
+        'এক': 1, 'দুই': 2, 'তিন': 3, 'চার': 4, 'পাঁচ': 5
+    }
+    for word, num in word_to_num.items():
+        if word in message.lower():
+            return num
+    return None
+
+def legacy_interests(message):
+    message_lower = message.lower()
+    interests = []
+    for interest, keywords in [
+        ('nature', ['nature', 'eco', 'wildlife', 'falls', 'forest', 'प्राकृतिक', 'প্রকৃতি', 'वन', 'বন']),
+        ('cultural', ['cultural', 'culture', 'heritage', 'tribal', 'temple', 'सांस्कृतिक', 'সংস্কৃতি', 'मंदिर', 'মন্দির']),
+        ('adventure', ['adventure', 'trekking', 'sports', 'साहसिक', 'দুঃসাহসিক', 'ट्रेकिंग', 'ট্রেকিং'])
+    ]:
+        if any(keyword in message_lower for keyword in keywords):
+            interests.append(interest)
+    return interests or ['nature']
+
+def legacy_analyze(message):
+    """process_intent_fallback + plan_itinerary as they were: a scan per intent, then days and interests"""
+    lowered = message.lower()
+    intent = next((intent for intent, words in LEGACY_INTENTS if any(word in lowered for word in words)), 'default')
+    result = {'intent': intent, 'days': None, 'interests': None}
+    if intent == 'itinerary':
+        result['days'] = legacy_days(message)
+        result['interests'] = legacy_interests(message)
+    return result
+
+def load_eval_set():
+    with open(EVAL_SET, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def timed(func, message, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(message)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def report(name, examples, results):
+    intents = sum(1 for example, (result, _) in zip(examples, results) if result['intent'] == example['intent'])
+    itinerary = [(example, result) for example, (result, _) in zip(examples, results) if example['intent'] == 'itinerary']
+    days = sum(1 for example, result in itinerary if result['days'] == example['days'])
+    latencies = [latency for _, latency in results]
+    print(f"{name:<10}{intents / len(examples):>10.1%}{days / len(itinerary):>10.1%}"
+          f"{percentile(latencies, 0.5) * 1e6:>11.1f}{percentile(latencies, 0.99) * 1e6:>11.1f}")
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    examples = load_eval_set()
+    languages = sorted({example['language'] for example in examples})
+    print(f"{len(examples)} labelled messages ({', '.join(languages)}), best of {repeats}")
+    print(f"{'matcher':<10}{'intent':>10}{'days':>10}{'p50 µs':>11}{'p99 µs':>11}")
+
+    legacy = [timed(legacy_analyze, example['message'], repeats) for example in examples]
+    compiled = [timed(analyze_message, example['message'], repeats) for example in examples]
+    report('legacy', examples, legacy)
+    report('compiled', examples, compiled)
+
+    misses = [(example, result) for example, (result, _) in zip(examples, compiled)
+              if result['intent'] != example['intent']
+              or (example['intent'] == 'itinerary' and result['days'] != example['days'])]
+    if misses:
+        print("\nCompiled matcher misses:")
+        for example, result in misses:
+            print(f"  {example['message']!r}: expected {example['intent']}/{example['days']}, "
+                  f"got {result['intent']}/{result['days']}")
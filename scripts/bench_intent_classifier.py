@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Accuracy and latency of each intent classification tier over the labelled
+messages in scripts/intent_eval_set.jsonl:
+
+  cache  normalized-message lookup of a previous analysis
+  rules  keyword/regex classifier (api/intents.py)
+  llm    the agent's GPT intent prompt (only with --llm and OPENAI_API_KEY)
+
+"tiered" is what the agent does: rules when confident, else the LLM (or,
+without --llm, the rules' best guess for the escalated messages).
+
+Usage: python scripts/bench_intent_classifier.py [--llm] [repeats]
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from intents import IntentClassifier, classify_rules, INTENT_MIN_CONFIDENCE
+
+EVAL_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_eval_set.jsonl')
+
+def load_eval_set():
+    with open(EVAL_SET, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def timed(func, message, repeats):
+    """Result of func(message) and its fastest-of-N latency in seconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(message)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def report(name, examples, predictions, latencies):
+    correct = sum(1 for example, predicted in zip(examples, predictions) if predicted == example['intent'])
+    accuracy = correct / len(examples) if examples else 0.0
+    p50 = percentile(latencies, 0.50) * 1e6 if latencies else 0.0
+    p99 = percentile(latencies, 0.99) * 1e6 if latencies else 0.0
+    print(f"{name:<18}{len(examples):>6}{accuracy:>11.1%}{p50:>13.1f}{p99:>13.1f}")
+
+def llm_classifier():
+    """The agent's intent workflow with the local tiers switched off"""
+    import ai_agent as agent_module
+    agent_module.intent_classifier = IntentClassifier(min_confidence=float('inf'), cache_size=1)
+    agent = agent_module.ai_agent
+    return lambda message: agent._run(agent._analyze_intent(message))
+
+if __name__ == "__main__":
+    use_llm = '--llm' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--llm']
+    repeats = int(args[0]) if args else 50
+    examples = load_eval_set()
+
+    print(f"{len(examples)} labelled messages, min confidence {INTENT_MIN_CONFIDENCE}, best of {repeats}")
+    print(f"{'tier':<18}{'n':>6}{'accuracy':>11}{'p50 µs':>13}{'p99 µs':>13}")
+
+    rules = [timed(classify_rules, example['message'], repeats) for example in examples]
+    report('rules (all)', examples, [analysis['primary_intent'] for analysis, _ in rules],
+           [latency for _, latency in rules])
+
+    confident = [(example, analysis, latency) for example, (analysis, latency) in zip(examples, rules)
+                 if analysis['confidence'] >= INTENT_MIN_CONFIDENCE]
+    report('rules (confident)', [example for example, _, _ in confident],
+           [analysis['primary_intent'] for _, analysis, _ in confident], [latency for _, _, latency in confident])
+
+    classifier = IntentClassifier()
+    for example, (analysis, _) in zip(examples, rules):
+        classifier.remember(example['message'], analysis)
+    cached = [timed(classifier.cached, example['message'], repeats) for example in examples]
+    report('cache', examples, [analysis['primary_intent'] for analysis, _ in cached],
+           [latency for _, latency in cached])
+
+    escalated = [index for index, (analysis, _) in enumerate(rules) if analysis['confidence'] < INTENT_MIN_CONFIDENCE]
+    tiered = [analysis['primary_intent'] for analysis, _ in rules]
+    tiered_latency = [latency for _, latency in rules]
+
+    if use_llm and os.getenv('OPENAI_API_KEY'):
+        classify_llm = llm_classifier()
+        llm = [timed(classify_llm, examples[index]['message'], 1) for index in escalated]
+        report('llm (escalated)', [examples[index] for index in escalated],
+               [analysis.get('primary_intent') for analysis, _ in llm], [latency for _, latency in llm])
+        for index, (analysis, latency) in zip(escalated, llm):
+            tiered[index] = analysis.get('primary_intent')
+            tiered_latency[index] += latency
+    elif use_llm:
+        print("(OPENAI_API_KEY not set; skipping the llm tier)")
+
+    report('tiered', examples, tiered, tiered_latency)
+    print(f"\nEscalated to the LLM: {len(escalated)}/{len(examples)} "
+          f"({len(escalated) / len(examples):.0%})")
+    misses = [(example['message'], example['intent'], analysis['primary_intent'], analysis['confidence'])
+              for example, (analysis, _) in zip(examples, rules)
+              if analysis['primary_intent'] != example['intent'] and analysis['confidence'] >= INTENT_MIN_CONFIDENCE]
+    if misses:
+        print("Confident rule misclassifications:")
+        for message, expected, predicted, confidence in misses:
+            print(f"  {message!r}: expected {expected}, got {predicted} ({confidence})")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Latency and plan quality of the itinerary planner (api/planner.py) on the
+seeded catalog (scripts/seed_database.sql) and on a synthetic catalog ten
+times its size. Every plan is checked: no day runs past PLANNER_DAY_HOURS,
+the total stays within the budget, and planning twice gives the same plan:
+timed runs are compared only when neither hit the time limit, and every case
+is also planned twice on a fixed expansion budget with no time limit.
+
+Exits non-zero on any violation.
+
+Usage: python scripts/bench_itinerary_planner.py [rounds]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, '..', 'api'))
+
+from mappers import ACTIVITY_MAPPER, HOTEL_MAPPER, TRANSPORTATION_MAPPER
+from migrations import create_schema
+from planner import PLANNER_DAY_HOURS, TripCatalog, plan_trip
+
+CASES = [
+    (1, ['culture'], None),
+    (2, ['nature'], 12000),
+    (3, ['culture', 'nature'], None),
+    (3, ['adventure', 'wildlife', 'budget'], 15000),
+    (5, ['spiritual', 'art'], 25000),
+    (7, ['culture', 'nature', 'luxury'], None),
+    (4, ['wildlife'], 6000)
+]
+# Expansion budget for the reproducibility check; it cuts the larger synthetic
+# cases short, which must still give the same plan every time
+REPRO_EXPANSIONS = 5000
+
+def seeded_catalog() -> TripCatalog:
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    with open(os.path.join(SCRIPTS_DIR, 'seed_database.sql')) as file:
+        conn.executescript(file.read())
+    return TripCatalog(ACTIVITY_MAPPER.fetch(conn), HOTEL_MAPPER.fetch(conn), TRANSPORTATION_MAPPER.fetch(conn))
+
+def synthetic_catalog(catalog: TripCatalog, copies: int = 10) -> TripCatalog:
+    """Variants of every seeded activity with shifted ratings, prices and durations"""
+    activities = []
+    for copy in range(copies):
+        for activity in catalog.activities:
+            variant = dict(activity, id=f"{activity['id']}-{copy}", title=f"{activity['title']} #{copy}")
+            variant['rating'] = round((activity.get('rating') or 3.0) - 0.1 * (copy % 5), 1)
+            variant['price'] = (activity.get('price') or 0) * (1 + 0.1 * copy)
+            variant['duration'] = f"{max(1, int(activity['hours']) - copy % 3)} hours"
+            activities.append(variant)
+    hotels = [hotel for options in catalog.hotels.values() for hotel in options]
+    return TripCatalog(activities, hotels, list(catalog.legs.values()))
+
+def violations(plan, budget):
+    found = [f"day {entry['day']} runs {entry['hours']}h" for entry in plan['days'] if entry['hours'] > PLANNER_DAY_HOURS]
+    if budget is not None and plan['within_budget'] and plan['total_cost'] > budget:
+        found.append(f"total {plan['total_cost']} is over the {budget} budget")
+    return found
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    seeded = seeded_catalog()
+    failures = []
+
+    for name, catalog in [('seeded', seeded), ('synthetic x10', synthetic_catalog(seeded))]:
+        print(f"\n{name}: {len(catalog.activities)} activities, {rounds} rounds per case")
+        print(f"{'days':>4}  {'interests':<32}{'budget':>8}{'activities':>11}{'total':>9}{'p50 ms':>8}{'max ms':>8}  timed out")
+        for days, interests, budget in CASES:
+            timings, plans = [], []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                plans.append(plan_trip(days, interests, budget=budget, catalog=catalog))
+                timings.append((time.perf_counter() - start) * 1000)
+            plan = plans[0]
+            failures.extend(f"{name} {days}d {interests}: {problem}" for problem in violations(plan, budget))
+            finished = [other['days'] for other in plans if not other['search']['timed_out']]
+            repeated = [plan_trip(days, interests, budget=budget, catalog=catalog, time_limit_ms=float('inf'),
+                                  max_expanded=REPRO_EXPANSIONS)['days'] for _ in range(2)]
+            if any(other != finished[0] for other in finished) or repeated[0] != repeated[1]:
+                failures.append(f"{name} {days}d {interests}: the plan changed between runs")
+            count = sum(item['type'] == 'activity' for entry in plan['days'] for item in entry['items'])
+            print(f"{days:>4}  {', '.join(interests):<32}{budget or '-':>8}{count:>11}{plan['total_cost']:>9,.0f}"
+                  f"{statistics.median(timings):>8.2f}{max(timings):>8.2f}  {plan['search']['timed_out']}")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+    print("\n✅ plans fit their days and budgets and are reproducible")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Rendering throughput of the chatbot service's itinerary templates
+(api/itinerary_templates.py) over every (days, interests, language)
+combination: cold renders with the memo bypassed, then memoized lookups
+as served to repeat requests.
+
+Usage: python scripts/bench_itinerary_templates.py [rounds]
+"""
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+import itinerary_templates
+from itinerary_templates import ITINERARY_MAX_DAYS, ITINERARY_TEXT, render_itinerary
+
+INTERESTS = ['nature', 'cultural', 'adventure']
+
+def combinations():
+    interest_sets = [list(subset) for size in range(1, len(INTERESTS) + 1)
+                     for subset in itertools.combinations(INTERESTS, size)]
+    return [(days, interests, language)
+            for days in range(1, ITINERARY_MAX_DAYS + 1)
+            for interests in interest_sets
+            for language in ITINERARY_TEXT]
+
+def throughput(func, cases, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for days, interests, language in cases:
+            func(days, interests, language)
+    elapsed = time.perf_counter() - start
+    return rounds * len(cases) / elapsed, elapsed / (rounds * len(cases))
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cases = combinations()
+    cold = itinerary_templates._render.__wrapped__
+
+    def render_cold(days, interests, language):
+        return cold(days, tuple(sorted(set(interests))), language)
+
+    print(f"{len(cases)} combinations ({ITINERARY_MAX_DAYS} days x 7 interest sets x {len(ITINERARY_TEXT)} languages), "
+          f"{rounds} rounds")
+    print(f"{'render':<10}{'per second':>14}{'µs each':>10}")
+    for name, func in [('cold', render_cold), ('memoized', render_itinerary)]:
+        rate, each = throughput(func, cases, rounds)
+        print(f"{name:<10}{rate:>14,.0f}{each * 1e6:>10.2f}")
+    print(f"\nmemo: {itinerary_templates.cache_info()}")
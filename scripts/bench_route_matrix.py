@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Build, load and lookup times of the road route matrix (api/routing.py),
+with consistency checks on every pair of places:
+
+- the matrix is symmetric and no route beats a detour through a third place
+- each route's legs add up to its distance and time
+- a matrix loaded from disk matches the computed one, and a changed road
+  graph ignores the stale file
+
+Exits non-zero on any violation.
+
+Usage: python scripts/bench_route_matrix.py [lookups]
+"""
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from routing import ROAD_EDGES, RoadNetwork
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+if __name__ == "__main__":
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    path = os.path.join(tempfile.mkdtemp(), 'route_matrix.json')
+    failures = []
+
+    computed = RoadNetwork(cache_path=path)
+    computed.travel('Ranchi', 'Ranchi')
+    loaded = RoadNetwork(cache_path=path)
+    loaded.travel('Ranchi', 'Ranchi')
+    places = computed.places
+    print(f"{len(places)} places, {len(ROAD_EDGES)} road links")
+    print(f"matrix computed in {computed.build_ms} ms ({computed.source}), "
+          f"loaded in {loaded.build_ms} ms ({loaded.source})")
+    if computed.source != 'computed' or loaded.source != 'disk':
+        failures.append(f"expected computed then disk, got {computed.source} then {loaded.source}")
+
+    for a, b in itertools.product(places, repeat=2):
+        km, minutes = computed.travel(a, b)
+        if loaded.travel(a, b) != (km, minutes):
+            failures.append(f"{a} -> {b}: the loaded matrix differs")
+        if computed.travel(b, a)[1] != minutes:
+            failures.append(f"{a} -> {b}: not symmetric")
+        route = computed.route(a, b)
+        if abs(sum(leg['duration_minutes'] for leg in route['legs']) - minutes) > 0.5 or \
+                abs(sum(leg['distance_km'] for leg in route['legs']) - km) > 0.5:
+            failures.append(f"{a} -> {b}: legs don't add up to the route")
+        for via in places:
+            if computed.travel(a, via)[1] + computed.travel(via, b)[1] < minutes - 0.2:
+                failures.append(f"{a} -> {b}: slower than going through {via}")
+
+    changed = RoadNetwork(ROAD_EDGES + [('Ranchi', 'Netarhat', 150, 'highway')], cache_path=path)
+    changed.travel('Ranchi', 'Ranchi')
+    if changed.source != 'computed':
+        failures.append("a changed road graph reused the stale matrix file")
+
+    pairs = list(itertools.product(places, repeat=2))
+    start = time.perf_counter()
+    for i in range(lookups):
+        computed.travel(*pairs[i % len(pairs)])
+    elapsed = time.perf_counter() - start
+    print(f"travel(): {lookups / elapsed:,.0f} lookups/s ({elapsed / lookups * 1e6:.2f} µs each)")
+    start = time.perf_counter()
+    for i in range(lookups // 10):
+        computed.route(*pairs[i % len(pairs)])
+    elapsed = time.perf_counter() - start
+    print(f"route():  {lookups // 10 / elapsed:,.0f} lookups/s ({elapsed / (lookups // 10) * 1e6:.2f} µs each)")
+
+    sample = computed.route('Ranchi', 'Netarhat')
+    print(f"\nRanchi -> Netarhat: {sample['distance_km']} km, {sample['duration_minutes']} min via {' -> '.join(sample['path'])}")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures[:20]))
+        sys.exit(1)
+    print("\n✅ route matrix is consistent and survives a round trip through disk")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-row cost of turning a 10k-row guides result set into
+API dicts (and JSON). Compares the original SELECT * + positional indexing,
+reading list fields back through the guide_tags join table, and the
+RowMapper used by the routes today.
+
+Usage: python scripts/bench_row_mapping.py [rows] [repeats]
+"""
+import gc
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from migrations import create_schema
+from mappers import GUIDE_MAPPER
+
+LOCATIONS = ["Ranchi", "Jamshedpur", "Deoghar", "Hazaribagh", "Netarhat", "Betla"]
+SPECIALTIES = ["Cultural Heritage", "Tribal History", "Local Festivals", "Art & Crafts",
+               "Dokra Workshops", "Adventure Tourism", "Trekking", "Wildlife", "Spiritual Sites"]
+LANGUAGES = ["Hindi", "English", "Santhali", "Bengali", "Oraon", "Sanskrit"]
+
+def build_database(rows):
+    conn = sqlite3.connect(':memory:')
+    create_schema(conn)
+    rng = random.Random(7)
+    conn.executemany('''
+        INSERT INTO guides (name, location, specialties, languages, experience_years,
+                            price_per_day, rating, total_reviews, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (f"Guide {i}", rng.choice(LOCATIONS),
+         ','.join(rng.sample(SPECIALTIES, 3)), ','.join(rng.sample(LANGUAGES, 2)),
+         rng.randint(1, 20), rng.randint(1500, 4000), round(rng.uniform(3.5, 5.0), 1),
+         rng.randint(0, 300), "Experienced local guide for Jharkhand's heritage and nature.")
+        for i in range(rows)
+    ])
+    conn.commit()
+    return conn
+
+def positional_mapping(conn):
+    """The pre-RowMapper code path from get_guides"""
+    guide_list = []
+    for guide in conn.execute("SELECT * FROM guides WHERE 1=1").fetchall():
+        guide_list.append({
+            "id": guide[0],
+            "name": guide[1],
+            "location": guide[2],
+            "specialties": guide[3].split(',') if guide[3] else [],
+            "languages": guide[4].split(',') if guide[4] else [],
+            "experience_years": guide[5],
+            "price_per_day": guide[6],
+            "rating": guide[7],
+            "total_reviews": guide[8],
+            "availability_status": guide[9],
+            "description": guide[10]
+        })
+    return guide_list
+
+def tag_join_mapping(conn):
+    """Positional mapping with list fields read back from the normalized tag tables"""
+    guides = conn.execute("SELECT * FROM guides WHERE 1=1").fetchall()
+    tags = defaultdict(lambda: defaultdict(list))
+    for guide_id, kind, name in conn.execute('''
+        SELECT jt.guide_id, t.kind, t.name
+        FROM json_each(?) ids
+        JOIN guide_tags jt ON jt.guide_id = ids.value
+        JOIN tags t ON t.id = jt.tag_id
+        ORDER BY jt.guide_id, t.kind, jt.position
+    ''', (json.dumps([guide[0] for guide in guides]),)):
+        tags[guide_id][kind].append(name)
+    guide_list = []
+    for guide in guides:
+        guide_list.append({
+            "id": guide[0],
+            "name": guide[1],
+            "location": guide[2],
+            "specialties": tags[guide[0]]['specialty'],
+            "languages": tags[guide[0]]['language'],
+            "experience_years": guide[5],
+            "price_per_day": guide[6],
+            "rating": guide[7],
+            "total_reviews": guide[8],
+            "availability_status": guide[9],
+            "description": guide[10]
+        })
+    return guide_list
+
+def row_mapper(conn):
+    return GUIDE_MAPPER.fetch(conn)
+
+def best_of(repeats, func):
+    timings = []
+    gc.disable()  # as timeit does, so collector pauses don't skew the comparison
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(timings)
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    conn = build_database(rows)
+
+    print(f"Guides result set: {rows} rows, best of {repeats}")
+    print(f"{'strategy':<22}{'map µs/row':>12}{'map+json µs/row':>18}")
+    strategies = [
+        ('positional + split', positional_mapping),
+        ('positional + tag join', tag_join_mapping),
+        ('RowMapper', row_mapper),
+    ]
+    for name, strategy in strategies:
+        mapped = best_of(repeats, lambda: strategy(conn))
+        serialized = best_of(repeats, lambda: json.dumps(strategy(conn), sort_keys=True, separators=(',', ':')))
+        print(f"{name:<22}{mapped / rows * 1e6:>12.2f}{serialized / rows * 1e6:>18.2f}")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Check the AI agent's two call modes against the local fake OpenAI server
+(scripts/fake_openai_server.py): "two_step" must make two completions per
+LLM-answered message and "single" exactly one, with the same response
+shape. Itineraries are the exception: the plan is phrased by its own
+completion in both modes, never by the draft written before planning.
+Latency per mode is reported.
+
+The local intent tiers are disabled so every message reaches the LLM.
+Itineraries are planned from a fresh seeded catalog database in a temp
+directory.
+Exits non-zero on any mismatch.
+
+Usage: python scripts/check_agent_modes.py [latency_seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, '..', 'api'))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from fake_openai_server import FakeOpenAIServer
+
+MESSAGES = [
+    "Can you find me a guide who knows tribal history?",
+    "Which activities and workshops are good for kids?",
+    "Please plan an itinerary around Netarhat",
+    "Why is Netarhat called the Queen of Chotanagpur?"
+]
+PLANNED = {"Please plan an itinerary around Netarhat"}
+
+if __name__ == "__main__":
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+    server = FakeOpenAIServer(latency=latency).start()
+    os.environ.update({
+        'OPENAI_API_KEY': 'fake-key',
+        'OPENAI_BASE_URL': server.base_url,
+        'LLM_CACHE_PATH': '',
+        'PRORAAHI_DB_PATH': os.path.join(tempfile.mkdtemp(), 'agent_modes.db')
+    })
+
+    from database import db
+    from migrations import create_schema
+    with db.connection() as conn:
+        create_schema(conn)
+        with open(os.path.join(SCRIPTS_DIR, 'seed_database.sql')) as file:
+            conn.executescript(file.read())
+
+    import ai_agent as agent_module
+    from intents import IntentClassifier
+    from llm_cache import response_cache
+
+    agent = agent_module.ai_agent
+    failures = []
+    results = {}
+    print(f"{'mode':<10}{'message':<52}{'calls':>6}{'seconds':>9}")
+    for mode in agent_module.CALL_MODES:
+        # Fresh caches so neither mode benefits from the other's answers
+        agent_module.intent_classifier = IntentClassifier(min_confidence=float('inf'))
+        response_cache.clear()
+        for message in MESSAGES:
+            server.reset()
+            start = time.perf_counter()
+            result = agent.process_user_request(message, mode=mode)
+            elapsed = time.perf_counter() - start
+            calls = len(server.requests)
+            results[(mode, message)] = result
+            print(f"{mode:<10}{message[:50]:<52}{calls:>6}{elapsed:>9.2f}")
+
+            drafted = result.get('response', '').startswith('Single-call reply')
+            expected_calls = 1 if mode == 'single' and message not in PLANNED else 2
+            if calls != expected_calls:
+                failures.append(f"{mode}: {message!r} made {calls} completions, expected {expected_calls}")
+            if 'error' in result:
+                failures.append(f"{mode}: {message!r} failed: {result['error']}")
+            if message in PLANNED and drafted:
+                failures.append(f"{mode}: {message!r} used the draft instead of phrasing the plan")
+            elif mode == 'single' and message not in PLANNED and not drafted:
+                failures.append(f"single: {message!r} did not use the drafted reply")
+
+    for message in MESSAGES:
+        two_step, single = results[('two_step', message)], results[('single', message)]
+        if set(two_step) != set(single) or two_step.get('workflow_stage') != single.get('workflow_stage'):
+            failures.append(f"{message!r}: response shapes differ ({sorted(two_step)} vs {sorted(single)})")
+
+    unknown = agent.process_user_request(MESSAGES[0], mode='three_step')
+    if 'Unknown mode' not in unknown.get('error', ''):
+        failures.append("an unknown mode was not rejected")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+    print("\n✅ single mode answers with one completion and the same response shape")
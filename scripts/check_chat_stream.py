@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Check streamed chat replies against the local fake OpenAI server
+(scripts/fake_openai_server.py):
+
+- the agent stream yields tokens as they arrive and they add up to the
+  final "done" response
+- POST /api/chat/stream (Flask) and the ASGI twin emit start, token...,
+  done Server-Sent Events and store the transcript
+- closing the stream early aborts the upstream generation and stores the
+  partial reply as a cancelled turn
+- an agent error mid-stream ends with an error event and then done
+
+Exits non-zero on any mismatch.
+
+Usage: python scripts/check_chat_stream.py
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, '..', 'api'))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from fake_openai_server import FakeOpenAIServer
+
+# Long enough that the reply is still streaming when the client goes away
+MESSAGE = ("Why is Netarhat called the Queen of Chotanagpur? " * 8).strip()
+
+def parse_events(raw: str):
+    events = []
+    for frame in raw.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in frame.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+def stored_turns(session_id):
+    from database import db
+    from transcripts import transcript_writer
+    transcript_writer.flush()
+    with db.connection() as conn:
+        rows = conn.execute(
+            "SELECT ai_response, context_data FROM chat_messages WHERE session_id = ?", (session_id,)
+        ).fetchall()
+    return [(row[0], json.loads(row[1])) for row in rows]
+
+def wait_for_cancel(server, timeout=2.0):
+    deadline = time.time() + timeout
+    while server.cancelled == 0 and time.time() < deadline:
+        time.sleep(0.02)
+    return server.cancelled
+
+async def asgi_request(app, body, disconnect_after=None):
+    """Drive the ASGI app directly; disconnect after that many body chunks"""
+    chunks = []
+    disconnected = asyncio.Event()
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {'type': 'http.request', 'body': json.dumps(body).encode('utf-8'), 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+            if disconnect_after is not None and len(chunks) >= disconnect_after:
+                disconnected.set()
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/chat/stream', 'headers': []}
+    await app(scope, receive, send)
+    return b''.join(chunks).decode('utf-8')
+
+if __name__ == "__main__":
+    server = FakeOpenAIServer(latency=0.05, stream_delay=0.02).start()
+    os.environ.update({
+        'OPENAI_API_KEY': 'fake-key',
+        'OPENAI_BASE_URL': server.base_url,
+        'LLM_CACHE_PATH': '',
+        'PRORAAHI_DB_PATH': os.path.join(tempfile.mkdtemp(), 'stream.db')
+    })
+
+    import ai_agent as agent_module
+    from intents import IntentClassifier
+    from llm_cache import response_cache
+    from app import app
+    from asgi import app as asgi_app
+
+    agent = agent_module.ai_agent
+    agent_module.intent_classifier = IntentClassifier(min_confidence=float('inf'))
+    failures = []
+
+    # Agent stream: tokens add up to the final response
+    response_cache.clear()
+    server.reset()
+    events = list(agent.stream_user_request(MESSAGE))
+    tokens = [value for kind, value in events if kind == 'token']
+    kind, result = events[-1]
+    if kind != 'done' or len(tokens) < 10 or ''.join(tokens) != result.get('response'):
+        failures.append(f"agent stream: {len(tokens)} tokens did not add up to the done response")
+    if not any(request.get('stream') for request in server.requests):
+        failures.append("agent stream: the reply completion was not streamed")
+
+    # Cached replies still stream as one token
+    server.reset()
+    events = list(agent.stream_user_request(MESSAGE))
+    if server.requests and any(request.get('stream') for request in server.requests):
+        failures.append("agent stream: a cached reply was generated again")
+    if events[-1][1].get('response') != result.get('response'):
+        failures.append("agent stream: the cached reply differs")
+
+    # Agent stream cancellation aborts the upstream request
+    response_cache.clear()
+    server.reset()
+    stream = agent.stream_user_request(MESSAGE)
+    for kind, value in stream:
+        if kind == 'token' and value.strip() == 'Netarhat':
+            break
+    stream.close()
+    if not wait_for_cancel(server):
+        failures.append("agent stream: closing the stream did not abort the upstream generation")
+
+    # Flask route
+    response_cache.clear()
+    client = app.test_client()
+    response = client.post('/api/chat/stream', json={'message': MESSAGE, 'session_id': 'flask-stream'})
+    events = parse_events(response.get_data(as_text=True))
+    names = [name for name, _ in events]
+    if response.mimetype != 'text/event-stream' or names[0] != 'start' or names[-1] != 'done' or 'token' not in names:
+        failures.append(f"flask: unexpected events {names[:3]}...{names[-2:]}")
+    elif ''.join(data['text'] for name, data in events if name == 'token') != events[-1][1]['response']:
+        failures.append("flask: tokens did not add up to the done response")
+    if [turn[0] for turn in stored_turns('flask-stream')] != [events[-1][1]['response']]:
+        failures.append("flask: the streamed turn was not stored")
+
+    bad_mode = client.post('/api/chat/stream', json={'message': MESSAGE, 'mode': 'three_step'})
+    if bad_mode.status_code != 400:
+        failures.append("flask: an unknown mode was not rejected")
+
+    # Flask cancellation: the server closes the response iterable on disconnect
+    response_cache.clear()
+    server.reset()
+    response = client.post('/api/chat/stream', json={'message': MESSAGE, 'session_id': 'flask-cancel'}, buffered=False)
+    frames = iter(response.response)
+    for _ in range(4):
+        next(frames)
+    response.close()
+    if not wait_for_cancel(server):
+        failures.append("flask: a client disconnect did not abort the upstream generation")
+    turns = stored_turns('flask-cancel')
+    if len(turns) != 1 or turns[0][1]['workflow_stage'] != 'cancelled' or not turns[0][0]:
+        failures.append(f"flask: the cancelled turn was not stored with its partial reply ({turns})")
+
+    # ASGI route, complete and cancelled
+    response_cache.clear()
+    raw = asyncio.run(asgi_request(asgi_app, {'message': MESSAGE, 'session_id': 'asgi-stream'}))
+    events = parse_events(raw)
+    if events[0][0] != 'start' or events[-1][0] != 'done' or \
+            ''.join(data['text'] for name, data in events if name == 'token') != events[-1][1]['response']:
+        failures.append("asgi: tokens did not add up to the done response")
+
+    response_cache.clear()
+    server.reset()
+    asyncio.run(asgi_request(asgi_app, {'message': MESSAGE, 'session_id': 'asgi-cancel'}, disconnect_after=4))
+    if not wait_for_cancel(server):
+        failures.append("asgi: a client disconnect did not abort the upstream generation")
+    turns = stored_turns('asgi-cancel')
+    if len(turns) != 1 or turns[0][1]['workflow_stage'] != 'cancelled':
+        failures.append(f"asgi: the cancelled turn was not stored ({turns})")
+
+    # An agent error after the headers went out still ends the stream
+    def failing_stream(*args, **kwargs):
+        yield 'token', 'Partial'
+        raise RuntimeError('agent failed')
+
+    async def failing_stream_async(*args, **kwargs):
+        yield 'token', 'Partial'
+        raise RuntimeError('agent failed')
+
+    agent.stream_user_request, agent.stream_user_request_async = failing_stream, failing_stream_async
+    response = client.post('/api/chat/stream', json={'message': MESSAGE, 'session_id': 'flask-error'})
+    for label, events, session in [
+            ('flask', parse_events(response.get_data(as_text=True)), 'flask-error'),
+            ('asgi', parse_events(asyncio.run(asgi_request(asgi_app, {'message': MESSAGE, 'session_id': 'asgi-error'}))),
+             'asgi-error')]:
+        if [name for name, _ in events] != ['start', 'token', 'error', 'done']:
+            failures.append(f"{label}: an agent error gave events {[name for name, _ in events]}")
+        if [(text, context['workflow_stage']) for text, context in stored_turns(session)] != [('Partial', 'error')]:
+            failures.append(f"{label}: the failed turn was not stored with its partial reply")
+
+    if failures:
+        print("❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+    print("✅ chat replies stream as SSE tokens, persist, and cancel upstream on disconnect")
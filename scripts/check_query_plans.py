@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Run EXPLAIN QUERY PLAN over the filtered queries issued by the API routes
+and fail if any of them falls back to a full table scan, or if the booking
+inventory queries miss the index they are written for.
+
+The queries are the ones the routes' own helpers (mappers, filters,
+pagination) execute, recorded while they run, so the audit follows any
+change to them. The database is opened read-only and must already be
+migrated; the helpers run against an in-memory copy of it.
+
+Usage: python scripts/check_query_plans.py [path/to/proraahi.db | :memory:]
+"""
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from filters import activity_filters, guide_filters, hotel_filters, transportation_filters
+from inventory import Reservation, availability, hold, release_expired, sweep_expired, units_left
+from mappers import ACTIVITY_MAPPER, GUIDE_MAPPER, HOTEL_MAPPER, TRANSPORTATION_MAPPER
+from migrations import MIGRATIONS, create_schema, schema_version
+from pagination import encode_cursor, fetch_all, fetch_page
+
+class RecordingConnection:
+    """Runs statements on a connection and keeps each (sql, parameters) for EXPLAIN"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, params))
+        return self.conn.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        if seq_of_params:
+            self.statements.append((sql, seq_of_params[0]))
+        return self.conn.executemany(sql, seq_of_params)
+
+    def commit(self):
+        self.conn.commit()
+
+SAMPLE_DATE = '2030-01-01'
+
+def sample_transport(conn: sqlite3.Connection) -> int:
+    """A transportation row with a lapsed one-seat hold on SAMPLE_DATE, added to the copy once"""
+    row = conn.execute("SELECT id FROM transportation WHERE name = 'Query plan audit'").fetchone()
+    if row:
+        return row[0]
+    transport_id = conn.execute('''
+        INSERT INTO transportation (transport_type, name, from_location, to_location)
+        VALUES ('bus', 'Query plan audit', 'Ranchi', 'Hazaribagh')
+    ''').lastrowid
+    conn.execute('''
+        INSERT INTO inventory (resource_type, resource_id, date, capacity, reserved)
+        VALUES ('transportation', ?, ?, 40, 1)
+    ''', (transport_id, SAMPLE_DATE))
+    conn.execute('''
+        INSERT INTO bookings (booking_type, booking_data, resource_type, resource_id, start_date, days,
+                              quantity, hold_expires_at)
+        VALUES ('transportation', '{}', 'transportation', ?, ?, 1, 1, 0)
+    ''', (transport_id, SAMPLE_DATE))
+    conn.commit()
+    return transport_id
+
+# (route, helper call) for every WHERE clause the routes issue. Unfiltered
+# catalog listings are full reads by design and are not listed.
+ROUTE_QUERIES = [
+    ('get_guides (location)',
+     lambda conn: fetch_all(conn, GUIDE_MAPPER, *guide_filters(location='Ranchi'))),
+    ('get_guides (specialty)',
+     lambda conn: fetch_all(conn, GUIDE_MAPPER, *guide_filters(specialty='Trek'))),
+    ('get_guides (location + language)',
+     lambda conn: fetch_all(conn, GUIDE_MAPPER, *guide_filters(location='Ranchi', language='Santhali'))),
+    ('get_activities (category)',
+     lambda conn: fetch_all(conn, ACTIVITY_MAPPER, *activity_filters(category='Adventure'))),
+    ('get_activities (location)',
+     lambda conn: fetch_all(conn, ACTIVITY_MAPPER, *activity_filters(location='Ranchi'))),
+    ('get_activities (category + location)',
+     lambda conn: fetch_all(conn, ACTIVITY_MAPPER, *activity_filters(category='Adventure', location='Netarhat'))),
+    ('get_hotels (location)',
+     lambda conn: fetch_all(conn, HOTEL_MAPPER, *hotel_filters(location='Ranchi'))),
+    ('get_hotels (amenity)',
+     lambda conn: fetch_all(conn, HOTEL_MAPPER, *hotel_filters(amenity='Spa'))),
+    ('get_guides (keyset page by rating)',
+     lambda conn: fetch_page(conn, GUIDE_MAPPER, '', [], 'rating', 50, encode_cursor('rating', 4.5, 100))),
+    ('get_hotels (keyset page by price)',
+     lambda conn: fetch_page(conn, HOTEL_MAPPER, '', [], 'price', 50, encode_cursor('price', 3000, 2))),
+    ('search_transportation',
+     lambda conn: TRANSPORTATION_MAPPER.fetch(conn, *transportation_filters('Delhi', 'Ranchi'))),
+    # Inline in create_booking
+    ('create_booking (user lookup)',
+     lambda conn: conn.execute('SELECT id FROM users WHERE email = ?', ('guest@example.com',))),
+    ('create_booking (hold)',
+     lambda conn: hold(conn, Reservation('transportation', sample_transport(conn.conn), SAMPLE_DATE, 3))),
+    ('search_transportation (seats left)',
+     lambda conn: units_left(conn, 'transportation', [(sample_transport(conn.conn), SAMPLE_DATE)])),
+    ('get_availability',
+     lambda conn: availability(conn, 'transportation', sample_transport(conn.conn), SAMPLE_DATE, 7)),
+    ('sweep_expired',
+     lambda conn: sweep_expired(conn, now=-1)),
+    ('release_expired',
+     lambda conn: sample_transport(conn.conn) and release_expired(conn)),
+]
+
+# Index (as named in the plan) each inventory query must be answered with
+REQUIRED_INDEXES = {
+    'create_booking (hold)': 'inventory USING PRIMARY KEY',
+    'search_transportation (seats left)': 'inventory USING PRIMARY KEY',
+    'get_availability': 'inventory USING PRIMARY KEY',
+    'sweep_expired': 'idx_bookings_hold_expiry',
+    'release_expired': 'idx_bookings_hold_expiry'
+}
+
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+def query_plan(conn, query, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+def find_table_scans(conn):
+    """Return (route, plan detail) for every audited query that scans a table or misses its index"""
+    failures = []
+    for route, run in ROUTE_QUERIES:
+        recorder = RecordingConnection(conn)
+        run(recorder)
+        conn.commit()
+        details = [detail for query, params in recorder.statements
+                   if query.lstrip().upper().startswith(_EXPLAINABLE)
+                   for detail in query_plan(conn, query, params)]
+        failures += [(route, detail) for detail in details
+                     if detail.startswith('SCAN ') and 'VIRTUAL TABLE' not in detail]
+        required = REQUIRED_INDEXES.get(route)
+        if required and not any(required in detail for detail in details):
+            failures.append((route, f"does not use {required}"))
+    return failures
+
+def open_copy(db_path: str) -> sqlite3.Connection:
+    """In-memory copy of the database at db_path, which is only ever read"""
+    copy = sqlite3.connect(':memory:')
+    if db_path == ':memory:':
+        create_schema(copy)
+        return copy
+    source = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        version = schema_version(source)
+        if version != len(MIGRATIONS):
+            print(f"❌ {db_path} is at schema version {version} of {len(MIGRATIONS)}; start the API once to migrate it")
+            sys.exit(2)
+        source.backup(copy)
+    finally:
+        source.close()
+    return copy
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.getenv('PRORAAHI_DB_PATH', 'proraahi.db')
+    if db_path != ':memory:' and not os.path.exists(db_path):
+        print(f"❌ Database not found at {db_path}; start the API once to create it")
+        sys.exit(2)
+
+    conn = open_copy(db_path)
+    failures = find_table_scans(conn)
+    conn.close()
+
+    for route, detail in failures:
+        print(f"❌ {route}: {detail}")
+    if failures:
+        sys.exit(1)
+    print(f"✅ {len(ROUTE_QUERIES)} route queries use indexes")
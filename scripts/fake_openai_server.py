@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat completions API, for exercising the AI
+agent without network access or API spend. Point the agent at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 and any OPENAI_API_KEY.
+
+JSON-mode requests get an intent analysis guessed from keywords, plus a
+"response" field when the prompt asks for one (single-call mode); other
+requests get "Reply to: <last user message>". Every call sleeps for the
+configured latency and is counted. With "stream": true the reply is sent
+as chat.completion.chunk events, one word per chunk, stream_delay apart;
+disconnected streams are counted in `cancelled`.
+
+Usage: python scripts/fake_openai_server.py [port] [latency_seconds]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+GUESSED_INTENTS = [
+    ('guide', 'guide_booking'),
+    ('itinerary', 'itinerary_creation'),
+    ('plan', 'itinerary_creation'),
+    ('activit', 'activity_planning'),
+    ('workshop', 'activity_planning'),
+    ('hotel', 'accommodation_booking'),
+    ('train', 'transportation_booking')
+]
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, port: int = 0, latency: float = 0.0, stream_delay: float = 0.0):
+        super().__init__(('127.0.0.1', port), FakeCompletionHandler)
+        self.latency = latency
+        self.stream_delay = stream_delay
+        self.requests: List[Dict] = []
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def record(self, body: Dict):
+        with self._lock:
+            self.requests.append(body)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled += 1
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.cancelled = 0
+
+    def start(self) -> 'FakeOpenAIServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+def fake_reply(body: Dict) -> str:
+    system_prompt = body['messages'][0]['content']
+    user_message = body['messages'][-1]['content']
+    if not body.get('response_format'):
+        return f"Reply to: {user_message}"
+
+    lowered = user_message.lower()
+    intent = next((intent for keyword, intent in GUESSED_INTENTS if keyword in lowered), 'general_inquiry')
+    analysis = {
+        "primary_intent": intent,
+        "entities": {},
+        "confidence": 0.9,
+        "next_actions": ["respond"]
+    }
+    if '5. response:' in system_prompt:
+        analysis["response"] = f"Single-call reply to: {user_message}"
+    return json.dumps(analysis)
+
+class FakeCompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['content-length'])))
+        self.server.record(body)
+        time.sleep(self.server.latency)
+        if body.get('stream'):
+            return self.stream_reply(body)
+
+        payload = json.dumps({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get('model', 'gpt-4'),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": fake_reply(body)}
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def stream_reply(self, body: Dict):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        words = fake_reply(body).split(' ')
+        try:
+            for i, word in enumerate(words):
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get('model', 'gpt-4'),
+                    "choices": [{
+                        "index": 0,
+                        "finish_reason": "stop" if i == len(words) - 1 else None,
+                        "delta": {"content": word if i == 0 else ' ' + word}
+                    }]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                time.sleep(self.server.stream_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.cancel()
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    server = FakeOpenAIServer(port, latency)
+    print(f"🧪 Fake OpenAI API on {server.base_url} ({latency}s per completion)")
+    server.serve_forever()